@@ -0,0 +1,101 @@
+"""
+Compares deck build time and output size between the PNG (matplotlib) and native
+(PowerPoint chart) backends of create_presentation.
+
+Usage (from the project root):
+    python benchmarks/bench_chart_backends.py --charts 20 --repeat 3
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+from metric_store import load_metric_store  # noqa: E402
+
+
+def build_chart_slides(store, count):
+    """Builds `count` chart slides cycling over every metric of every loaded table."""
+    charts = []
+    for title, table in store.tables.items():
+        quarters = [p for p in table.periods if "Q" in p and " vs " not in p]
+        for metric in table.metrics:
+            charts.append((title, metric, quarters))
+    slides = []
+    for i in range(count):
+        title, metric, quarters = charts[i % len(charts)]
+        slides.append({
+            "slide_type": "title_and_chart",
+            "title": f"{metric} ({i + 1})",
+            "chart_definition": {
+                "data_source_title": title,
+                "data_key": metric,
+                "chart_type": "bar" if i % 2 == 0 else "line",
+                "x_axis_keys": quarters,
+                "chart_title": metric,
+                "x_label": "Quarter",
+                "y_label": "Value",
+                "color": "#1f77b4",
+            },
+            "content_bullets": [f"Benchmark slide {i + 1}"],
+        })
+    return slides
+
+
+def run_backend(create_presentation, slide_defs, store, backend, repeat, chart_workers):
+    timings = []
+    size = 0
+    with tempfile.TemporaryDirectory() as out_dir:
+        output_path = os.path.join(out_dir, f"bench_{backend}.pptx")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+                create_presentation(slide_defs, store, output_path, chart_backend=backend,
+                                    chart_workers=chart_workers if backend == "png" else None)
+            timings.append(time.perf_counter() - start)
+            size = os.path.getsize(output_path)
+    return {
+        "backend": backend,
+        "build_seconds_median": statistics.median(timings),
+        "build_seconds_min": min(timings),
+        "output_bytes": size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--data", default=os.path.join("data", "financial_highlights.json"))
+    parser.add_argument("--charts", type=int, default=10, help="Number of chart slides per deck.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--chart-workers", type=int, default=None,
+                        help="Render PNG charts in a process pool of this size (default: serial).")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    os.chdir(PROJECT_ROOT)
+    from deck_builder import create_presentation
+
+    store = load_metric_store(args.data)
+    slide_defs = build_chart_slides(store, args.charts)
+    results = [run_backend(create_presentation, slide_defs, store, backend, args.repeat, args.chart_workers)
+               for backend in ("png", "native")]
+
+    if args.json:
+        print(json.dumps({"charts": args.charts, "repeat": args.repeat, "results": results}, indent=2))
+        return
+
+    print(f"{args.charts} chart slides, {args.repeat} run(s) per backend")
+    print(f"{'backend':<8} {'median s':>10} {'min s':>10} {'size KB':>10}")
+    for result in results:
+        print(f"{result['backend']:<8} {result['build_seconds_median']:>10.3f} "
+              f"{result['build_seconds_min']:>10.3f} {result['output_bytes'] / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Benchmarks the docx -> JSON -> MetricStore -> chart images -> pptx pipeline on synthetic
+data that scales in tables, metrics, periods, slides and charts.
+
+Usage (from the project root):
+    python benchmarks/bench_pipeline.py --preset small --json > pipeline_baseline.json
+    python benchmarks/bench_pipeline.py --preset small --baseline pipeline_baseline.json
+    python benchmarks/bench_pipeline.py --tables 20 --metrics 500 --periods 40 --slides 2000 --charts 50
+
+Every stage runs in a fresh interpreter (imports excluded from the timing), so each peak
+RSS belongs to that stage alone. Runs offline: no API key or network is needed. With
+--baseline, exits with status 1 when a stage is slower, larger in memory or output than
+the baseline by more than the tolerance.
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(PROJECT_ROOT, "scripts")
+sys.path.insert(0, SCRIPTS_DIR)
+
+from synthetic_data import synthetic_chart_definitions, synthetic_slide_definitions, write_synthetic_docx  # noqa: E402
+
+STAGES = ("docx_to_json", "load_financial_data", "create_chart_image", "create_presentation")
+
+PRESETS = {
+    "small": dict(tables=2, metrics=25, periods=8, slides=20, charts=5),
+    "medium": dict(tables=10, metrics=100, periods=20, slides=200, charts=20),
+    "large": dict(tables=40, metrics=250, periods=40, slides=2000, charts=60),
+}
+
+# Metrics compared against the baseline (all "lower is better")
+TRACKED_METRICS = ("wall_s", "peak_rss_mb", "output_bytes")
+# Differences below these are noise (millisecond stages, allocator jitter), never regressions
+ABSOLUTE_SLACK = {"wall_s": 0.05, "peak_rss_mb": 5.0, "output_bytes": 0}
+
+DOCX_NAME = "synthetic.docx"
+JSON_NAME = "financial_highlights.json"
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# --- Stages (run inside a child process) ---
+
+def _stage_docx_to_json(workdir, config):
+    from convert_docx_to_json import docx_to_json
+
+    def run():
+        docx_to_json(os.path.join(workdir, DOCX_NAME), os.path.join(workdir, JSON_NAME),
+                     streaming=config["docx_streaming"])
+        return os.path.getsize(os.path.join(workdir, JSON_NAME)), config["tables"] * config["metrics"]
+    return run
+
+
+def _stage_load_financial_data(workdir, config):
+    from deck_builder import load_financial_data
+
+    def run():
+        store = load_financial_data(os.path.join(workdir, JSON_NAME))
+        return None, sum(table.values.size for table in store.tables.values())
+    return run
+
+
+def _stage_create_chart_image(workdir, config):
+    from chart_renderer import create_chart_image
+    from deck_builder import load_financial_data
+    store = load_financial_data(os.path.join(workdir, JSON_NAME))
+    charts = synthetic_chart_definitions(config["tables"], config["metrics"], config["periods"], config["charts"])
+    chart_dir = os.path.join(workdir, "charts")
+    os.makedirs(chart_dir, exist_ok=True)
+
+    def run():
+        total = 0
+        for i, chart_definition in enumerate(charts):
+            path = create_chart_image(store, chart_definition, os.path.join(chart_dir, f"chart_{i}.png"))
+            total += os.path.getsize(path) if path else 0
+        return total, len(charts)
+    return run
+
+
+def _stage_create_presentation(workdir, config):
+    from deck_builder import create_presentation, load_financial_data
+    store = load_financial_data(os.path.join(workdir, JSON_NAME))
+    slide_defs = synthetic_slide_definitions(config["tables"], config["metrics"], config["periods"],
+                                             config["slides"], config["charts"])
+    output_path = os.path.join(workdir, "synthetic.pptx")
+
+    def run():
+        create_presentation(slide_defs, store, output_path, chart_backend=config["chart_backend"])
+        return os.path.getsize(output_path), len(slide_defs)
+    return run
+
+
+_STAGE_FUNCTIONS = {
+    "docx_to_json": _stage_docx_to_json,
+    "load_financial_data": _stage_load_financial_data,
+    "create_chart_image": _stage_create_chart_image,
+    "create_presentation": _stage_create_presentation,
+}
+
+
+def run_stage_in_process(stage, workdir, config):
+    """Child-process entry point: sets the stage up, then times and measures only the stage itself."""
+    os.chdir(workdir)
+    with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        run = _STAGE_FUNCTIONS[stage](workdir, config)
+        rss_before = _peak_rss_mb()
+        start = time.perf_counter()
+        output_bytes, items = run()
+        wall = time.perf_counter() - start
+    print(json.dumps({"wall_s": wall, "peak_rss_mb": _peak_rss_mb(), "rss_before_mb": rss_before,
+                      "output_bytes": output_bytes, "items": items}))
+
+
+# --- Orchestration ---
+
+def measure_stage(stage, workdir, config, repeat):
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-stage", stage, "--workdir", workdir,
+             "--config", json.dumps(config)],
+            capture_output=True, text=True, check=False,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Stage {stage} failed:\n{completed.stderr}")
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    rss = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+    return {
+        "wall_s": statistics.median(run["wall_s"] for run in runs),
+        "wall_s_runs": [run["wall_s"] for run in runs],
+        "peak_rss_mb": max(rss) if rss else None,
+        "rss_before_mb": runs[-1]["rss_before_mb"],
+        "output_bytes": runs[-1]["output_bytes"],
+        "items": runs[-1]["items"],
+    }
+
+
+def run_benchmark(config, stages, repeat):
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        write_synthetic_docx(os.path.join(workdir, DOCX_NAME), config["tables"], config["metrics"], config["periods"])
+        generate_s = time.perf_counter() - start
+        if "docx_to_json" not in stages:
+            # Later stages read the JSON that docx_to_json produces
+            measure_stage("docx_to_json", workdir, config, 1)
+        results = {stage: measure_stage(stage, workdir, config, repeat) for stage in STAGES if stage in stages}
+    return {
+        "config": config,
+        "repeat": repeat,
+        "python": sys.version.split()[0],
+        "synthetic_docx_s": generate_s,
+        "stages": results,
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Returns the list of regressions: stage metrics above baseline * (1 + tolerance) by more than the slack."""
+    if baseline.get("config") != result["config"]:
+        raise ValueError("Baseline was recorded with a different configuration: "
+                         f"{baseline.get('config')} vs {result['config']}")
+    regressions = []
+    for stage, metrics in result["stages"].items():
+        previous_metrics = baseline.get("stages", {}).get(stage, {})
+        for metric in TRACKED_METRICS:
+            current, previous = metrics.get(metric), previous_metrics.get(metric)
+            if current is None or not previous:
+                continue
+            if current > previous * (1 + tolerance) and current - previous > ABSOLUTE_SLACK[metric]:
+                regressions.append(f"{stage}.{metric}: {current:.3f} vs baseline {previous:.3f} "
+                                   f"(+{(current / previous - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    for axis in ("tables", "metrics", "periods", "slides", "charts"):
+        parser.add_argument(f"--{axis}", type=int, default=None, help=f"Override the preset's number of {axis}.")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated subset of: " + ", ".join(STAGES))
+    parser.add_argument("--chart-backend", choices=("png", "native"), default="png")
+    parser.add_argument("--python-docx", action="store_true",
+                        help="Convert with python-docx instead of the streaming extractor.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    parser.add_argument("--baseline", help="JSON file from a previous --json run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed increase relative to the baseline (0.25 = 25%%).")
+    parser.add_argument("--run-stage", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    parser.add_argument("--config", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        run_stage_in_process(args.run_stage, args.workdir, json.loads(args.config))
+        return
+
+    config = dict(PRESETS[args.preset])
+    for axis in config:
+        if getattr(args, axis) is not None:
+            config[axis] = getattr(args, axis)
+    config.update(chart_backend=args.chart_backend, docx_streaming=not args.python_docx)
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+
+    result = run_benchmark(config, stages, args.repeat)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(", ".join(f"{key}={value}" for key, value in config.items()) + f" ({args.repeat} run(s) per stage)")
+        print(f"{'stage':<22} {'median s':>10} {'peak RSS MB':>12} {'output KB':>11} {'items':>9}")
+        for stage, metrics in result["stages"].items():
+            rss = "n/a" if metrics["peak_rss_mb"] is None else f"{metrics['peak_rss_mb']:.1f}"
+            size = "-" if metrics["output_bytes"] is None else f"{metrics['output_bytes'] / 1024:.1f}"
+            print(f"{stage:<22} {metrics['wall_s']:>10.3f} {rss:>12} {size:>11} {metrics['items']:>9}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        try:
+            regressions = compare(result, baseline, args.tolerance)
+        except ValueError as e:
+            print(f"ERROR {e}", file=sys.stderr)
+            sys.exit(2)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Measures cold-start cost of the report builder: `python -X importtime` for the module
+import, plus wall-clock time of fresh interpreters importing it, net of a bare interpreter's.
+
+Usage (from the project root):
+    python benchmarks/bench_startup.py --repeat 10 --json > startup.json
+    python benchmarks/bench_startup.py --baseline startup.json --tolerance 0.25
+
+With --baseline, exits with status 1 when a metric is slower than the baseline by more
+than the tolerance, so CI can fail the build on a startup regression.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(PROJECT_ROOT, "scripts")
+DEFAULT_MODULE = "generated_report_script"
+
+# "import time:       554 |     347142 | pandas"
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+# Metrics compared against the baseline (all "lower is better"). Only the import's own cost is
+# tracked: the bare interpreter's start-up is reported as the baseline subtracted from the import
+# wall time, since it depends on the machine and Python build rather than on this project.
+TRACKED_METRICS = ("import_cumulative_ms", "import_wall_ms_net")
+
+
+def run_importtime(module):
+    """Returns (cumulative ms of `module`, its direct imports sorted by cumulative time)."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SCRIPTS_DIR, capture_output=True, text=True, check=True,
+    )
+    module_ms = None
+    children = []
+    top_level = []
+    # importtime prints children before their parent: the direct imports of `module` are the
+    # one-level-deeper lines since the previous top-level line
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        cumulative_ms = int(match.group(2)) / 1000
+        depth, name = len(match.group(3)), match.group(4)
+        if depth == 3:
+            children.append((name, cumulative_ms))
+        elif depth == 1:
+            if name == module:
+                module_ms, top_level = cumulative_ms, children
+            children = []
+    top_level.sort(key=lambda item: item[1], reverse=True)
+    return module_ms, top_level
+
+
+def wall_time_ms(code, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS_DIR, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def measure(module, repeat):
+    runs = [run_importtime(module) for _ in range(repeat)]
+    import_cumulative_ms, top_level = sorted(runs, key=lambda run: run[0])[len(runs) // 2]
+    import_wall_ms = wall_time_ms(f"import {module}", repeat)
+    interpreter_wall_ms = wall_time_ms("pass", repeat)
+    return {
+        "module": module,
+        "python": sys.version.split()[0],
+        "import_cumulative_ms": import_cumulative_ms,
+        "import_wall_ms_median": import_wall_ms,
+        "interpreter_wall_ms_median": interpreter_wall_ms,
+        "import_wall_ms_net": max(0.0, import_wall_ms - interpreter_wall_ms),
+        "top_imports_ms": dict(top_level[:10]),
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Returns the list of regressions: metrics slower than baseline * (1 + tolerance)."""
+    regressions = []
+    for metric in TRACKED_METRICS:
+        current, previous = result.get(metric), baseline.get(metric)
+        if current is None or not previous:
+            continue
+        if current > previous * (1 + tolerance):
+            regressions.append(f"{metric}: {current:.1f} ms vs baseline {previous:.1f} ms "
+                               f"(+{(current / previous - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    parser.add_argument("--baseline", help="JSON file from a previous --json run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown relative to the baseline (0.25 = 25%%).")
+    args = parser.parse_args()
+
+    result = measure(args.module, args.repeat)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['module']} (Python {result['python']})")
+        print(f"  import (importtime cumulative, median): {result['import_cumulative_ms']:.1f} ms")
+        print(f"  import (wall, median of {args.repeat}): {result['import_wall_ms_median']:.1f} ms")
+        print(f"  bare interpreter (wall, median): {result['interpreter_wall_ms_median']:.1f} ms")
+        print(f"  import over the bare interpreter (wall): {result['import_wall_ms_net']:.1f} ms")
+        print("  heaviest direct imports:")
+        for name, ms in result["top_imports_ms"].items():
+            print(f"    {name:<40} {ms:>8.1f} ms")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
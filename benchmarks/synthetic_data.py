@@ -0,0 +1,135 @@
+"""
+Deterministic synthetic inputs for the benchmarks: Financial Highlights .docx files and
+slide definitions, scalable in tables, metrics, periods, slides and charts.
+"""
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+_PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def quarter_labels(count, last_year=25, last_quarter=2):
+    """`count` consecutive quarter labels ending at e.g. 2Q25, oldest first."""
+    labels = []
+    year, quarter = last_year, last_quarter
+    for _ in range(count):
+        labels.append(f"{quarter}Q{year:02d}")
+        quarter -= 1
+        if quarter == 0:
+            year, quarter = year - 1, 4
+    return labels[::-1]
+
+
+def _format_value(rng, kind):
+    if kind == 0:
+        value = rng.randint(-50_000, 2_000_000)
+        return f"({-value:,})" if value < 0 else f"{value:,}"
+    if kind == 1:
+        return f"{rng.uniform(0, 120):.1f}%"
+    return f"{rng.randint(-900, 900):+d} bps"
+
+
+def synthetic_tables(tables, metrics, periods, seed=0):
+    """[(title, rows)] where rows[0] is the header row, values formatted like the real report."""
+    rng = random.Random(seed)
+    quarters = quarter_labels(periods)
+    header_periods = quarters + ([f"{quarters[-1]} vs {quarters[-2]}"] if periods > 1 else [])
+    result = []
+    for t in range(tables):
+        header = [f"Table {t + 1} (VND Bn)"] + header_periods
+        rows = [header]
+        for m in range(metrics):
+            kind = m % 3
+            rows.append([f"Metric {t + 1}.{m + 1}"] + [_format_value(rng, kind) for _ in quarters]
+                        + ([_format_value(rng, 1 if kind == 0 else 2)] if periods > 1 else []))
+        result.append((f"T{t + 1} {quarters[-1]} Financial Highlights", rows))
+    return result
+
+
+def _paragraph(text):
+    return f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(text)}</w:t></w:r></w:p>"
+
+
+def _table(rows):
+    cells = "".join(
+        "<w:tr>" + "".join(f"<w:tc>{_paragraph(text)}</w:tc>" for text in row) + "</w:tr>"
+        for row in rows
+    )
+    return f"<w:tbl>{cells}</w:tbl>"
+
+
+def write_synthetic_docx(path, tables, metrics, periods, seed=0):
+    """
+    Writes a minimal .docx (document part only) with `tables` titled tables. The XML is
+    written directly so that documents with hundreds of thousands of cells are generated
+    in seconds; python-docx reads the result as well.
+    """
+    body = "".join(_paragraph(title) + _table(rows) for title, rows in synthetic_tables(tables, metrics, periods, seed))
+    document = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                f'<w:document xmlns:w="{_W_NS}"><w:body>{body}<w:sectPr/></w:body></w:document>')
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _PACKAGE_RELS)
+        archive.writestr("word/document.xml", document)
+
+
+def synthetic_chart_definitions(tables, metrics, periods, count):
+    """`count` chart definitions cycling over every metric of every table, over the last 12 quarters."""
+    quarters = quarter_labels(periods)[-12:]
+    charts = []
+    for i in range(count):
+        t, m = (i // metrics) % tables, i % metrics
+        charts.append({
+            "data_source_title": f"T{t + 1} {quarter_labels(periods)[-1]} Financial Highlights",
+            "data_key": f"Metric {t + 1}.{m + 1}",
+            "chart_type": "bar" if i % 2 == 0 else "line",
+            "x_axis_keys": quarters,
+            "chart_title": f"Metric {t + 1}.{m + 1}",
+            "x_label": "Quarter",
+            "y_label": "Value",
+            "color": "#1f77b4",
+        })
+    return charts
+
+
+def synthetic_slide_definitions(tables, metrics, periods, slides, charts):
+    """A title slide, then `charts` chart slides, then content slides up to `slides` in total."""
+    chart_definitions = synthetic_chart_definitions(tables, metrics, periods, min(charts, max(slides - 1, 0)))
+    slide_defs = [{
+        "slide_type": "title_slide",
+        "title": "Synthetic benchmark deck",
+        "subtitle": f"{tables} tables x {metrics} metrics x {periods} periods",
+        "notes": "Generated by benchmarks/synthetic_data.py",
+    }]
+    for i, chart_definition in enumerate(chart_definitions):
+        slide_defs.append({
+            "slide_type": "title_and_chart",
+            "title": f"Chart slide {i + 1}",
+            "chart_definition": chart_definition,
+            "content_bullets": [f"Observation {i + 1}.{j + 1}" for j in range(3)],
+        })
+    for i in range(len(slide_defs), slides):
+        slide_defs.append({
+            "slide_type": "title_and_content",
+            "title": f"Content slide {i + 1}",
+            "content_bullets": [f"Point {i + 1}.{j + 1}" for j in range(4)],
+        })
+    return slide_defs[:max(slides, 1)]
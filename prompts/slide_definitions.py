@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
 """
 This file contains the definitions for the slides to be generated in the presentation.
+
+A chart_definition may plot a derived series instead of the reported values: "transform" is
+"qoq"/"yoy" (growth in % for amounts, change in bps for ratios), "ltm" (last twelve months: the
+four-quarter sum of a flow such as income, the period-end value of a stock such as total assets),
+or "change"/"cagr" against "base_period" (see scripts/derived_metrics.py).
 """
 
 slide_definitions = [
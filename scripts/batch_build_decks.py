@@ -0,0 +1,295 @@
+import argparse
+import contextlib
+import csv
+import functools
+import hashlib
+import io
+import json
+import os
+import runpy
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from chart_cache import ChartCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+from deck_manifest import file_digest
+from deck_skeleton import DEFAULT_CACHE_DIR as DEFAULT_SKELETON_CACHE_DIR, DeckSkeletonCache
+from image_assets import DEFAULT_IMAGE_DPI, ImageAssetStage
+from tracing import enable_tracing_from_env, span
+
+STATUS_VERSION = 1
+_STATUS_SUFFIX = ".status.json"
+# Parsed data files / slide definitions kept per worker; jobs of the same bank or period share them
+WORKER_CACHE_SIZE = 64
+# Lines of the builder's output kept in the report for a failed job
+_LOG_TAIL_LINES = 20
+
+# Set once per worker process by _init_worker
+_worker_chart_cache = None
+_worker_skeletons = None
+
+
+def status_path(manifest_path):
+    """The status report lives next to the manifest: `jobs.json` -> `jobs.json.status.json`."""
+    return manifest_path + _STATUS_SUFFIX
+
+
+def load_jobs(manifest_path):
+    """
+    Reads the batch manifest: a JSON list of jobs (or {"jobs": [...]}) or a CSV file with a
+    header row. Each job has `data`, `slides` and `output`, and optionally `id` (default: the
+    output path), `template` and `chart_backend`.
+    """
+    with open(manifest_path, "r", encoding="utf-8", newline="") as f:
+        if manifest_path.lower().endswith(".csv"):
+            jobs = [{key: value for key, value in row.items() if value} for row in csv.DictReader(f)]
+        else:
+            jobs = json.load(f)
+            if isinstance(jobs, dict):
+                jobs = jobs["jobs"]
+
+    seen = set()
+    for number, job in enumerate(jobs, start=1):
+        missing = [key for key in ("data", "slides", "output") if not job.get(key)]
+        if missing:
+            raise ValueError(f"Job {number} in {manifest_path} is missing: {', '.join(missing)}")
+        job.setdefault("id", job["output"])
+        job.setdefault("chart_backend", "png")
+        if job["id"] in seen:
+            raise ValueError(f"Duplicate job id in {manifest_path}: {job['id']}")
+        seen.add(job["id"])
+    return jobs
+
+
+def load_status(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            status = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return status.get("jobs", {}) if status.get("version") == STATUS_VERSION else {}
+
+
+def save_status(path, jobs_status):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": STATUS_VERSION, "jobs": jobs_status}, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def job_inputs_digest(job, fingerprint, digests):
+    """Hash of a job's input files, output path and rendering code; `digests` memoizes file hashes."""
+    digest = hashlib.sha256(fingerprint.encode("ascii"))
+    for key in ("data", "slides", "template"):
+        path = job.get(key)
+        if path and path not in digests:
+            digests[path] = file_digest(path)
+        digest.update(f"{key}={path}:{digests.get(path)};".encode("utf-8"))
+    digest.update(f"output={job['output']};backend={job['chart_backend']}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+# --- Worker process ---
+
+def _init_worker(chart_cache_dir, chart_cache_max_bytes, skeleton_cache_dir):
+    """Imports python-pptx and matplotlib and resolves the default font once per worker, not per deck."""
+    global _worker_chart_cache, _worker_skeletons
+    import matplotlib
+    from chart_renderer import MATPLOTLIB_BACKEND
+    matplotlib.use(MATPLOTLIB_BACKEND)
+    import matplotlib.pyplot  # noqa: F401
+    from matplotlib import font_manager
+    font_manager.findfont(font_manager.FontProperties())
+    import pptx  # noqa: F401
+    import deck_builder  # noqa: F401
+
+    if chart_cache_dir:
+        _worker_chart_cache = ChartCache(chart_cache_dir, max_bytes=chart_cache_max_bytes)
+    if skeleton_cache_dir:
+        # Jobs sharing a template and static slides (the same bank across periods) reuse one skeleton
+        _worker_skeletons = DeckSkeletonCache(skeleton_cache_dir)
+    enable_tracing_from_env()
+
+
+def _file_key(path):
+    """(absolute path, mtime, size): a cached entry is reused only while the file is unchanged."""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_mtime_ns, stat.st_size
+
+
+@functools.lru_cache(maxsize=WORKER_CACHE_SIZE)
+def _cached_financial_data(path, mtime_ns, size):
+    from deck_builder import load_financial_data
+    return load_financial_data(path)
+
+
+@functools.lru_cache(maxsize=WORKER_CACHE_SIZE)
+def _cached_slide_definitions(path, mtime_ns, size):
+    if path.lower().endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return runpy.run_path(path)["slide_definitions"]
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_template_bytes(path, mtime_ns, size):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _run_job(job):
+    """Builds one deck. Never raises: failures are returned as a status entry with the error."""
+    from deck_builder import create_presentation
+
+    result = {"status": "failed", "pid": os.getpid(), "started_at": time.time()}
+    log = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with span("deck_job", id=job["id"]), contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            financial_data = _cached_financial_data(*_file_key(job["data"]))
+            slide_defs = _cached_slide_definitions(*_file_key(job["slides"]))
+            template = None
+            if job.get("template"):
+                template = io.BytesIO(_cached_template_bytes(*_file_key(job["template"])))
+            result["load_s"] = time.perf_counter() - start
+
+            output_dir = os.path.dirname(job["output"])
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            build_start = time.perf_counter()
+            # A fresh stage per job: prepared images come from the shared on-disk cache
+            create_presentation(slide_defs, financial_data, job["output"], chart_cache=_worker_chart_cache,
+                                chart_backend=job["chart_backend"], template=template,
+                                images=ImageAssetStage(dpi=DEFAULT_IMAGE_DPI), skeletons=_worker_skeletons)
+            result["build_s"] = time.perf_counter() - build_start
+        result.update(status="ok", slides=len(slide_defs), output_bytes=os.path.getsize(job["output"]))
+    except Exception as e:
+        tail = log.getvalue().splitlines()[-_LOG_TAIL_LINES:]
+        result.update(error=f"{type(e).__name__}: {e}",
+                      traceback=traceback.format_exc().splitlines()[-_LOG_TAIL_LINES:], log_tail=tail)
+    result["total_s"] = time.perf_counter() - start
+    return result
+
+
+# --- Scheduler ---
+
+def build_decks(manifest_path, workers=None, resume=True, chart_cache_dir=DEFAULT_CACHE_DIR,
+                chart_cache_max_bytes=DEFAULT_MAX_BYTES, status_file=None, skeleton_cache_dir=DEFAULT_SKELETON_CACHE_DIR):
+    """
+    Builds every deck of the manifest in a process pool of `workers` processes (default: CPU count).
+    Each worker loads python-pptx, matplotlib and the fonts once and keeps parsed data files,
+    slide definitions, templates and deck skeletons for the jobs that follow. With `resume`, jobs that succeeded
+    before with the same inputs and whose output still exists are skipped. The status of every
+    job is written to `status_file` after each completion, so an interrupted batch resumes where
+    it stopped. Returns {job id: status entry}.
+    """
+    from deck_builder import rendering_fingerprint
+
+    jobs = load_jobs(manifest_path)
+    status_file = status_file or status_path(manifest_path)
+    previous = load_status(status_file) if resume else {}
+    workers = workers or os.cpu_count() or 1
+
+    fingerprints = {}
+    digests = {}
+    jobs_status = {}
+    pending = []
+    for job in jobs:
+        backend = job["chart_backend"]
+        if backend not in fingerprints:
+            fingerprints[backend] = rendering_fingerprint(backend, DEFAULT_IMAGE_DPI)
+        inputs = job_inputs_digest(job, fingerprints[backend], digests)
+        entry = previous.get(job["id"])
+        if entry and entry["status"] == "ok" and entry.get("inputs") == inputs and os.path.exists(job["output"]):
+            jobs_status[job["id"]] = dict(entry, skipped=True)
+        else:
+            jobs_status[job["id"]] = {"status": "pending", "inputs": inputs}
+            pending.append((job, (entry or {}).get("total_s")))
+    save_status(status_file, jobs_status)
+
+    # Longest jobs first (by the previous run's time; unknown counts as long) so the tail of the
+    # batch does not leave cores idle behind one slow deck
+    pending.sort(key=lambda item: -(item[1] if item[1] is not None else float("inf")))
+    pending = [job for job, _ in pending]
+
+    print(f"{len(jobs)} job(s): {len(jobs) - len(pending)} up to date, {len(pending)} to build "
+          f"with {min(workers, len(pending)) if pending else 0} worker(s).")
+    start = time.perf_counter()
+    done = 0
+    if pending:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(pending)), initializer=_init_worker,
+                                       initargs=(chart_cache_dir, chart_cache_max_bytes, skeleton_cache_dir))
+        try:
+            # Keep a bounded number of jobs queued so the status file tracks what actually ran
+            queue = iter(pending)
+            in_flight = {}
+            for job in queue:
+                in_flight[executor.submit(_run_job, job)] = job
+                if len(in_flight) >= 2 * workers:
+                    break
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:  # the worker process died
+                        result = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+                    jobs_status[job["id"]] = dict(result, inputs=jobs_status[job["id"]]["inputs"])
+                    done += 1
+                    message = result.get("error") or f"{result['total_s']:.2f}s"
+                    print(f"[{done}/{len(pending)}] {result['status']:<6} {job['id']} ({message})")
+                    next_job = next(queue, None)
+                    if next_job is not None:
+                        in_flight[executor.submit(_run_job, next_job)] = next_job
+                save_status(status_file, jobs_status)
+        except KeyboardInterrupt:
+            print("Interrupted: finished jobs are recorded; run again to resume.")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+
+    print_report(jobs_status, time.perf_counter() - start, status_file)
+    return jobs_status
+
+
+def print_report(jobs_status, wall_s, status_file, slowest=5):
+    ran = {job_id: entry for job_id, entry in jobs_status.items() if not entry.get("skipped")}
+    counts = {}
+    for entry in jobs_status.values():
+        state = "skipped" if entry.get("skipped") else entry["status"]
+        counts[state] = counts.get(state, 0) + 1
+    busy_s = sum(entry.get("total_s", 0) for entry in ran.values())
+    print("\nBatch: " + ", ".join(f"{count} {state}" for state, count in sorted(counts.items()))
+          + f" in {wall_s:.2f}s (job time {busy_s:.2f}s, {busy_s / wall_s if wall_s else 0:.1f}x parallel)")
+    timed = sorted((entry["total_s"], job_id) for job_id, entry in ran.items() if "total_s" in entry)
+    for seconds, job_id in timed[::-1][:slowest]:
+        entry = ran[job_id]
+        print(f"  {seconds:>7.2f}s  {job_id} (load {entry.get('load_s', 0):.2f}s, "
+              f"build {entry.get('build_s', 0):.2f}s, {entry.get('slides', '-')} slides)")
+    for job_id, entry in ran.items():
+        if entry["status"] == "failed":
+            print(f"  FAILED {job_id}: {entry.get('error')}")
+    print(f"Per-job status and timing: {status_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build many decks from a manifest of (data, slides, output) jobs.")
+    parser.add_argument("manifest", help="JSON list of jobs or CSV with columns data,slides,output[,id,template,chart_backend].")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count).")
+    parser.add_argument("--no-resume", action="store_true", help="Rebuild every deck, ignoring the previous status.")
+    parser.add_argument("--status-file", default=None, help="Per-job status report (default: <manifest>.status.json).")
+    parser.add_argument("--chart-cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--chart-cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024))
+    parser.add_argument("--no-chart-cache", action="store_true", help="Always re-render every chart.")
+    parser.add_argument("--skeleton-cache-dir", default=DEFAULT_SKELETON_CACHE_DIR)
+    parser.add_argument("--no-skeleton-cache", action="store_true", help="Always rebuild the static slides.")
+    args = parser.parse_args()
+
+    statuses = build_decks(args.manifest, workers=args.workers, resume=not args.no_resume,
+                           chart_cache_dir=None if args.no_chart_cache else args.chart_cache_dir,
+                           chart_cache_max_bytes=args.chart_cache_max_mb * 1024 * 1024,
+                           status_file=args.status_file,
+                           skeleton_cache_dir=None if args.no_skeleton_cache else args.skeleton_cache_dir)
+    if any(entry["status"] == "failed" for entry in statuses.values()):
+        raise SystemExit(1)
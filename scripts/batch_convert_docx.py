@@ -0,0 +1,286 @@
+import argparse
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from convert_docx_to_json import iter_docx_tables
+from metric_store import normalize_metric_name
+
+# Title of the merged table written per bank to the history JSON: "<bank> Financial Highlights History"
+HISTORY_TITLE = "Financial Highlights History"
+
+# Quarter ("2Q24") and cumulative ("6M25") period columns; comparison columns ("2Q25 vs 1Q25") are skipped
+_QUARTER_RE = re.compile(r"^([1-4])Q(\d{2})$")
+_CUMULATIVE_RE = re.compile(r"^(\d{1,2})M(\d{2})$")
+_REPORT_TITLE_RE = re.compile(r"^(1H|3M|9M|FY)(\d{2})\b")
+_REPORT_MONTHS = {"3M": 3, "1H": 6, "9M": 9, "FY": 12}
+
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+def period_sort_key(period):
+    """
+    Orders period labels chronologically: (year, end month, span in months, kind).
+    "2Q24" sorts right before "6M24", which ends in the same month, and "1Q24" before
+    "3M24". Returns None for labels that are not periods.
+    """
+    match = _QUARTER_RE.match(period)
+    if match:
+        quarter, year = int(match.group(1)), int(match.group(2))
+        return 2000 + year, quarter * 3, 3, 0
+    match = _CUMULATIVE_RE.match(period)
+    if match:
+        months, year = int(match.group(1)), int(match.group(2))
+        return 2000 + year, months, months, 1
+    return None
+
+
+def report_sort_key(title, source):
+    """Orders reports so a later report's figures supersede an earlier one's."""
+    match = _REPORT_TITLE_RE.match(title)
+    if match:
+        return 2000 + int(match.group(2)), _REPORT_MONTHS[match.group(1)], source
+    return 0, 0, source
+
+
+def collect_inputs(pattern):
+    """Expands a directory or a glob pattern into a sorted list of .docx files."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.docx")
+    paths = glob.glob(pattern, recursive=True)
+    # Skip Word's "~$" lock files
+    return sorted(p for p in paths if os.path.isfile(p) and not os.path.basename(p).startswith("~$"))
+
+
+def bank_of(path, banks=None):
+    """
+    The bank a report belongs to: the value of the first `banks` pattern ({file name glob: bank})
+    matching the file name, else the name of the directory holding it (reports/<bank>/2Q25.docx).
+    """
+    name = os.path.basename(path)
+    for pattern, bank in (banks or {}).items():
+        if fnmatch.fnmatch(name, pattern):
+            return bank
+    return os.path.basename(os.path.dirname(os.path.abspath(path)))
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _extract_tables(path):
+    """Worker entry point: converts one .docx into {title: table_data}."""
+    return {title: table_data for title, table_data in iter_docx_tables(path, streaming=True)}
+
+
+class ConversionCache:
+    """
+    On-disk record of previous conversions.
+    `state.json` maps each input path to its size, mtime and content hash, and
+    `tables/<sha256>.json` holds the extracted tables for that content.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.tables_dir = os.path.join(cache_dir, "tables")
+        self.state_path = os.path.join(cache_dir, "state.json")
+        self.state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def digest(self, path):
+        """Content hash of `path`, reusing the recorded hash while size and mtime are unchanged."""
+        stat = os.stat(path)
+        entry = self.state.get(os.path.abspath(path))
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["sha256"]
+        return file_digest(path)
+
+    def _tables_path(self, digest):
+        return os.path.join(self.tables_dir, f"{digest}.json")
+
+    def load_tables(self, digest):
+        tables_path = self._tables_path(digest)
+        if not os.path.exists(tables_path):
+            return None
+        with open(tables_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def store(self, path, digest, tables):
+        os.makedirs(self.tables_dir, exist_ok=True)
+        with open(self._tables_path(digest), "w", encoding="utf-8") as f:
+            json.dump(tables, f, ensure_ascii=False)
+        self.remember(path, digest)
+
+    def remember(self, path, digest):
+        stat = os.stat(path)
+        self.state[os.path.abspath(path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+        }
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+
+
+def merge_history(reports, banks=None):
+    """
+    Merges "Financial Highlights" tables from many reports into one period-indexed history per
+    bank. `reports` maps a source path to its {title: table_data} and `banks` a source path to
+    its bank (None: one unnamed bank). When the same (bank, metric, period) appears in several
+    reports, the value from the most recent report wins and differing values are recorded as
+    conflicts; the same metric of two banks is never a conflict.
+    Returns ({bank: history_rows}, period_index, conflicts).
+    """
+    tables = []
+    for source, report_tables in reports.items():
+        bank = banks.get(source) if banks else None
+        for title, table_data in report_tables.items():
+            tables.append((report_sort_key(title, source), bank, title, source, table_data))
+    tables.sort(key=lambda item: item[0])
+
+    label_header = None
+    metrics = {}  # (bank, normalized metric name) -> {period: (value, title, source)}
+    conflicts = []
+    for _, bank, title, source, table_data in tables:
+        for row in table_data:
+            if not row:
+                continue
+            header = next(iter(row))
+            label_header = label_header or header
+            label = row[header].strip()
+            cells = [(key, value) for key, value in row.items() if key != header]
+            # Section headers repeat the column names
+            if not label or all(value == key for key, value in cells):
+                continue
+
+            history = metrics.setdefault((bank, normalize_metric_name(label)), {})
+            for period, value in cells:
+                if period_sort_key(period) is None or not value:
+                    continue
+                previous = history.get(period)
+                if previous and previous[0] != value:
+                    conflicts.append({
+                        "bank": bank,
+                        "metric": normalize_metric_name(label),
+                        "period": period,
+                        "kept": {"value": value, "table": title, "source": source},
+                        "replaced": {"value": previous[0], "table": previous[1], "source": previous[2]},
+                    })
+                history[period] = (value, title, source)
+
+    period_index = sorted({p for history in metrics.values() for p in history}, key=period_sort_key)
+    histories = {}
+    for (bank, metric), history in metrics.items():
+        row = {label_header: metric}
+        for period in period_index:
+            if period in history:
+                row[period] = history[period][0]
+        histories.setdefault(bank, []).append(row)
+    return histories, period_index, conflicts
+
+
+def history_title(bank):
+    return f"{bank} {HISTORY_TITLE}" if bank else HISTORY_TITLE
+
+
+def convert_batch(pattern, json_path, index_path, cache_dir, workers=None, banks=None):
+    """
+    Converts every .docx matched by `pattern` and writes the merged histories to `json_path`.
+    Only files whose content hash changed since the last run are re-parsed, in a process pool.
+    Each file's bank comes from bank_of (`banks` maps file name globs to banks). The histories
+    are written in the dict-of-tables layout, one "<bank> Financial Highlights History" table per
+    bank with columns in period order; the period index, per-file banks and content hashes and
+    the conflicts go to `index_path`.
+    """
+    start_time = time.perf_counter()
+    inputs = collect_inputs(pattern)
+    if not inputs:
+        print(f"No .docx files matched '{pattern}'.")
+        return None
+
+    cache = ConversionCache(cache_dir)
+    reports = {}
+    pending = {}
+    for path in inputs:
+        digest = cache.digest(path)
+        tables = cache.load_tables(digest)
+        if tables is None:
+            pending[path] = digest
+        else:
+            reports[path] = tables
+            cache.remember(path, digest)
+
+    if len(pending) == 1 or workers == 1:
+        converted = {path: _extract_tables(path) for path in pending}
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            converted = dict(zip(pending, executor.map(_extract_tables, pending)))
+    else:
+        converted = {}
+
+    for path, tables in converted.items():
+        cache.store(path, pending[path], tables)
+        reports[path] = tables
+    cache.save()
+
+    # Merge in input order so ties between reports of the same period are deterministic
+    sources = {path: bank_of(path, banks) for path in inputs}
+    histories, period_index, conflicts = merge_history({path: reports[path] for path in inputs}, sources)
+
+    for output_path in (json_path, index_path):
+        output_dir = os.path.dirname(output_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+    with open(json_path, "w", encoding="utf-8") as json_file:
+        json.dump({history_title(bank): rows for bank, rows in histories.items()}, json_file, indent=4,
+                  ensure_ascii=False)
+    with open(index_path, "w", encoding="utf-8") as index_file:
+        json.dump({
+            "period_index": period_index,
+            "sources": {path: cache.state[os.path.abspath(path)]["sha256"] for path in inputs},
+            "banks": sources,
+            "conflicts": conflicts,
+        }, index_file, indent=4, ensure_ascii=False)
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Converted {len(converted)} of {len(inputs)} file(s) ({len(inputs) - len(converted)} unchanged) "
+          f"into {sum(len(rows) for rows in histories.values())} metrics of {len(histories)} bank(s) "
+          f"x {len(period_index)} periods in {elapsed:.2f}s.")
+    if conflicts:
+        print(f"Reconciled {len(conflicts)} conflicting value(s) in favour of the latest report.")
+    return json_path
+
+
+if __name__ == '__main__':
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    parser = argparse.ArgumentParser(description="Convert a folder of .docx reports into one merged history JSON.")
+    parser.add_argument("inputs", help="Directory of .docx files or a glob pattern, e.g. 'reports/**/*.docx'.")
+    parser.add_argument("--output", default=os.path.join(project_root, 'data', 'financial_highlights_history.json'))
+    parser.add_argument("--index-output", default=os.path.join(project_root, 'data', 'history_index.json'))
+    parser.add_argument("--cache-dir", default=os.path.join(project_root, '.cache', 'docx_tables'))
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count).")
+    parser.add_argument("--banks", help="JSON object mapping file name globs to banks, e.g. {\"tcb_*.docx\": "
+                                        "\"Techcombank\"} (default: each file's directory name).")
+    args = parser.parse_args()
+
+    bank_patterns = None
+    if args.banks:
+        with open(args.banks, "r", encoding="utf-8") as f:
+            bank_patterns = json.load(f)
+    convert_batch(args.inputs, args.output, args.index_output, args.cache_dir, workers=args.workers,
+                  banks=bank_patterns)
@@ -1,9 +1,8 @@
-import os
-import requests
 import dotenv
+from http_client import api_settings, describe_timing, get_client
 
 dotenv.load_dotenv()
-API_KEY = os.getenv("API_KEY")
+_, API_KEY = api_settings()
 
 url = "https://api.thucchien.ai/key/info"
 
@@ -13,7 +12,8 @@ headers = {
   
 }
 
-response = requests.get(url, headers=headers)
+response = get_client().get(url, headers=headers, timeout=(10, 30))
+print(describe_timing(response.timing))
 
 if response.status_code == 200:
   key_info = response.json()
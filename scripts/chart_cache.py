@@ -0,0 +1,155 @@
+import contextlib
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "charts")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Entries used (read or written) this recently are never evicted: other processes sharing the
+# cache dir (batch workers, the chart prewarm) may be about to embed them
+EVICTION_GRACE_S = 15 * 60
+
+_CHART_SUFFIX = ".png"
+
+
+def chart_cache_key(chart_definition, series, render_settings):
+    """
+    Content hash of everything that determines a rendered chart: the chart definition,
+    the resolved data series and the render settings (dpi, figsize, library versions).
+    """
+    payload = json.dumps(
+        {
+            "chart_definition": chart_definition,
+            "series": [None if math.isnan(value) else float(value) for value in series],
+            "render_settings": render_settings,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ChartCache:
+    """
+    On-disk, content-addressed store of rendered chart images with a size cap.
+    Entries are evicted least-recently-used first, using the file mtime as the access
+    time; entries handed out during this run are never evicted, because the deck
+    being built still has to embed them. Pins only exist in this process, so entries
+    used within `grace_s` seconds by any process sharing the directory are kept too.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, grace_s=EVICTION_GRACE_S):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.grace_s = grace_s
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pinned = set()
+        self._total_bytes = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, key, filename):
+        # The file keeps its chart name so the picture description embedded in the deck
+        # is the same whether or not the image came from the cache
+        return os.path.join(self.cache_dir, key[:2], key, filename)
+
+    def get(self, key, filename):
+        """
+        Returns the cached image path for `key`, or None on a miss. An image cached for `key`
+        under another file name (a builder that names its charts differently) is copied to
+        `filename` and counts as a hit.
+        """
+        path = self.path_for(key, filename)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            if not self._copy_renamed(path):
+                self.misses += 1
+                return None
+        self.hits += 1
+        self._pinned.add(path)
+        return path
+
+    def _copy_renamed(self, path):
+        key_dir = os.path.dirname(path)
+        try:
+            names = sorted(name for name in os.listdir(key_dir) if name.endswith(_CHART_SUFFIX))
+        except FileNotFoundError:
+            return False
+        if not names:
+            return False
+        fd, tmp_path = tempfile.mkstemp(dir=key_dir, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(os.path.join(key_dir, names[0]), tmp_path)
+        os.replace(tmp_path, path)
+        if self._total_bytes is not None:
+            self._total_bytes += os.path.getsize(path)
+        return True
+
+    def put(self, key, image_path):
+        """Copies a freshly rendered image into the cache and returns its cached path."""
+        path = self.path_for(key, os.path.basename(image_path))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so a concurrent reader never sees a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(image_path, tmp_path)
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp_path, path)
+
+        self._pinned.add(path)
+        if self._total_bytes is not None:
+            self._total_bytes += os.path.getsize(path) - previous_size
+        self.evict()
+        return path
+
+    def _entries(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(_CHART_SUFFIX):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:  # evicted by another process meanwhile
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """
+        Removes least-recently-used entries until the cache fits under `max_bytes`, skipping
+        entries pinned by this process or used within the grace window. The cache may stay over
+        the cap until they age out.
+        """
+        if self._total_bytes is not None and self._total_bytes <= self.max_bytes:
+            return
+        entries = self._entries()
+        self._total_bytes = sum(size for _, size, _ in entries)
+        recent = time.time() - self.grace_s
+        for mtime, size, path in sorted(entries):
+            if self._total_bytes <= self.max_bytes or mtime > recent:
+                break
+            if path in self._pinned:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            with contextlib.suppress(OSError):
+                os.rmdir(os.path.dirname(path))
+                os.rmdir(os.path.dirname(os.path.dirname(path)))
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def summary(self):
+        return f"Chart cache: {self.hits} hit(s), {self.misses} miss(es), {self.evictions} eviction(s)"
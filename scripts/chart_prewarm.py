@@ -0,0 +1,89 @@
+import argparse
+import asyncio
+import functools
+import multiprocessing
+import os
+import runpy
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from chart_cache import ChartCache, DEFAULT_CACHE_DIR
+from chart_renderer import chart_filename, render_charts
+from metric_store import load_metric_store
+from slide_compiler import FINANCIAL_DATA_PATH, SLIDE_DEFINITIONS_PATH, compile_slides
+from tracing import record_span
+
+
+def prewarm_chart_cache(definitions_path=SLIDE_DEFINITIONS_PATH, data_path=FINANCIAL_DATA_PATH,
+                        chart_cache_dir=DEFAULT_CACHE_DIR, workers=None):
+    """
+    Loads and indexes the financial data, compiles the slide definitions and renders every chart
+    they define into the shared chart cache, where deck_builder's create_chart_image_cached finds
+    them by content key. The chart definitions are known before the model writes the builder, so
+    this runs while the completion is in flight.
+    Returns (charts ready in the cache, seconds). Never raises: on failure the builder simply
+    renders its own charts.
+    """
+    start = time.perf_counter()
+    try:
+        financial_data = load_metric_store(data_path)
+        plan = compile_slides(runpy.run_path(definitions_path)["slide_definitions"], financial_data)
+        chart_cache = ChartCache(chart_cache_dir)
+        with tempfile.TemporaryDirectory() as chart_dir:
+            jobs = []
+            for slide in plan.slides:
+                if slide.slide_type == "title_and_chart":
+                    # One subdirectory per slide, as in the builder: two charts may share a file name
+                    slide_dir = os.path.join(chart_dir, str(slide.index))
+                    os.makedirs(slide_dir)
+                    chart_def = slide.definition["chart_definition"]
+                    jobs.append((chart_def, os.path.join(slide_dir, chart_filename(chart_def)), slide.series))
+            rendered = render_charts(financial_data, jobs, workers=workers, chart_cache=chart_cache)
+    except Exception as e:
+        print(f"Chart prewarm failed ({type(e).__name__}: {e}); the builder will render its own charts.")
+        return 0, time.perf_counter() - start
+
+    ready = sum(1 for path, _ in rendered if path)
+    seconds = time.perf_counter() - start
+    print(f"Prewarmed {ready} of {len(jobs)} chart(s) into {chart_cache_dir} "
+          f"({chart_cache.hits} already cached) in {seconds:.2f}s")
+    return ready, seconds
+
+
+async def _generate_while_prewarming(generate, prewarm_kwargs):
+    loop = asyncio.get_running_loop()
+    # A spawned process: rendering does not compete with the response for the GIL, and its own
+    # render pool is forked from a single-threaded process
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        charts = loop.run_in_executor(executor, functools.partial(prewarm_chart_cache, **prewarm_kwargs))
+        try:
+            return await asyncio.to_thread(generate)
+        finally:
+            # The builder only runs once every chart is in the cache, so it never renders one twice
+            try:
+                ready, seconds = await charts
+                record_span("chart_prewarm", seconds, charts=ready)
+            except Exception as e:  # the prewarm process died
+                print(f"Chart prewarm failed ({type(e).__name__}: {e}); the builder will render its own charts.")
+
+
+def generate_while_prewarming(generate, **prewarm_kwargs):
+    """
+    Runs `generate()` (the model call, in a thread) and prewarm_chart_cache (in a separate process)
+    concurrently under asyncio, and returns generate's result once both have finished. The wait
+    is the longer of the two branches instead of their sum, and the generated builder finds its
+    charts already rendered.
+    """
+    return asyncio.run(_generate_while_prewarming(generate, prewarm_kwargs))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render every chart of the slide definitions into the chart cache.")
+    parser.add_argument("--definitions", default=SLIDE_DEFINITIONS_PATH)
+    parser.add_argument("--data", default=FINANCIAL_DATA_PATH)
+    parser.add_argument("--chart-cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="Render processes (default: CPU count).")
+    args = parser.parse_args()
+
+    prewarm_chart_cache(args.definitions, args.data, args.chart_cache_dir, args.workers)
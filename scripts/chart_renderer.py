@@ -0,0 +1,242 @@
+import contextlib
+import functools
+import io
+import math
+import os
+import time
+
+from chart_cache import chart_cache_key
+from derived_metrics import chart_series
+from metric_store import MetricStore
+from tracing import record_span
+
+# Backend vẽ biểu đồ: ảnh PNG qua matplotlib, hoặc biểu đồ PowerPoint gốc (native_charts)
+CHART_BACKENDS = ("png", "native")
+
+# Loại biểu đồ được hỗ trợ (cả hai backend)
+CHART_TYPES = ("bar", "line")
+
+# Thông số render dùng chung cho mọi biểu đồ
+CHART_DPI = 300
+CHART_FIGSIZE = (8, 4.5)
+MATPLOTLIB_BACKEND = "Agg"
+
+
+def _pyplot():
+    """
+    Import pyplot khi thực sự vẽ, với backend không tương tác cố định: không cần màn hình,
+    không nạp GUI toolkit, và ảnh giống nhau trên mọi máy.
+    """
+    import matplotlib
+    matplotlib.use(MATPLOTLIB_BACKEND)
+    import matplotlib.pyplot as plt
+    return plt
+
+
+@functools.lru_cache(maxsize=None)
+def _matplotlib_version():
+    # Đọc từ metadata của package thay vì import matplotlib: khi mọi biểu đồ đã có trong cache
+    # (ví dụ đã render sẵn trong lúc chờ model), builder không cần import matplotlib
+    from importlib.metadata import version
+    return version("matplotlib")
+
+
+def chart_render_settings():
+    """Các thông số ảnh hưởng tới ảnh render, dùng làm một phần khóa cache."""
+    return {"dpi": CHART_DPI, "figsize": list(CHART_FIGSIZE), "matplotlib": _matplotlib_version()}
+
+
+def chart_filename(chart_definition):
+    """Tên file ảnh của biểu đồ; ảnh trong cache giữ tên này, nên builder và bước render trước phải dùng chung."""
+    return f"chart_{chart_definition['data_key'].replace(' ', '_')}_{chart_definition['chart_type']}.png"
+
+
+def resolve_chart_series(financial_data, chart_definition):
+    """
+    Tra cứu chuỗi dữ liệu theo (data_source_title, data_key, kỳ); với `transform`
+    (qoq, yoy, change, ltm, cagr) là chuỗi phái sinh tính bởi derived_metrics.
+    Trả về mảng giá trị, hoặc None (kèm cảnh báo) nếu không tìm thấy bảng/chỉ số.
+    """
+    data_source_title = chart_definition["data_source_title"]
+    data_key = chart_definition["data_key"]
+
+    if not isinstance(financial_data, MetricStore):
+        financial_data = MetricStore.from_data(financial_data)
+
+    if data_source_title not in financial_data:
+        print(f"Warning: Could not find '{data_source_title}' in the financial data.")
+        return None
+
+    try:
+        series = chart_series(financial_data, chart_definition)
+    except ValueError as e:
+        print(f"Warning: {e} (chart '{data_key}').")
+        return None
+    if series is None:
+        print(f"Warning: Metric '{data_key}' not found in '{data_source_title}'.")
+        return None
+    return series
+
+
+def create_chart_image(financial_data, chart_definition, output_path, series=None):
+    """
+    Tạo biểu đồ từ dữ liệu tài chính và lưu dưới dạng ảnh.
+    Hỗ trợ biểu đồ cột (bar) và đường (line).
+    `series`: chuỗi dữ liệu đã tra cứu sẵn (render plan của slide_compiler), bỏ qua bước tra cứu.
+    """
+    data_key = chart_definition["data_key"]
+    chart_type = chart_definition["chart_type"]
+    x_axis_keys = chart_definition["x_axis_keys"]
+    chart_title = chart_definition["chart_title"]
+    x_label = chart_definition.get("x_label", "")
+    y_label = chart_definition.get("y_label", "")
+    color = chart_definition.get("color", "skyblue")
+
+    if series is None:
+        series = resolve_chart_series(financial_data, chart_definition)
+    if series is None:
+        return None
+
+    # Chuẩn bị dữ liệu cho biểu đồ
+    x_values = x_axis_keys
+    y_values = [0.0 if math.isnan(v) else float(v) for v in series] # Sử dụng 0 nếu không tìm thấy key
+
+    if not any(y_values): # Kiểm tra nếu tất cả y_values đều là 0
+        print(f"Warning: No data available to plot the chart for '{data_key}'.")
+        return None
+
+    plt = _pyplot()
+    fig, ax = plt.subplots(figsize=CHART_FIGSIZE) # Kích thước hợp lý cho slide
+
+    if chart_type == "bar":
+        ax.bar(x_values, y_values, color=color)
+    elif chart_type == "line":
+        ax.plot(x_values, y_values, marker='o', color=color, linewidth=2)
+    else:
+        print(f"Warning: Chart type '{chart_type}' is not supported.")
+        return None
+
+    ax.set_title(chart_title, fontsize=14)
+    ax.set_xlabel(x_label, fontsize=10)
+    ax.set_ylabel(y_label, fontsize=10)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+
+    try:
+        plt.savefig(output_path, dpi=CHART_DPI)
+        print(f"Created chart '{chart_title}' and saved to {output_path}")
+        return output_path
+    except Exception as e:
+        print(f"Error saving chart to {output_path}: {e}")
+        return None
+    finally:
+        plt.close(fig) # Đóng figure để giải phóng bộ nhớ
+
+def _cached_chart(financial_data, chart_definition, output_path, chart_cache, series=None):
+    """
+    Tra cache theo nội dung biểu đồ. Trả về (khóa cache, đường dẫn ảnh trong cache hoặc None);
+    khóa là None nếu không tra được chuỗi dữ liệu.
+    """
+    if series is None:
+        series = resolve_chart_series(financial_data, chart_definition)
+    if series is None:
+        return None, None
+    key = chart_cache_key(chart_definition, series, chart_render_settings())
+    cached_path = chart_cache.get(key, os.path.basename(output_path))
+    if cached_path:
+        print(f"Reused cached chart '{chart_definition['chart_title']}' from {cached_path}")
+    return key, cached_path
+
+
+def create_chart_image_cached(financial_data, chart_definition, output_path, chart_cache=None, series=None):
+    """
+    Như create_chart_image, nhưng lấy ảnh từ `chart_cache` nếu biểu đồ và dữ liệu không đổi.
+    Ảnh mới render được đưa vào cache; trả về đường dẫn ảnh trong cache để nhúng trực tiếp.
+    """
+    if chart_cache is None:
+        return create_chart_image(financial_data, chart_definition, output_path, series)
+
+    key, cached_path = _cached_chart(financial_data, chart_definition, output_path, chart_cache, series)
+    if key is None or cached_path:
+        return cached_path
+
+    created_chart_path = create_chart_image(financial_data, chart_definition, output_path, series)
+    if created_chart_path is None:
+        return None
+    return chart_cache.put(key, created_chart_path)
+
+
+# --- Render song song trong process pool ---
+
+_worker_financial_data = None
+
+
+def _init_worker(financial_data):
+    """Nhận MetricStore một lần cho mỗi worker thay vì gửi kèm từng job, và import sẵn pyplot."""
+    global _worker_financial_data
+    _worker_financial_data = financial_data
+    _pyplot()
+
+
+def render_chart_job(financial_data, chart_definition, output_path, series=None):
+    """
+    Render một biểu đồ và thu lại các dòng log của nó, để tiến trình chính in ra
+    đúng thứ tự slide như khi chạy tuần tự.
+    Trả về (đường dẫn ảnh hoặc None, log).
+    """
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        created_chart_path = create_chart_image(financial_data, chart_definition, output_path, series)
+    return created_chart_path, log.getvalue()
+
+
+def _render_in_worker(job):
+    start = time.perf_counter()
+    created_chart_path, log = render_chart_job(_worker_financial_data, *job)
+    # Thời gian render được gửi về để tiến trình chính ghi span (worker không ghi trace)
+    return created_chart_path, log, time.perf_counter() - start
+
+
+def render_charts(financial_data, jobs, workers=None, chart_cache=None):
+    """
+    Render đồng thời các job (chart_definition, output_path[, series]) trong một process pool;
+    job có `series` (đã tra cứu sẵn) không cần tra cứu lại trong worker.
+    Trả về danh sách (đường dẫn ảnh hoặc None, log) theo đúng thứ tự của `jobs`.
+    `workers` là số process (None = số CPU). Với `chart_cache`, chỉ những biểu đồ
+    chưa có trong cache mới được gửi tới pool.
+    """
+    if not jobs:
+        return []
+    if not isinstance(financial_data, MetricStore):
+        financial_data = MetricStore.from_data(financial_data)
+
+    results = [None] * len(jobs)
+    keys = {}
+    for i, job in enumerate(jobs):
+        if chart_cache is None:
+            continue
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            key, cached_path = _cached_chart(financial_data, *job[:2], chart_cache, *job[2:])
+        if key is None or cached_path:
+            results[i] = (cached_path, log.getvalue())
+        else:
+            keys[i] = key
+
+    pending = [i for i in range(len(jobs)) if results[i] is None]
+    if not pending:
+        return results
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    max_workers = min(workers or os.cpu_count() or 1, len(pending))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(financial_data,)) as executor:
+        rendered = executor.map(_render_in_worker, [jobs[i] for i in pending])
+        for i, (created_chart_path, log, seconds) in zip(pending, rendered):
+            record_span("chart_render", seconds, chart=jobs[i][0]["chart_title"], worker=True)
+            if created_chart_path and i in keys:
+                created_chart_path = chart_cache.put(keys[i], created_chart_path)
+            results[i] = (created_chart_path, log)
+    return results
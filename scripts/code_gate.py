@@ -0,0 +1,285 @@
+import ast
+import builtins
+import functools
+import importlib.util
+import os
+import re
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules generated report scripts may import (top-level names); project modules in scripts/
+# and the prompts package are allowed as well
+ALLOWED_IMPORTS = frozenset({
+    "argparse", "collections", "contextlib", "copy", "csv", "dataclasses", "datetime", "decimal", "enum",
+    "functools", "glob", "io", "itertools", "json", "logging", "math", "os", "pathlib", "re", "runpy",
+    "shutil", "statistics", "string", "sys", "tempfile", "textwrap", "time", "typing", "warnings",
+    "pptx", "pandas", "numpy", "matplotlib", "PIL", "docx", "dotenv",
+})
+LOCAL_PACKAGES = ("prompts",)
+# String constants with these extensions are input files the script reads; they must exist
+INPUT_EXTENSIONS = (".json", ".py", ".fhb", ".docx", ".csv")
+DEFAULT_REPAIR_ROUNDS = 2
+
+_PATH_RE = re.compile(r"^[\w.\-]+([/\\][\w.\-]+)+$")
+_FENCE_RE = re.compile(r"```(?:python|py)?[ \t]*\n(.*?)```", re.DOTALL)
+_TRACEBACK_FRAME_RE = re.compile(r'^\s*File "(.+)", line (\d+)')
+_IMPLICIT_NAMES = frozenset(dir(builtins)) | {"__file__", "__name__", "__doc__", "__spec__", "__builtins__"}
+
+
+def strip_code_fence(text):
+    """The code of the first ```python fence (text around it is dropped), or the text itself when it has no fence."""
+    match = _FENCE_RE.search(text)
+    return match.group(1) if match else text.strip("\n")
+
+
+@functools.lru_cache(maxsize=None)
+def _defined_names(path, mtime):
+    """Top-level names a project module or slide definitions file defines, read from its AST."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            names.update((alias.asname or alias.name).split(".")[0] for alias in node.names)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                names.update(n.id for n in ast.walk(target) if isinstance(n, ast.Name))
+    return frozenset(names)
+
+
+def _local_module_path(module, bases):
+    """
+    Path of a project module ("metric_store", "prompts.slide_definitions") under one of `bases`:
+    its .py file, or the directory of a package. None if it is not a project module.
+    """
+    relative = module.replace(".", os.sep)
+    for base in bases:
+        if os.path.exists(os.path.join(base, relative + ".py")):
+            return os.path.join(base, relative + ".py")
+        if os.path.isdir(os.path.join(base, relative)):
+            return os.path.join(base, relative)
+    return None
+
+
+def _check_import(module, names, lineno, bases, problems):
+    top = module.split(".")[0]
+    if top in LOCAL_PACKAGES or _local_module_path(top, bases):
+        path = _local_module_path(module, bases)
+        if path is None:
+            problems.append((lineno, f"module '{module}' not found"))
+        elif os.path.isfile(path):
+            defined = _defined_names(path, os.path.getmtime(path))
+            for name in names:
+                if name != "*" and name not in defined:
+                    problems.append((lineno, f"'{name}' is not defined in {module}"))
+    elif top not in ALLOWED_IMPORTS:
+        problems.append((lineno, f"import of '{module}' is not allowed (use python-pptx, pandas, matplotlib, "
+                                 "the standard library or the project modules)"))
+    elif importlib.util.find_spec(top) is None:
+        problems.append((lineno, f"module '{top}' is not installed"))
+
+
+def _bound_and_loaded_names(tree):
+    """Every name bound anywhere in the module, and the first line each other name is read on."""
+    bound = set()
+    loaded = {}
+    star_import = False
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if isinstance(node.ctx, ast.Load):
+                loaded.setdefault(node.id, node.lineno)
+            else:
+                bound.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            bound.add(node.name)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name == "*":
+                    star_import = True
+                bound.add((alias.asname or alias.name).split(".")[0])
+        elif isinstance(node, ast.ExceptHandler) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            bound.update(node.names)
+        elif isinstance(node, (ast.MatchAs, ast.MatchStar)) and node.name:
+            bound.add(node.name)
+        elif isinstance(node, ast.MatchMapping) and node.rest:
+            bound.add(node.rest)
+    return bound, loaded, star_import
+
+
+def _output_path_nodes(tree):
+    """String constants passed as the file of open(..., "w"/"a"/"x"): outputs, not inputs."""
+    outputs = set()
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == "open"
+                and node.args and isinstance(node.args[0], ast.Constant)):
+            mode = node.args[1] if len(node.args) > 1 else next(
+                (keyword.value for keyword in node.keywords if keyword.arg == "mode"), None)
+            if isinstance(mode, ast.Constant) and isinstance(mode.value, str) and set(mode.value) & set("wax"):
+                outputs.add(id(node.args[0]))
+    return outputs
+
+
+def _referenced_paths(tree):
+    """(line, path) of input file paths written as string constants or os.path.join of constants."""
+    outputs = _output_path_nodes(tree)
+    in_join = set()
+    paths = []
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "join"
+                and node.args and all(isinstance(arg, ast.Constant) and isinstance(arg.value, str) for arg in node.args)):
+            in_join.update(id(arg) for arg in node.args)
+            paths.append((node.lineno, os.path.join(*(arg.value for arg in node.args))))
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Constant) and isinstance(node.value, str) and id(node) not in outputs
+                and id(node) not in in_join and _PATH_RE.match(node.value)):
+            paths.append((node.lineno, node.value))
+    return [(lineno, path) for lineno, path in paths if path.lower().endswith(INPUT_EXTENSIONS)]
+
+
+def check_generated_code(source, script_path, project_dir="."):
+    """
+    Static checks on a generated script before it is run:
+    - it parses and compiles
+    - it only imports allowed modules, and they are installed
+    - names imported from project modules exist
+    - every name it reads is bound somewhere or is a builtin
+    - the input files it names (data JSON, slide definitions) exist under `project_dir`
+    Returns a list of (line, problem); empty when the script passes. Nothing is imported or run.
+    """
+    if not source.strip():
+        return [(0, "the response contains no code")]
+    try:
+        tree = ast.parse(source, script_path)
+        compile(tree, script_path, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        return [(e.lineno or 0, f"SyntaxError: {e.msg}")]
+
+    problems = []
+    bases = (os.path.dirname(os.path.abspath(script_path)), SCRIPTS_DIR, os.path.abspath(project_dir))
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                _check_import(alias.name, (), node.lineno, bases, problems)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                problems.append((node.lineno, "relative imports do not work in a script run directly"))
+            else:
+                _check_import(node.module, [alias.name for alias in node.names], node.lineno, bases, problems)
+
+    bound, loaded, star_import = _bound_and_loaded_names(tree)
+    if not star_import:
+        for name, lineno in loaded.items():
+            if name not in bound and name not in _IMPLICIT_NAMES:
+                problems.append((lineno, f"name '{name}' is not defined (missing import?)"))
+
+    for lineno, path in _referenced_paths(tree):
+        if not os.path.exists(os.path.join(project_dir, path)):
+            problems.append((lineno, f"file '{path}' does not exist"))
+    return sorted(problems)
+
+
+def runtime_problems(stderr, script_path):
+    """
+    The failure of a script run reduced to one (line, problem): the deepest traceback frame in
+    the script and the final exception line, instead of the whole traceback.
+    """
+    lines = [line for line in (stderr or "").splitlines() if line.strip()]
+    if not lines:
+        return [(0, "the script exited with an error and no output")]
+    lineno = 0
+    script_name = os.path.basename(script_path)
+    for line in lines:
+        match = _TRACEBACK_FRAME_RE.match(line)
+        if match and os.path.basename(match.group(1)) == script_name:
+            lineno = int(match.group(2))
+    return [(lineno, f"runtime error: {lines[-1].strip()}")]
+
+
+def save_script(path, source):
+    """Writes a script that passed the gate over `path` in one step, so a failed write never leaves half a script."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(source)
+    os.replace(tmp_path, path)
+
+
+def format_problems(source, problems):
+    """One line per problem, with the offending source line, for logs and repair prompts."""
+    source_lines = source.splitlines()
+    formatted = []
+    for lineno, message in problems:
+        if 0 < lineno <= len(source_lines):
+            formatted.append(f"- line {lineno} `{source_lines[lineno - 1].strip()[:120]}`: {message}")
+        else:
+            formatted.append(f"- {message}")
+    return "\n".join(formatted)
+
+
+class RepairLoop:
+    """
+    Generates a script with `complete(messages) -> response text`, gating every response with
+    check_generated_code (or `check(code) -> problems`, e.g. to gate one function within the file
+    it is assembled into). A rejected response goes back to the model with only the list of
+    problems appended (the original prompt stays the cached prefix), at most `max_repair_rounds`
+    times in total, also counting repairs of runtime failures (`repair`). `rejected()` is called
+    for every response the gate rejects (ChatClient.reject keeps it out of the response cache).
+    """
+
+    def __init__(self, complete, messages, build_repair_messages, script_path, max_repair_rounds=DEFAULT_REPAIR_ROUNDS,
+                 project_dir=".", check=None, rejected=None):
+        self.complete = complete
+        self.base_messages = messages
+        self.build_repair_messages = build_repair_messages
+        self.script_path = script_path
+        self.rounds_left = max_repair_rounds
+        self.project_dir = project_dir
+        self.check = check
+        self.rejected = rejected
+        self.response = None
+        self.code = None
+
+    def _generate(self, messages):
+        while True:
+            self.response = self.complete(messages)
+            self.code = strip_code_fence(self.response)
+            start = time.perf_counter()
+            if self.check:
+                problems = self.check(self.code)
+            else:
+                problems = check_generated_code(self.code, self.script_path, self.project_dir)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if not problems:
+                print(f"Code gate: passed in {elapsed_ms:.1f} ms")
+                return self.code
+            print(f"Code gate: rejected in {elapsed_ms:.1f} ms, {len(problems)} problem(s):\n"
+                  f"{format_problems(self.code, problems)}")
+            if self.rejected:
+                self.rejected()
+            messages = self._repair_messages(problems)
+            if messages is None:
+                return None
+
+    def _repair_messages(self, problems):
+        if self.rounds_left <= 0:
+            print("No repair rounds left.")
+            return None
+        self.rounds_left -= 1
+        print(f"Asking the model to repair the script ({self.rounds_left} repair round(s) left after this one)...")
+        return self.build_repair_messages(self.base_messages, self.response, format_problems(self.code, problems))
+
+    def generate(self):
+        """The first script that passes the gate, or None when the repair rounds run out."""
+        return self._generate(self.base_messages)
+
+    def repair(self, problems):
+        """A repaired script after the last one failed with `problems` (e.g. runtime_problems), or None."""
+        messages = self._repair_messages(problems)
+        return None if messages is None else self._generate(messages)
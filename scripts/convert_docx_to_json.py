@@ -1,57 +1,244 @@
+import argparse
 import docx
 import json
 import os
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
 from docx.oxml.text.paragraph import CT_P
 from docx.oxml.table import CT_Tbl
 from docx.table import Table
 from docx.text.paragraph import Paragraph
 
-def docx_to_json(docx_path, json_path):
+# WordprocessingML tags used by the streaming extractor
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+W_BODY = W_NS + "body"
+W_P = W_NS + "p"
+W_R = W_NS + "r"
+W_HYPERLINK = W_NS + "hyperlink"
+W_T = W_NS + "t"
+W_TAB = W_NS + "tab"
+W_PTAB = W_NS + "ptab"
+W_BR = W_NS + "br"
+W_CR = W_NS + "cr"
+W_NO_BREAK_HYPHEN = W_NS + "noBreakHyphen"
+W_TBL = W_NS + "tbl"
+W_TR = W_NS + "tr"
+W_TR_PR = W_NS + "trPr"
+W_GRID_BEFORE = W_NS + "gridBefore"
+W_TC = W_NS + "tc"
+W_TC_PR = W_NS + "tcPr"
+W_GRID_SPAN = W_NS + "gridSpan"
+W_V_MERGE = W_NS + "vMerge"
+W_VAL = W_NS + "val"
+W_TYPE = W_NS + "type"
+
+PACKAGE_RELS_PATH = "_rels/.rels"
+OFFICE_DOCUMENT_REL_TYPE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+DEFAULT_DOCUMENT_PART = "word/document.xml"
+
+
+def _is_table_title(text):
+    return bool(text.strip()) and "Financial Highlights" in text
+
+
+def rows_to_records(rows):
+    """
+    Turns a table (list of rows of cell text) into a list of dicts keyed by the header row.
+    """
+    # Extract headers from the first row
+    headers = [text.strip() for text in rows[0]]
+
+    # Extract data from the rest of the rows
+    table_data = []
+    for row in rows[1:]:
+        row_data = {}
+        for j, text in enumerate(row):
+            # Ensure we don't go out of bounds for headers
+            if j < len(headers):
+                row_data[headers[j]] = text.strip()
+        table_data.append(row_data)
+    return table_data
+
+
+def _iter_titled_tables(blocks):
+    """
+    Pairs each table with the "Financial Highlights" paragraph that precedes it.
+    `blocks` yields ("paragraph", text) and ("table", rows) in document order.
+    """
+    current_title = None
+    for kind, content in blocks:
+        if kind == "paragraph":
+            if _is_table_title(content):
+                current_title = content.strip()
+        elif current_title:
+            if not content:
+                continue
+            yield current_title, rows_to_records(content)
+            current_title = None # Reset for next table
+
+
+def _iter_blocks_python_docx(docx_path):
+    """Yields body-level blocks using the python-docx object model."""
+    document = docx.Document(docx_path)
+    for block in document.element.body:
+        if isinstance(block, CT_P):
+            yield "paragraph", Paragraph(block, document).text
+        elif isinstance(block, CT_Tbl):
+            table = Table(block, document)
+            yield "table", [[cell.text for cell in row.cells] for row in table.rows]
+
+
+def _main_document_part(archive):
+    """Resolves the main document part from the package relationships."""
+    try:
+        rels = ET.fromstring(archive.read(PACKAGE_RELS_PATH))
+    except KeyError:
+        return DEFAULT_DOCUMENT_PART
+    for rel in rels:
+        if rel.get("Type") == OFFICE_DOCUMENT_REL_TYPE:
+            return posixpath.normpath(rel.get("Target", DEFAULT_DOCUMENT_PART).lstrip("/"))
+    return DEFAULT_DOCUMENT_PART
+
+
+def _run_text(run):
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == W_T:
+            parts.append(child.text or "")
+        elif tag == W_TAB or tag == W_PTAB:
+            parts.append("\t")
+        elif tag == W_BR:
+            # Page and column breaks carry no text, only line breaks do
+            if child.get(W_TYPE, "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif tag == W_CR:
+            parts.append("\n")
+        elif tag == W_NO_BREAK_HYPHEN:
+            parts.append("-")
+    return "".join(parts)
+
+
+def _paragraph_text(paragraph):
+    parts = []
+    for child in paragraph:
+        if child.tag == W_R:
+            parts.append(_run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(_run_text(run) for run in child if run.tag == W_R)
+    return "".join(parts)
+
+
+def _int_val(element, default):
+    if element is None:
+        return default
+    return int(element.get(W_VAL, default))
+
+
+def _row_cells(row, layout_above):
+    """
+    Expands one `w:tr` into per-grid-column cell texts, the way python-docx's `row.cells` does.
+    A cell spanning N grid columns (gridSpan) is repeated N times, and a vertically merged
+    continuation cell (vMerge) takes the text of the cell above it.
+    Returns the cell texts and the grid layout {offset: (text, span)} for the next row.
+    """
+    row_pr = row.find(W_TR_PR)
+    offset = _int_val(row_pr.find(W_GRID_BEFORE) if row_pr is not None else None, 0)
+
+    cells = []
+    layout = {}
+    for cell in row:
+        if cell.tag != W_TC:
+            continue
+        cell_pr = cell.find(W_TC_PR)
+        span = _int_val(cell_pr.find(W_GRID_SPAN) if cell_pr is not None else None, 1)
+        v_merge = cell_pr.find(W_V_MERGE) if cell_pr is not None else None
+
+        if v_merge is not None and v_merge.get(W_VAL, "continue") == "continue":
+            text, root_span = layout_above.get(offset, ("", span))
+        else:
+            text = "\n".join(_paragraph_text(p) for p in cell if p.tag == W_P)
+            root_span = span
+
+        cells.extend([text] * root_span)
+        layout[offset] = (text, root_span)
+        offset += span
+    return cells, layout
+
+
+def iter_docx_blocks(docx_path):
+    """
+    Streams body-level blocks straight from the document XML inside the .docx zip,
+    without building the python-docx object model.
+    Yields ("paragraph", text) and ("table", rows) in document order; each row is
+    expanded and discarded as soon as it is parsed, so memory stays flat.
+    """
+    with zipfile.ZipFile(docx_path) as archive:
+        with archive.open(_main_document_part(archive)) as document_xml:
+            path = []
+            body = None
+            table = None
+            rows = []
+            layout_above = {}
+
+            for event, element in ET.iterparse(document_xml, events=("start", "end")):
+                if event == "start":
+                    path.append(element.tag)
+                    if len(path) == 2 and element.tag == W_BODY:
+                        body = element
+                    elif len(path) == 3 and element.tag == W_TBL:
+                        table, rows, layout_above = element, [], {}
+                    continue
+
+                depth = len(path)
+                path.pop()
+                if depth == 4 and element.tag == W_TR and table is not None:
+                    cells, layout_above = _row_cells(element, layout_above)
+                    rows.append(cells)
+                    table.remove(element)
+                elif depth == 3 and body is not None:
+                    if element.tag == W_P:
+                        yield "paragraph", _paragraph_text(element)
+                    elif element.tag == W_TBL:
+                        yield "table", rows
+                        table, rows = None, []
+                    body.remove(element)
+
+
+def iter_docx_tables(docx_path, streaming=True):
+    """
+    Yields (title, table_data) for each "Financial Highlights" table as it is found.
+    """
+    if streaming:
+        blocks = iter_docx_blocks(docx_path)
+    else:
+        blocks = _iter_blocks_python_docx(docx_path)
+    yield from _iter_titled_tables(blocks)
+
+
+def docx_to_json(docx_path, json_path, streaming=True):
     """
     Reads tables and their preceding titles from a .docx file and converts them to a JSON file.
     The JSON structure is a dictionary where keys are table titles and values are table data.
+    The document XML is parsed incrementally; `streaming=False` loads it through python-docx instead.
     """
     try:
-        document = docx.Document(docx_path)
         data_with_titles = {}
-        current_title = None
-
-        for block in document.element.body:
-            if isinstance(block, CT_P):
-                paragraph = Paragraph(block, document)
-                if paragraph.text.strip() and "Financial Highlights" in paragraph.text:
-                    current_title = paragraph.text.strip()
-            elif isinstance(block, CT_Tbl):
-                if current_title:
-                    table = Table(block, document)
-                    table_data = []
-                    if not table.rows:
-                        continue
-
-                    # Extract headers from the first row
-                    headers = [cell.text.strip() for cell in table.rows[0].cells]
-                    
-                    # Extract data from the rest of the rows
-                    for row in table.rows[1:]:
-                        row_data = {}
-                        for j, cell in enumerate(row.cells):
-                            # Ensure we don't go out of bounds for headers
-                            if j < len(headers):
-                                row_data[headers[j]] = cell.text.strip()
-                        table_data.append(row_data)
-                    
-                    data_with_titles[current_title] = table_data
-                    current_title = None # Reset for next table
+        for title, table_data in iter_docx_tables(docx_path, streaming=streaming):
+            data_with_titles[title] = table_data
 
         # Ensure the output directory exists
         output_dir = os.path.dirname(json_path)
-        if not os.path.exists(output_dir):
+        if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir)
 
         # Write data to JSON file
         with open(json_path, 'w', encoding='utf-8') as json_file:
             json.dump(data_with_titles, json_file, indent=4, ensure_ascii=False)
-            
+
         print(f"Successfully converted '{docx_path}' to '{json_path}' with table titles.")
 
     except Exception as e:
@@ -60,7 +247,12 @@ def docx_to_json(docx_path, json_path):
 if __name__ == '__main__':
     # Correctly resolve paths relative to the project root
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    docx_file = os.path.join(project_root, 'data', '2025_dat_techcombank_paste.docx')
-    json_file = os.path.join(project_root, 'data', 'financial_highlights.json')
-    
-    docx_to_json(docx_file, json_file)
+
+    parser = argparse.ArgumentParser(description="Convert Financial Highlights tables in a .docx file to JSON.")
+    parser.add_argument("--input", default=os.path.join(project_root, 'data', '2025_dat_techcombank_paste.docx'))
+    parser.add_argument("--output", default=os.path.join(project_root, 'data', 'financial_highlights.json'))
+    parser.add_argument("--python-docx", action="store_true",
+                        help="Load the document with python-docx instead of parsing word/document.xml incrementally.")
+    args = parser.parse_args()
+
+    docx_to_json(args.input, args.output, streaming=not args.python_docx)
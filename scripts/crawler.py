@@ -1,25 +1,245 @@
-import requests
+import argparse
+import asyncio
+import bisect
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
 from bs4 import BeautifulSoup
-import pandas as pd
 
-# The URL of the financial highlights page
-url = "https://techcombank.com/en/investors/financial-information/highlights"
+from convert_docx_to_json import rows_to_records
+from http_client import get_client
+from metric_store import infer_table_title
+
+# Investor-relations pages crawled when no page list is given
+DEFAULT_PAGES = [
+    {"url": "https://techcombank.com/en/investors/financial-information/highlights", "selector": "table"},
+]
+DEFAULT_CACHE_DIR = os.path.join(".cache", "crawler")
+DEFAULT_OUTPUT_PATH = os.path.join("data", "crawled_highlights.json")
+DEFAULT_CONCURRENCY = 8
+DEFAULT_HOST_CONCURRENCY = 2
+DEFAULT_TIMEOUT = (10, 30)
+
+_HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+
+
+def _parser():
+    """lxml parses large pages several times faster; html.parser ships with Python."""
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        return "html.parser"
+    return "lxml"
+
+
+class PageCache:
+    """
+    On-disk copy of each fetched page with its ETag and Last-Modified validators.
+    `<sha256(url)>.json` holds the validators and `<sha256(url)>.html` the body, so a
+    page that has not changed is answered by a 304 and read back from disk.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".json"), os.path.join(self.cache_dir, key + ".html")
+
+    def validators(self, url):
+        """Conditional request headers for `url`, empty when nothing is cached."""
+        meta_path, body_path = self._paths(url)
+        if not os.path.exists(body_path):
+            return {}
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def body(self, url):
+        with open(self._paths(url)[1], "r", encoding="utf-8") as f:
+            return f.read()
+
+    def store(self, url, response):
+        meta_path, body_path = self._paths(url)
+        for path, content in ((body_path, response.text), (meta_path, json.dumps({
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }))):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+
+async def fetch_pages(urls, cache=None, concurrency=DEFAULT_CONCURRENCY, host_concurrency=DEFAULT_HOST_CONCURRENCY,
+                      client=None):
+    """
+    Fetches `urls` concurrently, at most `concurrency` in total and `host_concurrency` per host.
+    With a PageCache, requests are conditional and a 304 is served from the cache.
+    Returns {url: (html, status, seconds)}; a failed fetch maps to the exception instead.
+    """
+    client = client or get_client()
+    semaphore = asyncio.Semaphore(concurrency)
+    host_semaphores = {}
+
+    async def fetch(url):
+        host = urlsplit(url).netloc
+        host_semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(host_concurrency))
+        # Wait for the host first so requests queued behind a busy host do not hold global slots
+        async with host_semaphore, semaphore:
+            start = time.perf_counter()
+            headers = cache.validators(url) if cache else {}
+            response = await client.aget(url, headers=headers, timeout=DEFAULT_TIMEOUT)
+            if response.status_code == 304 and headers:
+                return cache.body(url), 304, time.perf_counter() - start
+            response.raise_for_status()
+            if cache:
+                cache.store(url, response)
+            return response.text, response.status_code, time.perf_counter() - start
+
+    results = await asyncio.gather(*(fetch(url) for url in urls), return_exceptions=True)
+    return dict(zip(urls, results))
+
+
+def _table_rows(table):
+    """Cell texts of each row of `table` (not of nested tables), a colspan cell repeated once per column."""
+    rows = []
+    for tr in table.find_all("tr"):
+        if tr.find_parent("table") is not table:
+            continue
+        cells = []
+        for cell in tr.find_all(("th", "td"), recursive=False):
+            text = cell.get_text(" ", strip=True)
+            try:
+                span = max(1, int(cell.get("colspan", 1)))
+            except ValueError:
+                span = 1
+            cells.extend([text] * span)
+        if cells:
+            rows.append(cells)
+    return rows
+
+
+class _TitleIndex:
+    """The `title_selector` matches of a page by document position, to find the one nearest before each table."""
+
+    def __init__(self, soup, title_selector):
+        self.order = {}
+        self.positions = []
+        self.elements = []
+        if title_selector:
+            self.order = {id(tag): i for i, tag in enumerate(soup.find_all(True))}
+            self.elements = soup.select(title_selector)
+            self.positions = [self.order[id(element)] for element in self.elements]
+
+    def before(self, table):
+        i = bisect.bisect_left(self.positions, self.order.get(id(table), 0))
+        return self.elements[i - 1] if i else None
+
+
+def _table_title(table, titles):
+    """The table's title: the nearest `title_selector` match before it, its <caption>, or the nearest heading before it."""
+    element = titles.before(table)
+    if element:
+        return element.get_text(" ", strip=True)
+    caption = table.find("caption")
+    if caption:
+        return caption.get_text(" ", strip=True)
+    heading = table.find_previous(_HEADING_TAGS)
+    return heading.get_text(" ", strip=True) if heading else None
+
+
+def extract_tables(html, selector="table", title_selector=None, title=None):
+    """
+    Pulls the tables matching the CSS `selector` straight out of the parsed page and returns
+    [(title, records)] with records in the financial_highlights.json row layout. The title is
+    `title` if given, else taken from the page; an untitled table is named from its periods.
+    """
+    soup = BeautifulSoup(html, _parser())
+    titles = _TitleIndex(soup, None if title else title_selector)
+    tables = []
+    for position, table in enumerate(soup.select(selector)):
+        rows = _table_rows(table)
+        if len(rows) < 2:
+            continue
+        records = rows_to_records(rows)
+        table_title = title or _table_title(table, titles) or infer_table_title(records, position)
+        tables.append((table_title, records))
+    return tables
+
+
+def crawl(pages, output_path=DEFAULT_OUTPUT_PATH, cache_dir=DEFAULT_CACHE_DIR, concurrency=DEFAULT_CONCURRENCY,
+          host_concurrency=DEFAULT_HOST_CONCURRENCY):
+    """
+    Crawls `pages` (dicts with `url` and optional `selector`, `title_selector` and `title`) and
+    writes every table found to `output_path` as {title: records}, the layout docx_to_json writes.
+    Returns the written dict.
+    """
+    cache = PageCache(cache_dir) if cache_dir else None
+    urls = list(dict.fromkeys(page["url"] for page in pages))
+    start = time.perf_counter()
+    fetched = asyncio.run(fetch_pages(urls, cache, concurrency, host_concurrency))
+
+    output = {}
+    failures = sum(isinstance(result, Exception) for result in fetched.values())
+    for page in pages:
+        result = fetched[page["url"]]
+        if isinstance(result, Exception):
+            print(f"Failed to fetch {page['url']}: {result}")
+            continue
+        html, status, seconds = result
+        tables = extract_tables(html, page.get("selector", "table"), page.get("title_selector"), page.get("title"))
+        source = "not modified, from cache" if status == 304 else f"HTTP {status}"
+        print(f"{page['url']}: {len(tables)} table(s) ({source}, {seconds:.2f}s)")
+        for title, records in tables:
+            unique_title, n = title, 2
+            while unique_title in output:
+                unique_title, n = f"{title} ({n})", n + 1
+            output[unique_title] = records
 
-# Send a request to the webpage
-response = requests.get(url)
-response.raise_for_status()  # Raise an exception for bad status codes
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=4, ensure_ascii=False)
+    print(f"Saved {len(output)} table(s) from {len(urls) - failures} of {len(urls)} page(s) to '{output_path}' "
+          f"in {time.perf_counter() - start:.2f}s")
+    return output
 
-# Parse the HTML content of the page
-soup = BeautifulSoup(response.text, 'html.parser')
 
-# Find the table containing the financial highlights
-# You would need to inspect the page source to find the correct table identifier
-financial_table = soup.find('table') # This is a simplified selector
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl investor-relations pages into financial highlights JSON.")
+    parser.add_argument("urls", nargs="*", help="Pages to crawl with the default selector (default: the built-in IR page).")
+    parser.add_argument("--pages", help="JSON list of {url, selector, title_selector, title} page specs.")
+    parser.add_argument("--selector", default="table", help="CSS selector of the tables to extract from URLs given inline.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true", help="Always download pages in full.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--host-concurrency", type=int, default=DEFAULT_HOST_CONCURRENCY,
+                        help="Maximum concurrent requests to one host.")
+    args = parser.parse_args()
 
-if financial_table:
-    # Use pandas to read the HTML table directly into a DataFrame
-    df = pd.read_html(str(financial_table))[0]
-    print("Successfully scraped the financial table:")
-    print(df.head())
-else:
-    print("Could not find the financial table on the page.")
\ No newline at end of file
+    if args.pages:
+        with open(args.pages, "r", encoding="utf-8") as f:
+            page_specs = json.load(f)
+    elif args.urls:
+        page_specs = [{"url": url, "selector": args.selector} for url in args.urls]
+    else:
+        page_specs = DEFAULT_PAGES
+    crawl(page_specs, args.output, cache_dir=None if args.no_cache else args.cache_dir,
+          concurrency=args.concurrency, host_concurrency=args.host_concurrency)
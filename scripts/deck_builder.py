@@ -0,0 +1,519 @@
+# API dựng deck ổn định: đọc dữ liệu, các hàm tạo slide, render biểu đồ (qua cache biểu đồ dùng
+# chung), build incremental và dòng lệnh. Script do AI sinh ra (generated_report_script.py),
+# batch_build_decks.py và các benchmark đều import từ module này thay vì từ script sinh ra.
+# Chỉ import thư viện chuẩn và các module nhẹ ở đầu file; python-pptx, matplotlib và
+# biểu đồ native được import trong hàm ở giai đoạn cần tới, để khởi động nhanh
+# (và để worker render biểu đồ không phải import python-pptx).
+import argparse
+import contextlib
+import os
+import runpy
+import tempfile
+import sys
+import time
+from metric_store import load_metric_store
+from chart_cache import ChartCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+from chart_renderer import CHART_BACKENDS, CHART_FIGSIZE, chart_filename, create_chart_image_cached, render_charts
+from slide_compiler import RenderPlan, compile_slides
+from image_assets import DEFAULT_CACHE_DIR as DEFAULT_IMAGE_CACHE_DIR, DEFAULT_IMAGE_DPI, ImageAssetStage
+from deck_manifest import (code_fingerprint, load_manifest, reusable_slides, save_manifest, slide_input_hash,
+                           splice_slides)
+from deck_skeleton import DEFAULT_CACHE_DIR as DEFAULT_SKELETON_CACHE_DIR, DeckSkeletonCache
+from tracing import TRACE_ENV, enable_tracing, shutdown_tracing, span, summary_table, tracing_enabled
+
+log_file_path = 'generation.log'
+
+# --- 0. Cấu hình và Định nghĩa Dữ liệu ---
+
+# Tên file PPTX đầu ra
+OUTPUT_PPTX_FILENAME = "Bao_Cao_Tai_Chinh_Doanh_Nghiep.pptx"
+
+# Đường dẫn đến file dữ liệu tài chính
+FINANCIAL_DATA_PATH = "data/financial_highlights.json"
+
+# Định nghĩa slide (slide_definitions) nằm ở file riêng, không nằm trong mã render: sửa nội dung
+# một slide chỉ đổi hash của slide đó, không đổi rendering_fingerprint
+SLIDE_DEFINITIONS_PATH = "prompts/slide_definitions.py"
+
+# Chiều cao hiển thị (inch) của ảnh trên slide, dùng để thu nhỏ ảnh trước khi chèn
+LOGO_HEIGHT_IN = 1.0
+CONTENT_IMAGE_HEIGHT_IN = 3.5
+
+# Bố cục slide được tìm theo tên trong template (template doanh nghiệp có thể xếp bố cục
+# theo thứ tự khác); chỉ số là vị trí của bố cục đó trong template mặc định của python-pptx
+SLIDE_LAYOUTS = {
+    "title": ("Title Slide", 0),
+    "title_and_content": ("Title and Content", 1),
+    "title_only": ("Title Only", 5),
+}
+
+
+# --- 1. Đọc dữ liệu ---
+def load_financial_data(filepath):
+    """
+    Đọc dữ liệu tài chính từ tệp JSON và parse một lần vào MetricStore
+    (tra cứu theo (bảng, chỉ số, kỳ) với giá trị số đã được parse).
+    Tệp nhị phân tạo bởi metric_binary.py được memory-map, không cần parse.
+    """
+    with span("data_load", path=filepath):
+        store = load_metric_store(filepath)
+    print(f"Successfully loaded data from {filepath}.")
+    return store
+
+
+# --- 3. Hàm trợ giúp tạo slide ---
+
+
+def slide_layout_for(prs, role):
+    """Bố cục slide theo tên trong SLIDE_LAYOUTS; nếu template không có tên đó thì dùng chỉ số mặc định."""
+    name, default_index = SLIDE_LAYOUTS[role]
+    layout = prs.slide_layouts.get_by_name(name)
+    if layout is None:
+        layout = prs.slide_layouts[default_index]
+        print(f"Warning: layout '{name}' not found in the template, using layout {default_index} ('{layout.name}').")
+    return layout
+
+
+def add_title_slide(prs, slide_def, images=None):
+    """Thêm slide tiêu đề. `images`: ImageAssetStage cho biết ảnh đã xử lý cần chèn (nếu có)."""
+    from pptx.util import Inches, Pt
+
+    slide_layout = slide_layout_for(prs, "title") # Bố cục slide tiêu đề
+    slide = prs.slides.add_slide(slide_layout)
+
+    title = slide.shapes.title
+    subtitle = slide.placeholders[1] # Placeholder subtitle thường là index 1
+
+    title.text = slide_def["title"]
+    subtitle.text = slide_def["subtitle"]
+
+    # Thêm ghi chú dưới dạng hộp văn bản mới nếu không có placeholder phù hợp
+    left = Inches(1)
+    top = Inches(6)
+    width = Inches(8)
+    height = Inches(0.5)
+    txBox = slide.shapes.add_textbox(left, top, width, height)
+    tf = txBox.text_frame
+    p = tf.add_paragraph()
+    p.text = slide_def["notes"]
+    p.font.size = Pt(12)
+    p.font.italic = True
+
+    # Chèn logo công ty
+    if slide_def.get("logo_path") and os.path.exists(slide_def["logo_path"]):
+        left = Inches(8)
+        top = Inches(0.5)
+        height = Inches(LOGO_HEIGHT_IN) # Điều chỉnh chiều cao logo
+        logo_path = images.path_for(slide_def["logo_path"]) if images else slide_def["logo_path"]
+        slide.shapes.add_picture(logo_path, left, top, height=height)
+    print(f"Created title slide: '{slide_def['title']}'")
+
+
+def add_section_header_slide(prs, slide_def):
+    """Thêm slide tiêu đề phần."""
+    from pptx.util import Inches, Pt
+
+    slide_layout = slide_layout_for(prs, "title_only") # Bố cục chỉ có tiêu đề
+    slide = prs.slides.add_slide(slide_layout)
+    title = slide.shapes.title
+    title.text = slide_def["title"]
+    
+    # Thêm subtitle dưới dạng hộp văn bản mới
+    left = Inches(1)
+    top = Inches(3)
+    width = Inches(8)
+    height = Inches(1)
+    txBox = slide.shapes.add_textbox(left, top, width, height)
+    tf = txBox.text_frame
+    p = tf.add_paragraph()
+    p.text = slide_def["subtitle"]
+    p.font.size = Pt(24)
+    p.font.bold = True
+    print(f"Created section header slide: '{slide_def['title']}'")
+
+
+def add_title_and_content_slide(prs, slide_def, images=None):
+    """Thêm slide tiêu đề và nội dung (có thể kèm ảnh). `images`: như add_title_slide."""
+    from pptx.util import Inches, Pt
+
+    slide_layout = slide_layout_for(prs, "title_and_content") # Bố cục tiêu đề và nội dung
+    slide = prs.slides.add_slide(slide_layout)
+
+    title = slide.shapes.title
+    title.text = slide_def["title"]
+
+    # Placeholder cho nội dung chính
+    body_shape = slide.placeholders[1] 
+    tf = body_shape.text_frame
+    tf.clear() # Xóa nội dung mặc định
+
+    # Thêm các bullet points
+    if slide_def.get("content_bullets"):
+        for bullet_text in slide_def["content_bullets"]:
+            p = tf.add_paragraph()
+            p.text = bullet_text
+            p.level = 1 # Cấp độ bullet point
+            p.font.size = Pt(18)
+    
+    # Chèn ảnh nếu có
+    if slide_def.get("image_path") and os.path.exists(slide_def["image_path"]):
+        # Vị trí ảnh: bên phải của nội dung
+        img_left = Inches(6.5)
+        img_top = Inches(2.5)
+        img_height = Inches(CONTENT_IMAGE_HEIGHT_IN)
+        image_path = images.path_for(slide_def["image_path"]) if images else slide_def["image_path"]
+        slide.shapes.add_picture(image_path, img_left, img_top, height=img_height)
+        # Điều chỉnh kích thước và vị trí của placeholder nội dung để không chồng chéo ảnh
+        body_shape.left = Inches(0.5)
+        body_shape.top = Inches(1.8)
+        body_shape.width = Inches(5.5)
+        body_shape.height = Inches(4.5)
+        
+    print(f"Created title and content slide: '{slide_def['title']}'")
+
+
+def chart_image_path(chart_def, temp_chart_dir):
+    """Đường dẫn ảnh biểu đồ trong thư mục tạm."""
+    return os.path.join(temp_chart_dir, chart_filename(chart_def))
+
+
+def add_title_and_chart_slide(prs, slide_def, financial_data, temp_chart_dir, prerendered_chart=None,
+                              chart_cache=None, chart_backend="png", series=None):
+    """
+    Thêm slide tiêu đề và biểu đồ (có thể kèm bullet points).
+    `prerendered_chart` là kết quả (đường dẫn ảnh, log) đã render sẵn bởi render_charts;
+    nếu không có thì biểu đồ được render ngay tại đây (hoặc lấy từ `chart_cache`).
+    `chart_backend="native"` vẽ biểu đồ PowerPoint gốc thay cho ảnh PNG.
+    `series`: chuỗi dữ liệu đã tra cứu sẵn trong render plan (None: tra cứu từ `financial_data`).
+    """
+    from pptx.enum.text import MSO_AUTO_SIZE
+    from pptx.util import Inches, Pt
+
+    slide_layout = slide_layout_for(prs, "title_and_content") # Bố cục tiêu đề và nội dung
+    slide = prs.slides.add_slide(slide_layout)
+
+    title = slide.shapes.title
+    title.text = slide_def["title"]
+
+    chart_def = slide_def["chart_definition"]
+
+    # Vị trí cho biểu đồ (nửa bên trái), cùng tỉ lệ khung với ảnh matplotlib
+    chart_left = Inches(0.5)
+    chart_top = Inches(1.8)
+    chart_width = Inches(6)
+    chart_height = int(chart_width * CHART_FIGSIZE[1] / CHART_FIGSIZE[0])
+
+    if chart_backend == "native":
+        # Biểu đồ PowerPoint gốc, không cần render ảnh
+        from native_charts import add_native_chart
+        with span("chart_render", chart=chart_def["chart_title"], backend="native"):
+            chart_added = add_native_chart(slide, financial_data, chart_def,
+                                           chart_left, chart_top, chart_width, chart_height, series) is not None
+    else:
+        # Tạo biểu đồ (hoặc lấy ảnh đã render sẵn) và nhúng vào slide
+        if prerendered_chart is not None:
+            created_chart_path, chart_log = prerendered_chart
+            print(chart_log, end="")
+        else:
+            with span("chart_render", chart=chart_def["chart_title"], backend="png"):
+                created_chart_path = create_chart_image_cached(financial_data, chart_def,
+                                                               chart_image_path(chart_def, temp_chart_dir),
+                                                               chart_cache, series)
+        chart_added = bool(created_chart_path)
+        if chart_added:
+            slide.shapes.add_picture(created_chart_path, chart_left, chart_top, width=chart_width)
+
+    if chart_added:
+        # Thêm bullet points nếu có (nửa bên phải)
+        if slide_def.get("content_bullets"):
+            left = Inches(6.8)
+            top = Inches(2.0)
+            width = Inches(3.5)
+            height = Inches(4.5)
+            txBox = slide.shapes.add_textbox(left, top, width, height)
+            tf = txBox.text_frame
+            tf.clear()
+            tf.word_wrap = True # Đảm bảo văn bản xuống dòng tự động
+            
+            for bullet_text in slide_def["content_bullets"]:
+                p = tf.add_paragraph()
+                p.text = bullet_text
+                p.level = 1
+                p.font.size = Pt(16)
+                p.space_after = Pt(10) # Khoảng cách giữa các bullet
+                
+            # Đặt auto_size để hộp văn bản tự điều chỉnh theo nội dung
+            tf.auto_size = MSO_AUTO_SIZE.SHAPE_TO_FIT_TEXT
+            
+    # Thêm ghi chú nếu có
+    if slide_def.get("notes"):
+        left = Inches(0.5)
+        top = Inches(6.5)
+        width = Inches(9)
+        height = Inches(0.5)
+        txBox = slide.shapes.add_textbox(left, top, width, height)
+        tf = txBox.text_frame
+        p = tf.add_paragraph()
+        p.text = slide_def["notes"]
+        p.font.size = Pt(12)
+        p.font.italic = True
+
+    print(f"Created chart slide: '{slide_def['title']}'")
+
+
+# --- 4. Logic chính để tạo Presentation ---
+
+
+def prerender_charts(slides, financial_data, temp_chart_dir, chart_workers, chart_cache=None, indices=None):
+    """
+    Gom toàn bộ chart_definition (kèm chuỗi dữ liệu) của render plan và render đồng thời trong process pool.
+    Mỗi slide có thư mục con riêng để hai biểu đồ trùng tên file không ghi đè nhau.
+    `indices`: chỉ render biểu đồ của các slide này (mặc định: mọi slide).
+    Trả về dict {chỉ số slide: (đường dẫn ảnh, log)}.
+    """
+    chart_slides = [i for i, slide in enumerate(slides)
+                    if slide.slide_type == "title_and_chart" and (indices is None or i in indices)]
+    jobs = []
+    for i in chart_slides:
+        slide_chart_dir = os.path.join(temp_chart_dir, str(i))
+        os.makedirs(slide_chart_dir, exist_ok=True)
+        chart_def = slides[i].definition["chart_definition"]
+        jobs.append((chart_def, chart_image_path(chart_def, slide_chart_dir), slides[i].series))
+    with span("prerender_charts", charts=len(jobs)):
+        rendered = render_charts(financial_data, jobs, workers=chart_workers, chart_cache=chart_cache)
+    return dict(zip(chart_slides, rendered))
+
+
+def slide_hash(slide):
+    """Hash đầu vào của một slide đã compile: định nghĩa, dữ liệu biểu đồ (gốc hoặc phái sinh) và nội dung các ảnh chèn vào."""
+    return slide_input_hash(slide.definition, slide.series, slide.assets)
+
+
+def slide_image_heights(slide_defs):
+    """{đường dẫn ảnh: [các chiều cao hiển thị (inch)]} của mọi ảnh tĩnh trong các slide."""
+    heights = {}
+    for slide_def in slide_defs:
+        if slide_def["slide_type"] == "title_slide" and slide_def.get("logo_path"):
+            heights.setdefault(slide_def["logo_path"], []).append(LOGO_HEIGHT_IN)
+        elif slide_def["slide_type"] == "title_and_content" and slide_def.get("image_path"):
+            heights.setdefault(slide_def["image_path"], []).append(CONTENT_IMAGE_HEIGHT_IN)
+    return heights
+
+
+def rendering_fingerprint(chart_backend, image_dpi=None):
+    """Mã nguồn và thông số render: đổi một trong số này thì phải build lại toàn bộ slide."""
+    import pptx
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    sources = [os.path.abspath(__file__)] + [os.path.join(script_dir, name)
+                                             for name in ("chart_renderer.py", "native_charts.py", "image_assets.py",
+                                                          "derived_metrics.py", "deck_skeleton.py")]
+    return code_fingerprint(sources, {"chart_backend": chart_backend, "python-pptx": pptx.__version__,
+                                      "chart_figsize": CHART_FIGSIZE, "image_dpi": image_dpi})
+
+
+def add_slide(prs, slide_def, financial_data, temp_chart_dir, prerendered_chart=None, chart_cache=None,
+              chart_backend="png", images=None, series=None):
+    """Thêm một slide theo slide_type. Trả về False nếu slide_type không được hỗ trợ."""
+    slide_type = slide_def["slide_type"]
+    if slide_type == "title_slide":
+        add_title_slide(prs, slide_def, images=images)
+    elif slide_type == "section_header":
+        add_section_header_slide(prs, slide_def)
+    elif slide_type == "title_and_content":
+        add_title_and_content_slide(prs, slide_def, images=images)
+    elif slide_type == "title_and_chart":
+        add_title_and_chart_slide(prs, slide_def, financial_data, temp_chart_dir,
+                                  prerendered_chart=prerendered_chart, chart_cache=chart_cache,
+                                  chart_backend=chart_backend, series=series)
+    else:
+        print(f"Undefined slide type: {slide_type}. Skipping this slide.")
+        return False
+    return True
+
+
+def create_presentation(slide_defs, financial_data, output_filename, chart_workers=None, chart_cache=None,
+                        chart_backend="png", incremental=False, template=None, images=None, skeletons=None):
+    """
+    Tạo một presentation PowerPoint hoàn chỉnh dựa trên các định nghĩa slide.
+    `slide_defs` được compile trước (slide_compiler.compile_slides): mọi tham chiếu dữ liệu sai
+    được báo cùng lúc qua SlideDefinitionError trước khi render bất cứ thứ gì. Có thể truyền
+    thẳng một RenderPlan đã compile.
+    `chart_workers`: None để render biểu đồ tuần tự theo từng slide; một số nguyên để
+    render trước tất cả biểu đồ song song với số process đó (0 = theo số CPU).
+    `chart_cache`: ChartCache để dùng lại ảnh biểu đồ không đổi giữa các lần build.
+    `chart_backend`: "png" (ảnh matplotlib) hoặc "native" (biểu đồ PowerPoint gốc).
+    `incremental`: mở lại file PPTX lần trước và chỉ build lại các slide có hash đầu vào
+    (định nghĩa, dữ liệu, ảnh) khác với manifest `<output>.manifest.json`; các slide còn lại
+    được giữ nguyên.
+    `template`: đường dẫn hoặc file-like của template PPTX (mặc định: template trống của python-pptx).
+    `skeletons`: DeckSkeletonCache chứa sẵn các slide tĩnh (tiêu đề, tiêu đề phần, nội dung) đã
+    build trên template; khi có, chỉ các slide biểu đồ được build mới.
+    `images`: ImageAssetStage để thu nhỏ và nén lại ảnh tĩnh theo kích thước hiển thị trước khi chèn
+    (None: chèn ảnh gốc).
+    """
+    if chart_backend not in CHART_BACKENDS:
+        raise ValueError(f"Unknown chart backend: {chart_backend}")
+    plan = slide_defs
+    if not isinstance(plan, RenderPlan):
+        with span("compile_slides", slides=len(slide_defs)):
+            plan = compile_slides(slide_defs, financial_data)
+    for warning in plan.warnings:
+        print(f"Warning: {warning}")
+    with span("build_presentation", slides=len(plan.slides), chart_backend=chart_backend, incremental=incremental):
+        _build_presentation(plan, financial_data, output_filename, chart_workers, chart_cache,
+                            chart_backend, incremental, template, images, skeletons)
+
+
+def _build_presentation(plan, financial_data, output_filename, chart_workers, chart_cache, chart_backend,
+                        incremental, template, images, skeletons):
+    """Phần thân của create_presentation (với render plan đã compile), chạy bên trong span build_presentation."""
+    from pptx import Presentation
+
+    slides = plan.slides
+    hashes = [slide_hash(slide) for slide in slides]
+    fingerprint = rendering_fingerprint(chart_backend, images.dpi if images else None)
+
+    # Ảnh tĩnh được xử lý theo kích thước hiển thị lớn nhất trong toàn bộ deck
+    if images is not None:
+        with span("prepare_images"):
+            images.prepare(slide_image_heights(slide.definition for slide in slides))
+
+    # Ở chế độ incremental, dùng lại các slide không đổi của file lần trước; nếu không thì
+    # dùng skeleton chứa sẵn các slide tĩnh (nếu có)
+    manifest = load_manifest(output_filename, fingerprint) if incremental else None
+    if manifest:
+        with span("open_previous_deck", path=output_filename):
+            prs = Presentation(output_filename)
+        reusable = reusable_slides(prs, manifest)
+    else:
+        if incremental:
+            print("No usable manifest from a previous build: building every slide"
+                  + (" that is not in the deck skeleton." if skeletons is not None else "."))
+        if skeletons is not None:
+            static_slides = [(h, slide) for h, slide in zip(hashes, slides) if slide.slide_type != "title_and_chart"]
+            def build_static_slide(prs, slide):
+                add_slide(prs, slide.definition, financial_data, None, images=images)
+
+            with span("open_deck_skeleton", static_slides=len(static_slides)):
+                prs, reusable = skeletons.open(template, fingerprint, static_slides, build_static_slide)
+        else:
+            prs = Presentation(template)
+            reusable = {}
+    splice = bool(reusable)
+    sld_id_lst = prs.slides._sldIdLst
+    available = {h: len(sld_ids) for h, sld_ids in reusable.items()}
+    to_build = set()
+    for i, h in enumerate(hashes):
+        if available.get(h):
+            available[h] -= 1
+        else:
+            to_build.add(i)
+
+    # Tạo thư mục tạm thời để lưu các biểu đồ
+    with tempfile.TemporaryDirectory() as temp_chart_dir:
+        print(f"Temporary directory for charts: {temp_chart_dir}")
+
+        prerendered_charts = {}
+        if chart_workers is not None and chart_backend == "png":
+            sys.stdout.flush()
+            prerendered_charts = prerender_charts(slides, financial_data, temp_chart_dir, chart_workers,
+                                                  chart_cache=chart_cache, indices=to_build)
+
+        ordered_sld_ids = []
+        manifest_slides = []
+        rebuilt = []
+        for i, slide in enumerate(slides):
+            slide_def = slide.definition
+            if i not in to_build:
+                ordered_sld_ids.append(reusable[hashes[i]].pop(0))
+            else:
+                start = time.perf_counter()
+                with span("slide_build", index=i + 1, slide_type=slide_def["slide_type"], title=slide_def["title"]):
+                    added = add_slide(prs, slide_def, financial_data, temp_chart_dir,
+                                      prerendered_chart=prerendered_charts.get(i), chart_cache=chart_cache,
+                                      chart_backend=chart_backend, images=images, series=slide.series)
+                if not added:
+                    continue
+                ordered_sld_ids.append(sld_id_lst.sldId_lst[-1])
+                rebuilt.append((i, slide_def["title"], time.perf_counter() - start))
+            manifest_slides.append({"hash": hashes[i], "title": slide_def["title"]})
+
+        # Sắp xếp lại sldIdLst theo thứ tự mới và bỏ các slide cũ không còn dùng
+        if splice:
+            splice_slides(prs, ordered_sld_ids)
+
+        # Lưu presentation
+        with span("pptx_save", path=output_filename):
+            prs.save(output_filename)
+        save_manifest(output_filename, fingerprint, manifest_slides)
+        print(f"\nPresentation created successfully: {output_filename}")
+        if incremental:
+            print(f"Rebuilt {len(rebuilt)} of {len(manifest_slides)} slide(s):")
+            for i, title, seconds in rebuilt:
+                print(f"  slide {i + 1}: '{title}' ({seconds * 1000:.0f} ms)")
+        if chart_cache is not None:
+            print(chart_cache.summary())
+        if images is not None:
+            print(images.summary())
+        if skeletons is not None:
+            print(skeletons.summary())
+
+
+# --- 5. Dòng lệnh ---
+def main(slide_definitions=None, argv=None):
+    """
+    Dòng lệnh của script dựng báo cáo: đọc tham số (`argv`, mặc định sys.argv), dữ liệu tài chính
+    và build OUTPUT_PPTX_FILENAME; log được ghi vào generation.log.
+    `slide_definitions`: list định nghĩa slide (None: đọc từ SLIDE_DEFINITIONS_PATH lúc build).
+    """
+    parser = argparse.ArgumentParser(description="Tạo file PPTX báo cáo tài chính.")
+    parser.add_argument("--chart-workers", type=int, default=None,
+                        help="Render trước tất cả biểu đồ song song với số process này (0 = theo số CPU).")
+    parser.add_argument("--chart-cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Thư mục cache ảnh biểu đồ giữa các lần build.")
+    parser.add_argument("--chart-cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Dung lượng tối đa của cache biểu đồ (MB), xóa theo LRU khi vượt quá.")
+    parser.add_argument("--no-chart-cache", action="store_true", help="Luôn render lại mọi biểu đồ.")
+    parser.add_argument("--chart-backend", choices=CHART_BACKENDS, default="png",
+                        help="png: ảnh matplotlib 300 dpi; native: biểu đồ PowerPoint gốc.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Chỉ build lại các slide có đầu vào thay đổi so với lần build trước.")
+    parser.add_argument("--trace", nargs="?", const="trace.jsonl", default=os.environ.get(TRACE_ENV),
+                        help="Ghi các span có thời gian (JSONL) vào file này và in bảng tổng hợp khi kết thúc.")
+    parser.add_argument("--image-dpi", type=int, default=DEFAULT_IMAGE_DPI,
+                        help="Thu nhỏ ảnh tĩnh về số pixel/inch này theo kích thước hiển thị (0 = chèn ảnh gốc).")
+    parser.add_argument("--image-cache-dir", default=DEFAULT_IMAGE_CACHE_DIR, help="Thư mục cache ảnh đã xử lý.")
+    parser.add_argument("--template", default=None, help="Template PPTX của doanh nghiệp (mặc định: template trống).")
+    parser.add_argument("--skeleton-cache-dir", default=DEFAULT_SKELETON_CACHE_DIR,
+                        help="Thư mục cache skeleton (các slide tĩnh đã build trên template).")
+    parser.add_argument("--no-skeleton-cache", action="store_true", help="Luôn build lại các slide tĩnh.")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        enable_tracing(args.trace)
+
+    # Ghi các dòng print vào file log (tránh lỗi Unicode trên terminal); file được đóng khi build xong
+    with open(log_file_path, 'w', encoding='utf-8') as log_file, \
+            contextlib.redirect_stdout(log_file), contextlib.redirect_stderr(log_file):
+        # Dữ liệu và định nghĩa slide được đọc khi bắt đầu build, không phải lúc import module
+        financial_data = load_financial_data(FINANCIAL_DATA_PATH)
+        if slide_definitions is None:
+            slide_definitions = runpy.run_path(SLIDE_DEFINITIONS_PATH)["slide_definitions"]
+
+        chart_cache = None
+        if not args.no_chart_cache and args.chart_backend == "png":
+            chart_cache = ChartCache(args.chart_cache_dir, max_bytes=args.chart_cache_max_mb * 1024 * 1024)
+
+        create_presentation(slide_definitions, financial_data, OUTPUT_PPTX_FILENAME,
+                            chart_workers=args.chart_workers, chart_cache=chart_cache, chart_backend=args.chart_backend,
+                            incremental=args.incremental, template=args.template,
+                            images=ImageAssetStage(args.image_cache_dir, dpi=args.image_dpi) if args.image_dpi else None,
+                            skeletons=None if args.no_skeleton_cache else DeckSkeletonCache(args.skeleton_cache_dir))
+
+    if tracing_enabled():
+        print(summary_table())
+        shutdown_tracing()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import math
+import os
+
+MANIFEST_VERSION = 1
+_MANIFEST_SUFFIX = ".manifest.json"
+
+
+def manifest_path(pptx_path):
+    """The manifest lives next to the deck: `report.pptx` -> `report.pptx.manifest.json`."""
+    return pptx_path + _MANIFEST_SUFFIX
+
+
+def file_digest(path):
+    """sha256 of a file's content, or None if it does not exist."""
+    if not path or not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_fingerprint(paths, extra=None):
+    """Hash of the source files (and settings) that decide how a slide is rendered."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update((file_digest(path) or "-").encode("ascii"))
+    digest.update(json.dumps(extra, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def slide_input_hash(slide_definition, resolved_data=None, asset_paths=()):
+    """
+    Hash of everything one slide is built from: its definition, the data values it resolves
+    (NaN encoded as null) and the content of the image assets it embeds.
+    """
+    payload = json.dumps(
+        {
+            "slide_definition": slide_definition,
+            "resolved_data": None if resolved_data is None else [
+                None if math.isnan(value) else float(value) for value in resolved_data
+            ],
+            "assets": {path: file_digest(path) for path in asset_paths},
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_manifest(pptx_path, fingerprint):
+    """
+    Returns the previous run's manifest if it matches the deck on disk (same file content)
+    and the current rendering code `fingerprint`; otherwise None, meaning a full rebuild.
+    """
+    try:
+        with open(manifest_path(pptx_path), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (manifest.get("version") != MANIFEST_VERSION or manifest.get("fingerprint") != fingerprint
+            or manifest.get("deck_sha256") != file_digest(pptx_path)):
+        return None
+    return manifest
+
+
+def save_manifest(pptx_path, fingerprint, slides):
+    """`slides` is the list of {"hash", "title"} of the saved deck, in slide order."""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "fingerprint": fingerprint,
+        "deck_sha256": file_digest(pptx_path),
+        "slides": slides,
+    }
+    tmp_path = manifest_path(pptx_path) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path(pptx_path))
+
+
+def reusable_slides(prs, manifest):
+    """
+    {slide hash: [sldId elements]} of the previous deck, for slides that can be kept as they
+    are. Empty when the deck does not have the slides the manifest describes.
+    """
+    sld_ids = list(prs.slides._sldIdLst.sldId_lst)
+    if len(sld_ids) != len(manifest["slides"]):
+        return {}
+    reusable = {}
+    for sld_id, entry in zip(sld_ids, manifest["slides"]):
+        reusable.setdefault(entry["hash"], []).append(sld_id)
+    return reusable
+
+
+def splice_slides(prs, ordered_sld_ids):
+    """
+    Puts the slides in `ordered_sld_ids` in that order and drops every other slide from the
+    deck, together with its relationship, so its parts (and images or charts only it used)
+    are not written on save.
+
+    `prs` must not have been saved since it was opened: python-pptx caches each relationship's
+    target on save, and the slide parts renamed here would then be written under their old
+    names. Reopen a saved deck from its bytes before splicing it.
+    """
+    sld_id_lst = prs.slides._sldIdLst
+    keep = {id(sld_id) for sld_id in ordered_sld_ids}
+    for sld_id in list(sld_id_lst.sldId_lst):
+        sld_id_lst.remove(sld_id)
+        if id(sld_id) not in keep:
+            prs.part.drop_rel(sld_id.rId)
+    for sld_id in ordered_sld_ids:
+        sld_id_lst.append(sld_id)
+    prs.part.rename_slide_parts([sld_id.rId for sld_id in ordered_sld_ids])
@@ -0,0 +1,112 @@
+import collections
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+from deck_manifest import file_digest
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "skeletons")
+# Skeletons kept in memory per process, so a batch worker building many decks from the same
+# template and static slides reads none of them from disk twice
+DEFAULT_MEMORY_ENTRIES = 8
+
+_SKELETON_SUFFIX = ".pptx"
+
+
+def template_digest(template):
+    """sha256 of a template given as a path or a binary file-like object (rewound afterwards); None for the default."""
+    if template is None:
+        return None
+    if isinstance(template, (str, os.PathLike)):
+        return file_digest(template)
+    position = template.tell()
+    digest = hashlib.sha256(template.read()).hexdigest()
+    template.seek(position)
+    return digest
+
+
+class DeckSkeletonCache:
+    """
+    Decks holding only the static slides (title, section header, bullet slides), built on the
+    template and stored as .pptx keyed by the template content, the rendering fingerprint and
+    the input hashes of those slides. A build opens the skeleton instead of the bare template,
+    so it pays for one package load and builds only the data-bound slides; the static slides
+    are spliced into deck order like the unchanged slides of an incremental build.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, memory_entries=DEFAULT_MEMORY_ENTRIES):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = collections.OrderedDict()
+
+    def key(self, template, fingerprint, slide_hashes):
+        payload = json.dumps({"template": template_digest(template), "fingerprint": fingerprint,
+                              "slides": list(slide_hashes)})
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key):
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            return data
+        path = os.path.join(self.cache_dir, key + _SKELETON_SUFFIX)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def _store(self, key, data):
+        self._remember(key, data)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=_SKELETON_SUFFIX)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.cache_dir, key + _SKELETON_SUFFIX))
+
+    def open(self, template, fingerprint, static_slides, build_slide):
+        """
+        Returns (presentation, {slide hash: [sldId elements]}) with the static slides already in
+        it. `static_slides` is a list of (slide hash, slide); on a miss each is added with
+        `build_slide(prs, slide)` on the template and the result is cached for the next build.
+        """
+        from pptx import Presentation
+
+        hashes = [slide_hash for slide_hash, _ in static_slides]
+        key = self.key(template, fingerprint, hashes)
+        data = self._load(key)
+        if data is not None:
+            self.hits += 1
+            prs = Presentation(io.BytesIO(data))
+        else:
+            self.misses += 1
+            prs = Presentation(template)
+            for _, slide in static_slides:
+                build_slide(prs, slide)
+            buffer = io.BytesIO()
+            prs.save(buffer)
+            data = buffer.getvalue()
+            self._store(key, data)
+            # Saving freezes each relationship's target (python-pptx caches target_ref), so slide
+            # parts renamed by splice_slides would be written under stale names: reopen the bytes
+            prs = Presentation(io.BytesIO(data))
+
+        reusable = {}
+        for slide_hash, sld_id in zip(hashes, prs.slides._sldIdLst.sldId_lst):
+            reusable.setdefault(slide_hash, []).append(sld_id)
+        return prs, reusable
+
+    def summary(self):
+        return f"Deck skeleton cache: {self.hits} hit(s), {self.misses} miss(es)"
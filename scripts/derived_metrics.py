@@ -0,0 +1,441 @@
+import argparse
+import re
+import time
+
+import numpy as np
+
+from metric_store import UNIT_BPS, UNIT_NAMES, UNIT_NUMBER, UNIT_PERCENT, load_metric_store
+
+# Period labels: single quarters ("2Q25"), cumulative periods ("6M25") and full years ("FY24")
+_QUARTER_RE = re.compile(r"^([1-4])Q(\d{2})$")
+_CUMULATIVE_RE = re.compile(r"^(3|6|9|12)M(\d{2})$")
+_FISCAL_YEAR_RE = re.compile(r"^FY(\d{2})$")
+# Shipped comparison columns: "6M25 vs 6M24", "2Q25 vs 1Q25"
+_COMPARISON_RE = re.compile(r"^(\S+) vs (\S+)$")
+
+# Chart transforms: series derived for every period on the chart's x axis
+TRANSFORMS = ("qoq", "yoy", "change", "ltm", "cagr")
+
+# Rounding of the shipped comparisons themselves (growth to 0.1%, deltas in whole bps). A derived
+# value also carries the rounding of its inputs: two ratios shown to 0.1% give a delta only good
+# to +-10 bps. A mismatch is a shipped value outside both
+GROWTH_TOLERANCE = 0.05
+BPS_TOLERANCE = 0.5
+# Most decimals looked for when inferring the precision a value is shown with
+_MAX_DECIMALS = 4
+
+
+def parse_period(label):
+    """(index of the period's last quarter, length in quarters) of a period label, or None."""
+    match = _QUARTER_RE.match(label)
+    if match:
+        return int(match.group(2)) * 4 + int(match.group(1)) - 1, 1
+    match = _CUMULATIVE_RE.match(label)
+    if match:
+        quarters = int(match.group(1)) // 3
+        return int(match.group(2)) * 4 + quarters - 1, quarters
+    match = _FISCAL_YEAR_RE.match(label)
+    if match:
+        return int(match.group(1)) * 4 + 3, 4
+    return None
+
+
+def shift_period(label, quarters):
+    """
+    The label of the period `quarters` quarters before (negative) or after `label`, e.g.
+    shift_period("2Q25", -1) == "1Q25". Cumulative periods only shift by whole years.
+    """
+    parsed = parse_period(label)
+    if parsed is None:
+        return None
+    end, length = parsed
+    end += quarters
+    if end < 0:
+        return None
+    year = end // 4
+    if _QUARTER_RE.match(label):
+        return f"{end % 4 + 1}Q{year:02d}"
+    if quarters % 4:
+        return None
+    return f"FY{year:02d}" if label.startswith("FY") else f"{length * 3}M{year:02d}"
+
+
+def _row_units(values, units):
+    """The unit of each row: the most common unit among its non-blank cells."""
+    present = ~np.isnan(values)
+    counts = np.stack([((units == unit) & present).sum(axis=1) for unit in range(len(UNIT_NAMES))])
+    return counts.argmax(axis=0).astype(np.int8)
+
+
+def half_units(values, groups):
+    """
+    Half a unit in the last decimal each value is shown with (1.28 -> 0.005, 1,037,645 -> 0.5).
+    Decimals are inferred from the digits, so a trailing zero ("101.0%") is lost; each cell takes
+    the finest precision found in its row among the columns of the same group (quarters, others).
+    """
+    inferred = np.full(values.shape, np.inf)
+    for decimals in range(_MAX_DECIMALS, -1, -1):
+        scaled = np.abs(values) * 10.0 ** decimals
+        with np.errstate(invalid="ignore"):
+            shown = np.abs(scaled - np.round(scaled)) < 1e-6
+        inferred[shown] = 0.5 * 10.0 ** -decimals
+    result = np.empty_like(inferred)
+    for group in np.unique(groups):
+        columns = groups == group
+        finest = inferred[:, columns].min(axis=1, keepdims=True)
+        result[:, columns] = np.where(np.isinf(finest), 0.0, finest)
+    return result
+
+
+def comparison_error(current, base, current_half, base_half, row_units):
+    """
+    Largest error the rounding of `current` and `base` (half units `current_half`, `base_half`)
+    can put in compare_values' result, in its units: bps for deltas, percent for growth.
+    """
+    row_units = row_units.reshape((-1,) + (1,) * (current.ndim - 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = 100 * (current_half / np.abs(base) + np.abs(current) * base_half / base ** 2)
+    delta = current_half + base_half
+    return np.where(row_units == UNIT_NUMBER, growth, np.where(row_units == UNIT_PERCENT, delta * 100, delta))
+
+
+def compare_values(current, base, row_units):
+    """
+    Change from `base` to `current` (arrays of the same shape, rows along axis 0): growth in
+    percent for amounts, a delta in bps for ratios and bps metrics. Returns (values, unit codes).
+    """
+    row_units = row_units.reshape((-1,) + (1,) * (current.ndim - 1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = np.where(base != 0, (current / base - 1) * 100, np.nan)
+    delta = current - base
+    values = np.where(row_units == UNIT_NUMBER, growth, np.where(row_units == UNIT_PERCENT, delta * 100, delta))
+    units = np.broadcast_to(np.where(row_units == UNIT_NUMBER, UNIT_PERCENT, UNIT_BPS), values.shape)
+    return values, units.astype(np.int8)
+
+
+class DerivedMetrics:
+    """
+    Growth rates, bps deltas, rolling LTM sums and CAGR for any pair of periods, over every
+    metric of the selected tables at once.
+
+    All (table, metric) rows are stacked into one float64 matrix with a column per period label
+    found in the tables, so each operation is a handful of NumPy expressions over all rows,
+    however many banks and years the store holds. Single quarters are also laid out on a
+    contiguous quarter axis (gaps are NaN) for the rolling sums.
+
+    Rows are told apart as stocks (a cumulative column repeats its period-end quarter, e.g.
+    Total assets or NPL) and flows (a cumulative column sums its quarters, e.g. Net interest
+    income). A stock's cumulative cells take the period-end quarter's value, which the tables
+    show with more decimals, and LTM is the period-end value for stocks and the four-quarter
+    sum for flows only.
+    """
+
+    def __init__(self, store, titles=None):
+        titles = list(store.tables) if titles is None else list(titles)
+        tables = [store.tables[title] for title in titles]
+
+        labels = {}
+        for table in tables:
+            for period in table.periods:
+                parsed = parse_period(period)
+                if parsed is not None:
+                    labels[period] = parsed
+        self.periods = tuple(sorted(labels, key=lambda label: (labels[label][0], labels[label][1])))
+        self._column = {period: k for k, period in enumerate(self.periods)}
+
+        self.tables = {}
+        self._offsets = {}
+        row_count = sum(len(table.metrics) for table in tables)
+        self.values = np.full((row_count, len(self.periods)), np.nan)
+        units = np.zeros((row_count, len(self.periods)), dtype=np.int8)
+        offset = 0
+        for table in tables:
+            source = [j for j, period in enumerate(table.periods) if period in self._column]
+            target = [self._column[table.periods[j]] for j in source]
+            rows = slice(offset, offset + len(table.metrics))
+            self.values[rows, target] = table.values[:, source]
+            units[rows, target] = table.units[:, source]
+            self.tables[table.title] = table
+            self._offsets[table.title] = offset
+            offset += len(table.metrics)
+        self.units = _row_units(self.values, units)
+
+        quarters = [(labels[period][0], k) for k, period in enumerate(self.periods) if _QUARTER_RE.match(period)]
+        self._first_quarter = min((end for end, _ in quarters), default=0)
+        quarter_count = max((end for end, _ in quarters), default=-1) - self._first_quarter + 1
+        self._quarterly = np.full((row_count, quarter_count), np.nan)
+        for end, k in quarters:
+            self._quarterly[:, end - self._first_quarter] = self.values[:, k]
+        is_quarter = np.zeros(len(self.periods), dtype=bool)
+        is_quarter[[k for _, k in quarters]] = True
+        self.half_units = half_units(self.values, is_quarter)
+        self._quarter_half = self.half_units[:, is_quarter].min(axis=1) if quarters else np.zeros(row_count)
+        self.stocks, self.flows = self._classify_rows(labels)
+        self._ltm = None
+
+    def _classify_rows(self, labels):
+        """
+        (stock mask, flow mask) of the rows. Every cumulative cell is compared, within the tables'
+        display rounding, with its period-end quarter and, if all its quarters are present, with
+        their sum: a row is a stock if every cell tested matches the period end, a flow if every
+        cell tested matches the sum, and neither if both or none hold. A single-quarter cumulative
+        column ("3M25") is the quarter itself and takes the quarter's value whatever the row.
+        """
+        rows = len(self.values)
+        end_half = self._quarter_half
+        end_tested = np.zeros(rows, dtype=np.intp)
+        end_matches = np.zeros(rows, dtype=np.intp)
+        sum_tested = np.zeros(rows, dtype=np.intp)
+        sum_matches = np.zeros(rows, dtype=np.intp)
+        period_end = {}
+        for k, period in enumerate(self.periods):
+            if _QUARTER_RE.match(period):
+                continue
+            end, length = labels[period]
+            last = end - self._first_quarter
+            if not 0 <= last < self._quarterly.shape[1]:
+                continue
+            cumulative = self.values[:, k]
+            end_values = period_end[k] = self._quarterly[:, last]
+            if length == 1:
+                present = ~np.isnan(end_values)
+                self.values[present, k] = end_values[present]
+                self.half_units[present, k] = end_half[present]
+                continue
+            # The coarser of the two is the other rounded, so they agree to its precision
+            with np.errstate(invalid="ignore"):
+                present = ~np.isnan(cumulative) & ~np.isnan(end_values)
+                end_tested += present
+                end_matches += present & (np.abs(cumulative - end_values)
+                                          <= np.maximum(self.half_units[:, k], end_half) + 1e-9)
+                if last - length + 1 >= 0:
+                    # NaN when a quarter is missing, so the cell is not tested
+                    totals = self._quarterly[:, last - length + 1:last + 1].sum(axis=1)
+                    present = ~np.isnan(cumulative) & ~np.isnan(totals) & (self.units == UNIT_NUMBER)
+                    sum_tested += present
+                    sum_matches += present & (np.abs(cumulative - totals)
+                                              <= self.half_units[:, k] + end_half * length + 1e-9)
+
+        all_end = (end_tested > 0) & (end_matches == end_tested)
+        all_sum = (sum_tested > 0) & (sum_matches == sum_tested)
+        stocks = all_end & ~all_sum
+        flows = all_sum & ~all_end
+        for k, end_values in period_end.items():
+            replace = stocks & ~np.isnan(end_values)
+            self.values[replace, k] = end_values[replace]
+            self.half_units[replace, k] = end_half[replace]
+        return stocks, flows
+
+    def __len__(self):
+        return len(self.values)
+
+    def row(self, title, metric):
+        """Row of (table, metric) in the stacked matrix, or None."""
+        table = self.tables.get(title)
+        if table is None:
+            return None
+        i = table.metric_row(metric)
+        return None if i is None else self._offsets[title] + i
+
+    def column(self, period):
+        return self._column.get(period)
+
+    def _columns(self, periods):
+        """Column index of each period (-1 if absent) and the mask of those present."""
+        columns = np.array([self._column.get(period, -1) for period in periods], dtype=np.intp)
+        return columns, columns >= 0
+
+    def _gather(self, matrix, rows, columns, present):
+        block = matrix[rows][:, np.where(present, columns, 0)]
+        block[:, ~present] = np.nan
+        return block
+
+    def compare(self, periods, bases, rows=slice(None)):
+        """
+        Change of every metric from each period in `bases` to the matching one in `periods`:
+        growth (%) for amounts, bps for ratios. Returns (values, unit codes), one column per pair.
+        """
+        columns, present = self._columns(periods)
+        base_columns, base_present = self._columns(bases)
+        current = self._gather(self.values, rows, columns, present)
+        base = self._gather(self.values, rows, base_columns, base_present)
+        return compare_values(current, base, self.units[rows])
+
+    def qoq(self, periods, rows=slice(None)):
+        """Change against the previous quarter."""
+        return self.compare(periods, [shift_period(period, -1) for period in periods], rows)
+
+    def yoy(self, periods, rows=slice(None)):
+        """Change against the same period a year earlier (quarters and cumulative periods)."""
+        return self.compare(periods, [shift_period(period, -4) for period in periods], rows)
+
+    def ltm_matrix(self):
+        """
+        LTM over the quarter axis: the rolling four-quarter sum for flows (NaN until four quarters
+        exist), the quarter's own value for stocks, NaN for rows that are neither.
+        """
+        if self._ltm is None:
+            self._ltm = np.full_like(self._quarterly, np.nan)
+            if self._quarterly.shape[1] >= 4:
+                windows = np.lib.stride_tricks.sliding_window_view(self._quarterly, 4, axis=1)
+                self._ltm[:, 3:] = windows.sum(axis=2)
+            self._ltm[~self.flows] = np.nan
+            self._ltm[self.stocks] = self._quarterly[self.stocks]
+        return self._ltm
+
+    def ltm(self, periods, rows=slice(None)):
+        """LTM value at each period (single quarters only), see ltm_matrix."""
+        ltm = self.ltm_matrix()
+        columns = np.array([parse_period(period)[0] - self._first_quarter
+                            if _QUARTER_RE.match(period) else -1
+                            for period in periods], dtype=np.intp)
+        present = (columns >= 0) & (columns < ltm.shape[1])
+        return self._gather(ltm, rows, columns, present)
+
+    def cagr(self, periods, bases, rows=slice(None)):
+        """Compound annual growth rate (%) from each base to the matching period; amounts with positive values only."""
+        columns, present = self._columns(periods)
+        base_columns, base_present = self._columns(bases)
+        current = self._gather(self.values, rows, columns, present)
+        base = self._gather(self.values, rows, base_columns, base_present)
+        years = np.array([(parse_period(period)[0] - parse_period(base_period)[0]) / 4
+                          if ok and base_ok else np.nan
+                          for period, base_period, ok, base_ok in zip(periods, bases, present, base_present)])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = current / base
+            result = np.where((ratio > 0) & (years > 0), (ratio ** (1 / years) - 1) * 100, np.nan)
+        result[self.units[rows] != UNIT_NUMBER] = np.nan
+        return result
+
+    def series(self, title, metric, periods, transform, base_period=None):
+        """
+        One metric's derived series over `periods` (a chart's x axis), or None if the table or
+        metric is unknown. `transform` is one of TRANSFORMS; "change" and "cagr" measure every
+        period against `base_period`.
+        """
+        if transform not in TRANSFORMS:
+            raise ValueError(f"Unknown transform '{transform}', expected one of {', '.join(TRANSFORMS)}")
+        if transform in ("change", "cagr") and not base_period:
+            raise ValueError(f"Transform '{transform}' needs a base_period")
+        row = self.row(title, metric)
+        if row is None:
+            return None
+        rows = slice(row, row + 1)
+        if transform == "qoq":
+            values, _ = self.qoq(periods, rows)
+        elif transform == "yoy":
+            values, _ = self.yoy(periods, rows)
+        elif transform == "change":
+            values, _ = self.compare(periods, [base_period] * len(periods), rows)
+        elif transform == "ltm":
+            values = self.ltm(periods, rows)
+        else:
+            values = self.cagr(periods, [base_period] * len(periods), rows)
+        return values[0]
+
+    def cross_check(self, growth_tolerance=GROWTH_TOLERANCE, bps_tolerance=BPS_TOLERANCE):
+        """
+        Recomputes every shipped "X vs Y" comparison column from the X and Y columns of its table.
+        A shipped value is a mismatch if it is further from the derived one than the rounding of
+        the inputs (comparison_error) plus the shipped value's own rounding (the tolerances) allows.
+        Returns (number of cells checked, [mismatches]); a mismatch is a dict with the table,
+        metric, column, shipped and derived values and their units.
+        """
+        checked = 0
+        mismatches = []
+        for title, table in self.tables.items():
+            pairs = [(j, match.groups()) for j, match in
+                     ((j, _COMPARISON_RE.match(period)) for j, period in enumerate(table.periods)) if match]
+            pairs = [(j, periods) for j, periods in pairs if all(period in self._column for period in periods)]
+            if not pairs or not table.metrics:
+                continue
+            offset = self._offsets[title]
+            rows = slice(offset, offset + len(table.metrics))
+            comparison_columns = [j for j, _ in pairs]
+            current_periods = [periods[0] for _, periods in pairs]
+            base_periods = [periods[1] for _, periods in pairs]
+            derived, derived_units = self.compare(current_periods, base_periods, rows)
+            columns, present = self._columns(current_periods)
+            base_columns, base_present = self._columns(base_periods)
+            error = comparison_error(self._gather(self.values, rows, columns, present),
+                                     self._gather(self.values, rows, base_columns, base_present),
+                                     self._gather(self.half_units, rows, columns, present),
+                                     self._gather(self.half_units, rows, base_columns, base_present),
+                                     self.units[rows])
+            shipped = table.values[:, comparison_columns]
+            shipped_units = table.units[:, comparison_columns]
+
+            both = ~np.isnan(derived) & ~np.isnan(shipped)
+            tolerance = error + np.where(derived_units == UNIT_BPS, bps_tolerance, growth_tolerance)
+            mismatch = both & ((np.abs(derived - shipped) > tolerance + 1e-9) | (derived_units != shipped_units))
+            checked += int(both.sum())
+            for i, k in zip(*np.nonzero(mismatch)):
+                mismatches.append({
+                    "table": title,
+                    "metric": table.metrics[i],
+                    "column": table.periods[comparison_columns[k]],
+                    "shipped": float(shipped[i, k]),
+                    "shipped_unit": UNIT_NAMES[shipped_units[i, k]],
+                    "derived": round(float(derived[i, k]), 4),
+                    "derived_unit": UNIT_NAMES[derived_units[i, k]],
+                })
+        return checked, mismatches
+
+
+def chart_series(store, chart_definition):
+    """
+    The series a chart definition plots: the raw values of `data_key` over `x_axis_keys`, or with
+    a `transform` (and `base_period` for "change"/"cagr") the derived series. None if not found.
+    """
+    title = chart_definition["data_source_title"]
+    transform = chart_definition.get("transform")
+    if not transform:
+        return store.series(title, chart_definition["data_key"], chart_definition["x_axis_keys"])
+    derived = store.derived(title)
+    if derived is None:
+        return None
+    return derived.series(title, chart_definition["data_key"], chart_definition["x_axis_keys"], transform,
+                          chart_definition.get("base_period"))
+
+
+def _format(value, unit):
+    if unit == "bps":
+        return f"{value:+,.0f} bps"
+    if unit == "percent":
+        return f"{value:.1f}%"
+    return f"{value:,.0f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Cross-check the shipped comparison columns, or derive a comparison for every metric.")
+    parser.add_argument("inputs", nargs="+", help="Financial highlights JSON or binary files.")
+    parser.add_argument("--compare", nargs=2, metavar=("PERIOD", "BASE"),
+                        help="Print the change from BASE to PERIOD for every metric, e.g. --compare 2Q25 2Q24.")
+    args = parser.parse_args()
+
+    store = load_metric_store(*args.inputs)
+    start = time.perf_counter()
+    derived = DerivedMetrics(store)
+    built = time.perf_counter() - start
+    print(f"Stacked {len(derived)} metric row(s) x {len(derived.periods)} period(s) "
+          f"from {len(derived.tables)} table(s) in {built * 1000:.1f} ms")
+
+    if args.compare:
+        values, units = derived.compare([args.compare[0]], [args.compare[1]])
+        for title, table in derived.tables.items():
+            offset = derived._offsets[title]
+            print(f"\n{title}: {args.compare[0]} vs {args.compare[1]}")
+            for i, metric in enumerate(table.metrics):
+                value = values[offset + i, 0]
+                if not np.isnan(value):
+                    print(f"  {metric}: {_format(value, UNIT_NAMES[units[offset + i, 0]])}")
+    else:
+        start = time.perf_counter()
+        checked, mismatches = derived.cross_check()
+        for mismatch in mismatches:
+            print(f"Mismatch in '{mismatch['table']}' / {mismatch['metric']} / {mismatch['column']}: shipped "
+                  f"{_format(mismatch['shipped'], mismatch['shipped_unit'])}, derived "
+                  f"{_format(mismatch['derived'], mismatch['derived_unit'])}")
+        print(f"Cross-checked {checked} shipped comparison value(s): {len(mismatches)} mismatch(es) "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
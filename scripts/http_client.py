@@ -0,0 +1,161 @@
+import asyncio
+import collections
+import email.utils
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_BASE = "https://api.thucchien.ai/v1"
+DEFAULT_TIMEOUT = (10, 180)
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30
+DEFAULT_POOL_SIZE = 10
+
+# Retry-After values above this are not waited out: the response is returned as is
+MAX_RETRY_AFTER = 120
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+RequestTiming = collections.namedtuple(
+    "RequestTiming", ["method", "url", "status", "attempts", "elapsed_s", "wait_s"]
+)
+
+
+def api_settings():
+    """
+    Returns (base URL, API key) of the AI API. `API_BASE_URL`/`API_KEY` take precedence;
+    the older `AI_API_BASE`/`AI_API_KEY` names are still accepted.
+    """
+    base_url = os.getenv("API_BASE_URL") or os.getenv("AI_API_BASE") or DEFAULT_API_BASE
+    api_key = os.getenv("API_KEY") or os.getenv("AI_API_KEY")
+    return base_url.rstrip("/"), api_key
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class HttpClient:
+    """
+    requests.Session with a keep-alive connection pool, retries with exponential backoff
+    and full jitter on 429/5xx and connection errors (honouring Retry-After), and a timing
+    record per request.
+    The `a*` methods are not a real async client: each call runs the blocking `request` in
+    asyncio's default thread pool, holding one thread (shared Session and connection pool) for
+    the whole call including its backoff sleeps. Concurrency is therefore capped by the pool size
+    (min(32, CPUs + 4) threads), and cancelling the awaiting task does not stop the request.
+    Callers bound their fan-out with a semaphore well below that (crawler.py, slide_codegen.py).
+    """
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES, backoff_base=DEFAULT_BACKOFF_BASE,
+                 backoff_max=DEFAULT_BACKOFF_MAX, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 headers=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.timings = collections.deque(maxlen=1000)
+
+        self.session = requests.Session()
+        # Retries are handled here rather than by urllib3 so that timing and Retry-After caps stay in one place
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, method, url, **kwargs):
+        """
+        Sends a request, retrying transient failures. Returns the final response (which may
+        still be an error status once retries are exhausted); its timing is in `response.timing`.
+        Connection errors are re-raised after the last attempt.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        start = time.perf_counter()
+        waited = 0.0
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.ConnectionError:
+                # Includes connect timeouts; read timeouts are not retried since the server may have acted
+                if attempt > self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt > self.max_retries:
+                    break
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+                    break
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                response.close()
+            time.sleep(delay)
+            waited += delay
+
+        timing = RequestTiming(method.upper(), url, response.status_code, attempt,
+                               round(time.perf_counter() - start, 4), round(waited, 4))
+        response.timing = timing
+        self.timings.append(timing)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    async def arequest(self, method, url, **kwargs):
+        return await asyncio.to_thread(self.request, method, url, **kwargs)
+
+    async def aget(self, url, **kwargs):
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apost(self, url, **kwargs):
+        return await self.arequest("POST", url, **kwargs)
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_client():
+    """Process-wide HttpClient, so repeated calls in one run reuse pooled connections."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
+
+
+def describe_timing(timing):
+    retries = f", {timing.attempts - 1} retr{'y' if timing.attempts == 2 else 'ies'}" if timing.attempts > 1 else ""
+    return f"{timing.method} {timing.url} -> {timing.status} in {timing.elapsed_s:.2f}s{retries}"
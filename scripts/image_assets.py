@@ -0,0 +1,133 @@
+import hashlib
+import math
+import os
+import tempfile
+
+from deck_manifest import file_digest
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "images")
+# Pixels per inch of display size; PowerPoint's own "HD" picture compression uses 220
+DEFAULT_IMAGE_DPI = 220
+JPEG_QUALITY = 85
+
+_JPEG_FORMATS = {"JPEG", "MPO"}
+
+
+def image_settings(dpi):
+    """Settings that decide how an image is prepared, part of every cache key."""
+    import PIL
+    return {"dpi": dpi, "jpeg_quality": JPEG_QUALITY, "pillow": PIL.__version__}
+
+
+def _target_size(size, display_height_in, dpi):
+    """Pixel size for an image shown `display_height_in` inches high; never upscales."""
+    width, height = size
+    target_height = math.ceil(display_height_in * dpi)
+    if target_height >= height:
+        return size
+    return max(1, round(width * target_height / height)), target_height
+
+
+def _prepare(source_path, output_path, display_height_in, dpi):
+    """Downsamples and recompresses one image in its own format (JPEG stays JPEG, PNG keeps transparency)."""
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as image:
+        image_format = image.format
+        # Bake the EXIF orientation into the pixels: the metadata is not kept
+        image = ImageOps.exif_transpose(image)
+        target = _target_size(image.size, display_height_in, dpi)
+        if target != image.size:
+            image = image.resize(target, Image.LANCZOS)
+        if image_format in _JPEG_FORMATS:
+            if image.mode not in ("RGB", "L", "CMYK"):
+                image = image.convert("RGB")
+            image.save(output_path, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        else:
+            image.save(output_path, "PNG", optimize=True)
+
+
+class ImageAssetStage:
+    """
+    Prepares the pictures of a deck before they are embedded: each image is downsampled to the
+    largest height it is displayed at in the deck and recompressed. Results are stored in an
+    on-disk cache keyed by the source content hash and the target size, so a logo used by many
+    slides and decks is prepared once. A prepared image is only used when it is smaller than
+    the source. Every path with the same content maps to one file, and python-pptx
+    de-duplicates image parts by content, so each image is embedded once per package.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, dpi=DEFAULT_IMAGE_DPI):
+        self.cache_dir = cache_dir
+        self.dpi = dpi
+        self.prepared = 0
+        self.cache_hits = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self._paths = {}
+
+    def prepare(self, display_heights):
+        """
+        `display_heights` maps each image path to the heights (inches) it is shown at.
+        Paths with identical content share one prepared image, sized for the largest of their
+        heights. Missing files are left out. Returns {source path: path to embed}.
+        """
+        by_digest = {}
+        for path, heights in display_heights.items():
+            if path in self._paths or not os.path.exists(path):
+                continue
+            digest = file_digest(path)
+            paths, largest = by_digest.get(digest, ([], 0))
+            by_digest[digest] = (paths + [path], max(largest, *heights))
+        for digest, (paths, display_height_in) in by_digest.items():
+            result = self._prepare_one(paths[0], digest, display_height_in)
+            self.bytes_before += os.path.getsize(paths[0])
+            self.bytes_after += os.path.getsize(result)
+            for path in paths:
+                self._paths[path] = result
+        return dict(self._paths)
+
+    def path_for(self, path):
+        """The path to embed for `path`: its prepared version if `prepare` made one, else the path itself."""
+        return self._paths.get(path, path)
+
+    def _prepare_one(self, path, digest, display_height_in):
+        from PIL import Image
+
+        try:
+            with Image.open(path) as image:
+                size, image_format = image.size, image.format
+        except OSError:
+            return path
+        key_payload = f"{digest}:{_target_size(size, display_height_in, self.dpi)}:{sorted(image_settings(self.dpi).items())}"
+        key = hashlib.sha256(key_payload.encode("utf-8")).hexdigest()
+        extension = ".jpg" if image_format in _JPEG_FORMATS else ".png"
+        cached_path = os.path.join(self.cache_dir, key[:2], key + extension)
+        # Marks that recompressing did not make this image smaller, so the source is embedded
+        kept_marker = cached_path + ".source"
+
+        if os.path.exists(cached_path) or os.path.exists(kept_marker):
+            self.cache_hits += 1
+        else:
+            os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cached_path), suffix=extension)
+            os.close(fd)
+            try:
+                _prepare(path, tmp_path, display_height_in, self.dpi)
+                if os.path.getsize(tmp_path) < os.path.getsize(path):
+                    os.replace(tmp_path, cached_path)
+                else:
+                    os.remove(tmp_path)
+                    open(kept_marker, "w").close()
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return path
+            self.prepared += 1
+        return cached_path if os.path.exists(cached_path) else path
+
+    def summary(self):
+        saved = self.bytes_before - self.bytes_after
+        return (f"Images: {self.prepared + self.cache_hits} distinct ({self.prepared} prepared, {self.cache_hits} from cache), "
+                f"{self.bytes_before / 1024:.0f} KB -> {self.bytes_after / 1024:.0f} KB, saved {saved / 1024:.0f} KB")
+
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_responses.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Request fields that change how the response is delivered, not what it contains
+_TRANSPORT_FIELDS = ("stream", "stream_options", "user")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+def request_cache_key(payload):
+    """
+    Hash of a /chat/completions request body: model, messages and every sampling
+    parameter (temperature, top_p, max_tokens, ...), ignoring transport-only fields.
+    """
+    material = {k: v for k, v in payload.items() if k not in _TRANSPORT_FIELDS}
+    encoded = json.dumps(material, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Local SQLite cache of chat-completion responses with a TTL, an entry/size cap and
+    least-recently-used eviction.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The generators may call the model from a worker thread (chart prewarm); calls never overlap
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def get(self, payload):
+        """Returns the cached response JSON for `payload`, or None on a miss or expired entry."""
+        key = request_cache_key(payload)
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or now - row[1] > self.ttl_seconds:
+            if row is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.misses += 1
+            return None
+
+        with self._conn:
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, payload, response):
+        """Stores a response JSON and evicts entries over the TTL or size limits."""
+        key = request_cache_key(payload)
+        encoded = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, payload.get("model"), encoded, len(encoded.encode("utf-8")), now, now),
+            )
+        self.evict()
+
+    def delete(self, payload):
+        """Drops the response cached for `payload`, e.g. once it turned out unusable."""
+        with self._conn:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (request_cache_key(payload),))
+
+    def evict(self):
+        """Drops expired entries, then the least recently used ones until under both caps."""
+        with self._conn:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            if count <= self.max_entries and total <= self.max_bytes:
+                return
+            for key, size in self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access ASC"
+            ).fetchall():
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                count -= 1
+                total -= size
+
+    def summary(self):
+        return f"LLM response cache: {self.hits} hit(s), {self.misses} miss(es)"
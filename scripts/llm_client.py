@@ -0,0 +1,102 @@
+import json
+import os
+
+from dotenv import load_dotenv
+
+from http_client import api_settings, describe_timing, get_client
+from llm_cache import LLMResponseCache
+from llm_stream import DEFAULT_STALL_TIMEOUT, completion_from_stream, record_metrics, stream_chat_completion
+from prompt_builder import log_token_usage
+from tracing import span
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+
+def chat_endpoint():
+    """
+    (url, headers) of the chat completions API, from API_BASE_URL/API_KEY (falling back to the
+    older AI_API_BASE/AI_API_KEY, also read from .env). None, after printing an error, when the
+    key is missing.
+    """
+    load_dotenv()
+    api_base, api_key = api_settings()
+    if not api_key:
+        print("Error: API_KEY not found. Please set it in a .env file.")
+        return None
+    return f"{api_base}/chat/completions", {"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"}
+
+
+class ChatClient:
+    """
+    Chat completions for a generator: a request seen before is served from the local response
+    cache (unless `use_cache` is False); others are posted, or, when `stream_path` is set, streamed
+    over SSE with the code previewed in `<stream_path>.part` (never in `stream_path` itself: the
+    caller saves a script only once it passed the code gate; the preview is removed on close unless
+    the last stream failed, when it is kept for debugging). Token usage is logged for every call.
+    A new response is only cached once the caller `accept`s it (it passed the gate and ran), and
+    `reject` deletes a cached one that did not, so a bad answer is not replayed until it expires.
+    `last_result` keeps the last raw response, for error messages.
+    """
+
+    def __init__(self, url, headers, model=DEFAULT_MODEL, use_cache=True, stream_path=None,
+                 stall_timeout=DEFAULT_STALL_TIMEOUT, label="generate_script"):
+        self.url = url
+        self.headers = headers
+        self.model = model
+        self.stream_path = stream_path
+        self.stall_timeout = stall_timeout
+        self.label = label
+        self.cache = LLMResponseCache() if use_cache else None
+        self.last_result = None
+        self._last_request = None
+        self._last_from_cache = False
+        self._keep_partial = False
+
+    def complete(self, messages):
+        """The content of the model's answer to `messages`."""
+        data = {"model": self.model, "messages": messages}
+        self.last_result = self.cache.get(data) if self.cache else None
+        from_cache = self.last_result is not None
+        if from_cache:
+            print("Loaded the AI response from the local cache.")
+        else:
+            print("Generating presentation script via AI...")
+            stream = self.stream_path is not None
+            with span("llm_request", model=self.model, stream=stream):
+                if stream:
+                    # Set until the stream completes: a stalled or cut-off answer stays in the .part file
+                    self._keep_partial = True
+                    text, metrics = stream_chat_completion(self.url, self.headers, data, self.stream_path,
+                                                           stall_timeout=self.stall_timeout)
+                    self._keep_partial = False
+                    record_metrics(metrics)
+                    self.last_result = completion_from_stream(text, metrics)
+                else:
+                    response = get_client().post(self.url, headers=self.headers, data=json.dumps(data))
+                    print(describe_timing(response.timing))
+                    response.raise_for_status()
+                    self.last_result = response.json()
+
+        log_token_usage(self.label, data, self.last_result, from_cache)
+        self._last_request = data
+        self._last_from_cache = from_cache
+        return self.last_result["choices"][0]["message"]["content"]
+
+    def accept(self):
+        """Caches the last response, now that the caller has judged it usable."""
+        if self.cache and self._last_request is not None and not self._last_from_cache:
+            self.cache.put(self._last_request, self.last_result)
+        self._last_request = None
+
+    def reject(self):
+        """Forgets the last response; one served from the cache is deleted from it."""
+        if self.cache and self._last_request is not None and self._last_from_cache:
+            self.cache.delete(self._last_request)
+            print("Deleted the rejected AI response from the local cache.")
+        self._last_request = None
+
+    def close(self):
+        if self.cache:
+            self.cache.close()
+        if self.stream_path and not self._keep_partial and os.path.exists(self.stream_path + ".part"):
+            os.remove(self.stream_path + ".part")
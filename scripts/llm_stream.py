@@ -0,0 +1,194 @@
+import json
+import time
+
+import requests
+
+from http_client import get_client
+
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_STALL_TIMEOUT = 30
+DEFAULT_TOTAL_TIMEOUT = 180
+
+# Each streamed run appends one JSON line with its latency metrics
+METRICS_LOG_PATH = "llm_metrics.jsonl"
+
+_OPENING_FENCE = "```python"
+_CLOSING_FENCE = "```"
+
+
+class StreamStalledError(Exception):
+    """Raised when a streamed completion stops producing tokens for too long."""
+
+
+class StreamIncompleteError(StreamStalledError):
+    """Raised when a streamed answer opens a code fence and ends without closing it."""
+
+
+class FencedCodeWriter:
+    """
+    Writes a streamed ```python fenced answer to disk as the text arrives.
+    The opening fence is dropped and the last few characters are held back until the
+    stream ends, so a closing fence is never written; this matches how the blocking
+    path strips the fence from the full response. Text only ever goes to `<path>.part`:
+    `path` is left alone, the caller writes the script there once it passed the code gate.
+    When the stream is aborted, everything received so far is kept in `<path>.part` for debugging.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.part_path = path + ".part"
+        self._file = open(self.part_path, "w", encoding="utf-8")
+        self._head = ""
+        self._head_done = False
+        self._fenced = False
+        self._tail = ""
+
+    def write(self, text):
+        if not self._head_done:
+            self._head += text
+            if len(self._head) < len(_OPENING_FENCE):
+                return
+            text, self._head = self._head, ""
+            if text.startswith(_OPENING_FENCE):
+                text = text[len(_OPENING_FENCE):]
+                self._fenced = True
+            self._head_done = True
+
+        text = self._tail + text
+        # Room for the closing fence and the line break(s) after it
+        keep = len(_CLOSING_FENCE) + 2
+        self._file.write(text[:-keep])
+        self._file.flush()
+        self._tail = text[-keep:]
+
+    def close(self):
+        """
+        Flushes the held-back text. An answer whose code fence was opened but never closed
+        was cut off: the partial file is kept and StreamIncompleteError raised.
+        """
+        text = self._head + self._tail
+        if text.startswith(_OPENING_FENCE):
+            text = text[len(_OPENING_FENCE):]
+            self._fenced = True
+        closed = text.rstrip().endswith(_CLOSING_FENCE)
+        if closed:
+            text = text.rstrip()[:-len(_CLOSING_FENCE)]
+        self._file.write(text)
+        self._file.close()
+        if self._fenced and not closed:
+            raise StreamIncompleteError("The streamed answer ended inside its code block")
+
+    def abort(self):
+        """Writes out the held-back text as received and closes `<path>.part`, leaving it for inspection."""
+        if not self._file.closed:
+            self._file.write(self._head + self._tail)
+            self._head = self._tail = ""
+            self._file.close()
+
+
+def _iter_sse_data(response):
+    """Yields the payload of each `data:` line of a server-sent event stream."""
+    for raw_line in response.iter_lines(chunk_size=None):
+        if not raw_line:
+            continue
+        line = raw_line.decode("utf-8")
+        if line.startswith("data:"):
+            yield line[5:].strip()
+        else:
+            # Comments (": keep-alive") and other fields carry no tokens
+            yield None
+
+
+def stream_chat_completion(url, headers, payload, output_path, stall_timeout=DEFAULT_STALL_TIMEOUT,
+                           total_timeout=DEFAULT_TOTAL_TIMEOUT, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                           session=None):
+    """
+    Streams a /chat/completions response over SSE, writing the fenced code to `<output_path>.part`
+    as it arrives; `output_path` itself is not touched. Aborts with StreamStalledError when no
+    token arrives for `stall_timeout` seconds (keep-alive comments do not count), or when the
+    whole stream exceeds `total_timeout`, and with StreamIncompleteError when the answer ends
+    inside its code block; on any error the code received so far stays in `<output_path>.part`.
+    Returns (full response text, metrics) where metrics holds time-to-first-token,
+    tokens/sec and total latency. `session` is anything with a requests-style `post`
+    (a requests.Session or an http_client.HttpClient); defaults to the shared HttpClient.
+    """
+    session = session or get_client()
+    body = dict(payload, stream=True, stream_options={"include_usage": True})
+
+    start = time.perf_counter()
+    first_token_at = None
+    last_token_at = start
+    chunks = 0
+    usage = None
+    parts = []
+
+    writer = FencedCodeWriter(output_path)
+    try:
+        # The read timeout bounds the gap between two socket reads, so a silent connection is caught early
+        with session.post(url, headers=headers, json=body, stream=True,
+                          timeout=(connect_timeout, stall_timeout)) as response:
+            response.raise_for_status()
+            try:
+                for data in _iter_sse_data(response):
+                    now = time.perf_counter()
+                    if now - start > total_timeout:
+                        raise StreamStalledError(f"Stream exceeded the total timeout of {total_timeout}s")
+                    if data is None:
+                        if now - last_token_at > stall_timeout:
+                            raise StreamStalledError(f"No tokens for {now - last_token_at:.1f}s")
+                        continue
+                    if data == "[DONE]":
+                        break
+
+                    event = json.loads(data)
+                    usage = event.get("usage") or usage
+                    for choice in event.get("choices") or []:
+                        content = (choice.get("delta") or {}).get("content")
+                        if not content:
+                            continue
+                        if first_token_at is None:
+                            first_token_at = now
+                        last_token_at = now
+                        chunks += 1
+                        parts.append(content)
+                        writer.write(content)
+            except requests.exceptions.ConnectionError as e:
+                # requests reports a read timeout while iterating the body as a ConnectionError
+                raise StreamStalledError(f"No data received for {stall_timeout}s: {e}") from e
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+    end = time.perf_counter()
+    completion_tokens = (usage or {}).get("completion_tokens") or chunks
+    generation_seconds = end - (first_token_at or end)
+    metrics = {
+        "model": payload.get("model"),
+        "time_to_first_token_s": None if first_token_at is None else round(first_token_at - start, 4),
+        "total_latency_s": round(end - start, 4),
+        "completion_tokens": completion_tokens,
+        "tokens_estimated": not (usage or {}).get("completion_tokens"),
+        "tokens_per_second": round(completion_tokens / generation_seconds, 2) if generation_seconds > 0 else None,
+        "prompt_tokens": (usage or {}).get("prompt_tokens"),
+    }
+    return "".join(parts), metrics
+
+
+def record_metrics(metrics, path=METRICS_LOG_PATH):
+    """Appends one run's metrics to the JSONL log and prints a one-line summary."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(dict(metrics, timestamp=time.time()), ensure_ascii=False) + "\n")
+    ttft = metrics["time_to_first_token_s"]
+    tps = metrics["tokens_per_second"]
+    print(f"Streamed {metrics['completion_tokens']} tokens: "
+          f"TTFT {'n/a' if ttft is None else f'{ttft:.2f}s'}, "
+          f"{'n/a' if tps is None else f'{tps:.1f}'} tokens/s, total {metrics['total_latency_s']:.2f}s")
+
+
+def completion_from_stream(text, metrics):
+    """Shapes a streamed result like a blocking /chat/completions response, for the response cache."""
+    return {
+        "choices": [{"message": {"role": "assistant", "content": text}}],
+        "usage": {"prompt_tokens": metrics["prompt_tokens"], "completion_tokens": metrics["completion_tokens"]},
+    }
@@ -0,0 +1,178 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from collections.abc import MutableMapping
+
+import numpy as np
+
+from metric_store import MetricStore, MetricTable, load_metric_store
+
+# File layout (little-endian):
+#   header     magic, version, table count, directory offset and length
+#   per table  float64 values (rows x cols, row-major; NaN marks a blank cell), int8 unit codes,
+#              then a UTF-8 JSON blob {"label_header", "metrics", "periods"}; each block 8-byte aligned
+#   directory  UTF-8 JSON list of {"title", "source", "rows", "cols", "values", "units", "names", "names_length"}
+MAGIC = b"FHMB"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sIIQQ")
+_ALIGNMENT = 8
+_VALUES_DTYPE = np.dtype("<f8")
+_UNITS_DTYPE = np.dtype("i1")
+
+
+def is_metric_binary(path):
+    """True if `path` starts with the binary format's magic bytes."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _pad(f):
+    padding = -f.tell() % _ALIGNMENT
+    f.write(b"\0" * padding)
+
+
+def write_metric_binary(store, path):
+    """Writes every table of a MetricStore to `path` (atomically, via a temporary file). Returns the size in bytes."""
+    directory = []
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        for title, table in store.tables.items():
+            rows, cols = len(table.metrics), len(table.periods)
+            _pad(f)
+            values_offset = f.tell()
+            f.write(np.ascontiguousarray(table.values, dtype=_VALUES_DTYPE).tobytes())
+            _pad(f)
+            units_offset = f.tell()
+            f.write(np.ascontiguousarray(table.units, dtype=_UNITS_DTYPE).tobytes())
+            _pad(f)
+            names_offset = f.tell()
+            names = json.dumps({"label_header": table.label_header, "metrics": list(table.metrics),
+                                "periods": list(table.periods)}, ensure_ascii=False).encode("utf-8")
+            f.write(names)
+            directory.append({"title": title, "source": store.sources.get(title), "rows": rows, "cols": cols,
+                              "values": values_offset, "units": units_offset,
+                              "names": names_offset, "names_length": len(names)})
+        _pad(f)
+        directory_offset = f.tell()
+        encoded = json.dumps(directory, ensure_ascii=False).encode("utf-8")
+        f.write(encoded)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(directory), directory_offset, len(encoded)))
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+class MappedTables(MutableMapping):
+    """
+    {title: MetricTable} over a memory-mapped binary file. Opening reads only the header and
+    the table directory; a table's names are decoded and its values wrapped (np.frombuffer,
+    no copy) the first time it is looked up. Tables added later are kept in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            # The mapping stays valid after the file is closed (and after it is replaced on disk)
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._buffer) < _HEADER.size or self._buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a financial highlights binary file: {path}")
+        magic, version, count, directory_offset, directory_length = _HEADER.unpack_from(self._buffer, 0)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported binary format version {version} in {path}")
+        directory = json.loads(self._buffer[directory_offset:directory_offset + directory_length].decode("utf-8"))
+        self._directory = {entry["title"]: entry for entry in directory}
+        self._keys = dict.fromkeys(self._directory)
+        self._tables = {}
+        self._added = {}
+        self._removed = set()
+
+    def sources(self):
+        return {title: entry.get("source") or self.path for title, entry in self._directory.items()}
+
+    def _load(self, entry):
+        rows, cols = entry["rows"], entry["cols"]
+        names = json.loads(self._buffer[entry["names"]:entry["names"] + entry["names_length"]].decode("utf-8"))
+        if rows * cols:
+            values = np.frombuffer(self._buffer, dtype=_VALUES_DTYPE, count=rows * cols,
+                                   offset=entry["values"]).reshape(rows, cols)
+            units = np.frombuffer(self._buffer, dtype=_UNITS_DTYPE, count=rows * cols,
+                                  offset=entry["units"]).reshape(rows, cols)
+        else:
+            values, units = np.empty((rows, cols)), np.empty((rows, cols), dtype=np.int8)
+        return MetricTable(entry["title"], names["label_header"], names["metrics"], names["periods"], values, units)
+
+    def __getitem__(self, title):
+        table = self._tables.get(title)
+        if table is None:
+            if title not in self._keys:
+                raise KeyError(title)
+            table = self._tables[title] = self._load(self._directory[title])
+        return table
+
+    def __setitem__(self, title, table):
+        self._tables[title] = table
+        self._added[title] = table
+        self._keys[title] = None
+        self._removed.discard(title)
+
+    def __delitem__(self, title):
+        del self._keys[title]
+        self._tables.pop(title, None)
+        self._added.pop(title, None)
+        if title in self._directory:
+            self._removed.add(title)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, title):
+        return title in self._keys
+
+    def __reduce__(self):
+        # Pickled (e.g. for chart worker processes) as the path plus in-memory changes, so the
+        # receiving process maps the same file instead of receiving copies of the arrays
+        return _reopen_tables, (self.path, self._added, sorted(self._removed))
+
+
+def _reopen_tables(path, added, removed):
+    tables = MappedTables(path)
+    for title in removed:
+        del tables[title]
+    for title, table in added.items():
+        tables[title] = table
+    return tables
+
+
+def open_metric_binary(path):
+    """Opens a binary financial highlights file as a MetricStore without parsing or copying its values."""
+    store = MetricStore()
+    store.tables = MappedTables(path)
+    store.sources = store.tables.sources()
+    return store
+
+
+def convert_to_binary(input_paths, output_path):
+    """Converts financial highlights JSON files (either layout) into one binary file."""
+    start = time.perf_counter()
+    store = load_metric_store(*input_paths)
+    size = write_metric_binary(store, output_path)
+    input_size = sum(os.path.getsize(path) for path in input_paths)
+    print(f"Wrote {len(store)} table(s) to '{output_path}' ({size / 1024:.1f} KB from "
+          f"{input_size / 1024:.1f} KB of JSON) in {time.perf_counter() - start:.2f}s")
+    return output_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert financial highlights JSON into a memory-mappable binary file.")
+    parser.add_argument("inputs", nargs="+", help="JSON files in either layout (list of tables or dict by title).")
+    parser.add_argument("-o", "--output", required=True, help="Binary file to write, e.g. data/financial_highlights.fhb")
+    args = parser.parse_args()
+
+    convert_to_binary(args.inputs, args.output)
@@ -0,0 +1,271 @@
+import json
+import math
+import os
+import re
+
+import numpy as np
+
+# Unit codes stored alongside every parsed value
+UNIT_NUMBER = 0
+UNIT_PERCENT = 1
+UNIT_BPS = 2
+UNIT_NAMES = ("number", "percent", "bps")
+
+# Matches "1,037,645", "14.2%", "-95 bps", "+680 bps", "(4,031)"
+_VALUE_RE = re.compile(r"^([+-])?(\()?(\d[\d,]*(?:\.\d+)?|\.\d+)(\))?\s*(%|bps)?$", re.IGNORECASE)
+# Cumulative period columns such as "3M25" / "6M25", used to name list-shaped tables
+_CUMULATIVE_PERIOD_RE = re.compile(r"^(\d{1,2})M(\d{2})$")
+# Footnote markers glued to metric names in the source document ("Credit growth1", "LDR2")
+_FOOTNOTE_RE = re.compile(r"(?<=[A-Za-z)])\d+$")
+
+_CUMULATIVE_TITLE_PREFIX = {3: "3M", 6: "1H", 9: "9M", 12: "FY"}
+
+
+def parse_value(text):
+    """
+    Parses a formatted cell value into (float, unit code).
+    Blank or non-numeric cells come back as (nan, UNIT_NUMBER).
+    """
+    if text is None:
+        return math.nan, UNIT_NUMBER
+    if isinstance(text, (int, float)):
+        return float(text), UNIT_NUMBER
+
+    match = _VALUE_RE.match(str(text).strip())
+    if not match:
+        return math.nan, UNIT_NUMBER
+
+    sign, open_paren, digits, close_paren, suffix = match.groups()
+    if bool(open_paren) != bool(close_paren):
+        return math.nan, UNIT_NUMBER
+
+    value = float(digits.replace(",", ""))
+    if sign == "-" or open_paren:
+        value = -value
+
+    if not suffix:
+        unit = UNIT_NUMBER
+    elif suffix == "%":
+        unit = UNIT_PERCENT
+    else:
+        unit = UNIT_BPS
+    return value, unit
+
+
+def normalize_metric_name(name):
+    """Strips footnote markers so "LDR2" can be looked up as "LDR"."""
+    return _FOOTNOTE_RE.sub("", name.strip())
+
+
+def infer_table_title(rows, position):
+    """
+    Names a table from the list-shaped JSON layout, which carries no titles.
+    A table with a "6M25" column is the "1H25 Financial Highlights" table, and so on.
+    """
+    latest = None
+    for column in (rows[0] if rows else ()):
+        match = _CUMULATIVE_PERIOD_RE.match(column)
+        if match and int(match.group(1)) in _CUMULATIVE_TITLE_PREFIX:
+            key = (match.group(2), int(match.group(1)))
+            if latest is None or key > latest:
+                latest = key
+    if latest is None:
+        return f"Table {position + 1}"
+    year, months = latest
+    return f"{_CUMULATIVE_TITLE_PREFIX[months]}{year} Financial Highlights"
+
+
+class MetricTable:
+    """
+    One financial highlights table parsed into dense float64/int8 arrays.
+    Rows are metrics, columns are periods; missing cells hold NaN.
+    """
+
+    __slots__ = ("title", "label_header", "metrics", "periods", "values", "units",
+                 "_metric_index", "_alias_index", "_period_index")
+
+    def __init__(self, title, label_header, metrics, periods, values, units):
+        self.title = title
+        self.label_header = label_header
+        self.metrics = tuple(metrics)
+        self.periods = tuple(periods)
+        self.values = values
+        self.units = units
+        self._metric_index = {name: i for i, name in enumerate(self.metrics)}
+        self._alias_index = {}
+        for i, name in enumerate(self.metrics):
+            self._alias_index.setdefault(normalize_metric_name(name), i)
+        self._period_index = {name: j for j, name in enumerate(self.periods)}
+
+    @classmethod
+    def from_rows(cls, title, rows):
+        """Parses the list of row dicts produced by convert_docx_to_json."""
+        if not rows:
+            return cls(title, None, [], [], np.empty((0, 0)), np.empty((0, 0), dtype=np.int8))
+
+        label_header = next(iter(rows[0]))
+        periods = [key for key in rows[0] if key != label_header]
+        period_index = {name: j for j, name in enumerate(periods)}
+
+        metrics = []
+        parsed_rows = []
+        for row in rows:
+            label = row.get(label_header, "").strip()
+            cells = [(key, value) for key, value in row.items() if key != label_header]
+            # Section headers repeat the column names ("Capital and liquidity" | "2Q24" | ...)
+            if not label or all(value == key for key, value in cells):
+                continue
+            metrics.append(label)
+            parsed_rows.append(cells)
+
+        values = np.full((len(metrics), len(periods)), np.nan, dtype=np.float64)
+        units = np.zeros((len(metrics), len(periods)), dtype=np.int8)
+        for i, cells in enumerate(parsed_rows):
+            for key, text in cells:
+                j = period_index.get(key)
+                if j is None:
+                    continue
+                values[i, j], units[i, j] = parse_value(text)
+
+        return cls(title, label_header, metrics, periods, values, units)
+
+    def metric_row(self, metric):
+        row = self._metric_index.get(metric)
+        if row is None:
+            row = self._alias_index.get(normalize_metric_name(metric))
+        return row
+
+    def period_column(self, period):
+        return self._period_index.get(period)
+
+
+class MetricStore:
+    """
+    Indexed store of all loaded tables, keyed by (table title, metric, period).
+    Every lookup is a couple of dict probes plus an array read.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.sources = {}
+        self._derived = {}
+
+    def __getstate__(self):
+        # Derived-metric engines are rebuilt on demand rather than shipped to worker processes
+        state = self.__dict__.copy()
+        state["_derived"] = {}
+        return state
+
+    def __contains__(self, title):
+        return title in self.tables
+
+    def __len__(self):
+        return len(self.tables)
+
+    def add_table(self, table, source=None):
+        """Adds a parsed table; a later table with the same title replaces the earlier one."""
+        self.tables[table.title] = table
+        self.sources[table.title] = source
+        self._derived.clear()
+
+    def add_data(self, data, source=None):
+        """Adds tables from either JSON layout (dict keyed by title, or list of tables)."""
+        if isinstance(data, dict):
+            items = data.items()
+        elif isinstance(data, list):
+            items = ((infer_table_title(rows, i), rows) for i, rows in enumerate(data))
+        else:
+            raise ValueError(f"Unsupported financial data layout: {type(data).__name__}")
+
+        for title, rows in items:
+            self.add_table(MetricTable.from_rows(title, rows), source)
+        return self
+
+    @classmethod
+    def from_data(cls, data, source=None):
+        return cls().add_data(data, source)
+
+    def table(self, title):
+        return self.tables.get(title)
+
+    def get(self, title, metric, period, default=math.nan):
+        """Returns a single parsed value, or `default` if any part of the key is missing."""
+        table = self.tables.get(title)
+        if table is None:
+            return default
+        row = table.metric_row(metric)
+        col = table.period_column(period)
+        if row is None or col is None:
+            return default
+        value = table.values[row, col]
+        return default if math.isnan(value) else float(value)
+
+    def derived(self, title=None):
+        """
+        DerivedMetrics (growth, bps deltas, LTM, CAGR) over one table, or over every table when
+        `title` is None. Built on first use; None if the table is unknown.
+        """
+        from derived_metrics import DerivedMetrics
+
+        if title is not None and title not in self.tables:
+            return None
+        engine = self._derived.get(title)
+        if engine is None:
+            engine = self._derived[title] = DerivedMetrics(self, None if title is None else [title])
+        return engine
+
+    def unit(self, title, metric, period):
+        """Returns the unit name ("number", "percent", "bps") of a cell, or None if missing."""
+        table = self.tables.get(title)
+        if table is None:
+            return None
+        row = table.metric_row(metric)
+        col = table.period_column(period)
+        if row is None or col is None:
+            return None
+        return UNIT_NAMES[table.units[row, col]]
+
+    def series(self, title, metric, periods):
+        """
+        Returns the values of one metric over `periods` as a float64 array.
+        Returns None if the table or metric is unknown; unknown periods are NaN.
+        """
+        table = self.tables.get(title)
+        if table is None:
+            return None
+        row = table.metric_row(metric)
+        if row is None:
+            return None
+
+        result = np.full(len(periods), np.nan, dtype=np.float64)
+        for k, period in enumerate(periods):
+            col = table.period_column(period)
+            if col is not None:
+                result[k] = table.values[row, col]
+        return result
+
+
+def load_metric_store(*filepaths):
+    """
+    Parses one or more financial highlights JSON files into a single MetricStore.
+    Binary files written by metric_binary.py are memory-mapped instead of parsed; a single
+    binary file is opened without reading its values at all.
+    """
+    from metric_binary import is_metric_binary, open_metric_binary
+
+    for filepath in filepaths:
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"Data file not found: {filepath}")
+    if len(filepaths) == 1 and is_metric_binary(filepaths[0]):
+        return open_metric_binary(filepaths[0])
+
+    store = MetricStore()
+    for filepath in filepaths:
+        if is_metric_binary(filepath):
+            mapped = open_metric_binary(filepath)
+            for title, table in mapped.tables.items():
+                store.add_table(table, mapped.sources[title])
+            continue
+        with open(filepath, 'r', encoding='utf-8') as f:
+            store.add_data(json.load(f), source=filepath)
+    return store
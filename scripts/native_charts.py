@@ -0,0 +1,93 @@
+import math
+
+from pptx.chart.data import CategoryChartData
+from pptx.dml.color import RGBColor
+from pptx.enum.chart import XL_CHART_TYPE
+from pptx.enum.dml import MSO_LINE_DASH_STYLE
+from pptx.util import Pt
+
+from chart_renderer import resolve_chart_series
+
+NATIVE_CHART_TYPES = {
+    "bar": XL_CHART_TYPE.COLUMN_CLUSTERED,
+    "line": XL_CHART_TYPE.LINE_MARKERS,
+}
+
+# Màu mặc định của create_chart_image ("skyblue"), để không phải import matplotlib chỉ để đổi tên màu
+_NAMED_COLORS = {"skyblue": "87CEEB"}
+
+
+def _rgb_color(color):
+    """Chuyển "#1f77b4" hoặc tên màu matplotlib sang RGBColor."""
+    if color.startswith("#") and len(color) == 7:
+        return RGBColor.from_string(color[1:])
+    if color.lower() in _NAMED_COLORS:
+        return RGBColor.from_string(_NAMED_COLORS[color.lower()])
+    from matplotlib.colors import to_hex
+    return RGBColor.from_string(to_hex(color)[1:])
+
+
+def _set_axis_title(axis, text):
+    if not text:
+        return
+    axis.has_title = True
+    axis.axis_title.text_frame.text = text
+    axis.axis_title.text_frame.paragraphs[0].font.size = Pt(10)
+
+
+def add_native_chart(slide, financial_data, chart_definition, left, top, width, height, series=None):
+    """
+    Thêm biểu đồ PowerPoint gốc (dữ liệu nhúng trong file) thay cho ảnh PNG.
+    Dùng cùng các khóa của chart_definition (và `series` đã tra cứu sẵn) như create_chart_image.
+    Trả về graphic frame của biểu đồ, hoặc None nếu không có dữ liệu để vẽ.
+    """
+    data_key = chart_definition["data_key"]
+    chart_type = chart_definition["chart_type"]
+    x_axis_keys = chart_definition["x_axis_keys"]
+    chart_title = chart_definition["chart_title"]
+    color = _rgb_color(chart_definition.get("color", "skyblue"))
+
+    if series is None:
+        series = resolve_chart_series(financial_data, chart_definition)
+    if series is None:
+        return None
+
+    y_values = [0.0 if math.isnan(v) else float(v) for v in series] # Sử dụng 0 nếu không tìm thấy key
+    if not any(y_values):
+        print(f"Warning: No data available to plot the chart for '{data_key}'.")
+        return None
+
+    if chart_type not in NATIVE_CHART_TYPES:
+        print(f"Warning: Chart type '{chart_type}' is not supported.")
+        return None
+
+    chart_data = CategoryChartData()
+    chart_data.categories = x_axis_keys
+    chart_data.add_series(data_key, y_values)
+
+    graphic_frame = slide.shapes.add_chart(NATIVE_CHART_TYPES[chart_type], left, top, width, height, chart_data)
+    chart = graphic_frame.chart
+    chart.has_legend = False
+    chart.has_title = True
+    chart.chart_title.text_frame.text = chart_title
+    chart.chart_title.text_frame.paragraphs[0].font.size = Pt(14)
+
+    _set_axis_title(chart.category_axis, chart_definition.get("x_label", ""))
+    _set_axis_title(chart.value_axis, chart_definition.get("y_label", ""))
+    chart.value_axis.has_major_gridlines = True
+    chart.value_axis.major_gridlines.format.line.dash_style = MSO_LINE_DASH_STYLE.DASH
+
+    plot_series = chart.plots[0].series[0]
+    if chart_type == "bar":
+        plot_series.format.fill.solid()
+        plot_series.format.fill.fore_color.rgb = color
+    else:
+        plot_series.smooth = False
+        plot_series.format.line.color.rgb = color
+        plot_series.format.line.width = Pt(2)
+        plot_series.marker.format.fill.solid()
+        plot_series.marker.format.fill.fore_color.rgb = color
+        plot_series.marker.format.line.color.rgb = color
+
+    print(f"Created native chart '{chart_title}'")
+    return graphic_frame
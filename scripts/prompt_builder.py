@@ -0,0 +1,225 @@
+import argparse
+import collections
+import functools
+import json
+import math
+import re
+import runpy
+import time
+
+from llm_stream import METRICS_LOG_PATH
+from metric_store import UNIT_NAMES, MetricStore
+
+FINANCIAL_DATA_PATH = "data/financial_highlights.json"
+SLIDE_DEFINITIONS_PATH = "prompts/slide_definitions.py"
+
+SYSTEM_PROMPT = ("Bạn là một chuyên gia trong phân tích kinh doanh và lập trình Python. "
+                 "Nhiệm vụ của bạn là tạo ra mã Python sạch, hiệu quả và có thể chạy được để tự động hóa các báo cáo.")
+
+# Fixed instructions of the whole-script generators; the data and slide schemas follow them
+GENERATOR_INSTRUCTIONS = """Viết một script Python hoàn chỉnh tạo tệp `.pptx` (PowerPoint) từ các file local.
+Yêu cầu:
+1. Thư viện: `python-pptx`, `pandas`, `matplotlib.pyplot`. Có thể dùng API ổn định của module `deck_builder` (cùng thư mục `scripts/`) thay vì tự viết: `load_financial_data`, `slide_layout_for`, các hàm `add_*_slide`, `create_presentation`, hoặc `main(slide_definitions)` chạy cả dòng lệnh (tham số, log, cache).
+2. Đọc `slide_definitions` (list) bằng `runpy.run_path("prompts/slide_definitions.py")["slide_definitions"]`; dữ liệu tài chính ở `data/financial_highlights.json`. Cấu trúc của cả hai được tóm tắt bên dưới.
+3. Code rõ ràng, có comment cho các bước chính.
+4. Vẽ biểu đồ theo `chart_definition` của từng slide từ dữ liệu JSON. Nên vẽ qua `create_chart_image_cached` với cache biểu đồ dùng chung (`ChartCache`, thư mục mặc định `.cache/charts`, khoá theo nội dung, tên file theo `chart_filename`; `deck_builder` đã làm việc này): các biểu đồ được render sẵn vào cache đó trong lúc chờ model nên sẽ không phải vẽ lại.
+5. Chèn các ảnh tĩnh có sẵn vào slide.
+6. Tên file PPTX đầu ra: `Bao_Cao_Tai_Chinh_Doanh_Nghiep.pptx` (`deck_builder.OUTPUT_PPTX_FILENAME`).
+Chỉ trả về code trong một khối ```python."""
+
+GENERATOR_TASK = "Hãy tạo code Python hoàn chỉnh dựa trên các yêu cầu và cấu trúc dữ liệu trên."
+
+# Follow-up turn when a generated script fails the code gate or its run; only the problems are sent
+REPAIR_TASK = ("Script vừa trả về không dùng được. Các lỗi (kèm dòng code tương ứng):\n{problems}\n"
+               "Hãy sửa các lỗi này và trả về toàn bộ script đã sửa trong một khối ```python.")
+
+# Heuristic tokenizer: words split into ~4-character pieces, punctuation one token each
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_FALLBACK_ENCODING = "o200k_base"
+
+
+@functools.lru_cache(maxsize=None)
+def _encoding(model):
+    """The tiktoken encoding for `model` (or a recent general one), or None when tiktoken is not installed."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding(_FALLBACK_ENCODING)
+    except KeyError:
+        return tiktoken.get_encoding(_FALLBACK_ENCODING)
+
+
+def token_counter_name(model=None):
+    encoding = _encoding(model)
+    return f"tiktoken:{encoding.name}" if encoding else "heuristic"
+
+
+def count_tokens(text, model=None):
+    """Local token count of `text`: exact with tiktoken, otherwise an estimate."""
+    encoding = _encoding(model)
+    if encoding:
+        return len(encoding.encode(text))
+    return sum(max(1, math.ceil(len(piece) / 4)) if piece[0].isalnum() or piece[0] == "_" else 1
+               for piece in _TOKEN_RE.findall(text))
+
+
+def field_schema(value, prefix=""):
+    """Flattened key paths and value types of a slide definition, e.g. `chart_definition.x_axis_keys: list[str]`."""
+    if isinstance(value, dict):
+        fields = {}
+        for key, item in value.items():
+            fields.update(field_schema(item, f"{prefix}{key}."))
+        return fields
+    if isinstance(value, list):
+        item_types = sorted({type(item).__name__ for item in value}) or ["str"]
+        return {prefix[:-1]: f"list[{'|'.join(item_types)}]"}
+    return {prefix[:-1]: type(value).__name__}
+
+
+def data_schema_summary(path=FINANCIAL_DATA_PATH):
+    """
+    Compact description of a financial highlights JSON: its layout, and per table the label
+    column, the period and comparison columns and the metric names grouped by unit.
+    Replaces the raw JSON (tens of KB) in prompts.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    store = MetricStore.from_data(data, source=path)
+    layout = ("dict {tiêu đề bảng: list dòng}" if isinstance(data, dict)
+              else "list các bảng (không có tiêu đề), mỗi bảng là list dòng")
+    lines = [f"`{path}`: {layout}. Mỗi dòng là dict {{<cột nhãn>: tên chỉ số, <kỳ>: giá trị dạng chuỗi}}; "
+             "giá trị như \"1,037,645\", \"(3,949)\" (số âm), \"14.2%\", \"+45 bps\"; "
+             "dòng có giá trị trùng tên cột là tiêu đề nhóm."]
+    for table in store.tables.values():
+        periods = [p for p in table.periods if " vs " not in p]
+        comparisons = [p for p in table.periods if " vs " in p]
+        lines.append(f"- Bảng \"{table.title}\" | cột nhãn \"{table.label_header}\" | kỳ: {' '.join(periods)}"
+                     + (f" | so sánh: {', '.join(comparisons)}" if comparisons else ""))
+        by_unit = collections.defaultdict(list)
+        period_columns = [j for j, p in enumerate(table.periods) if " vs " not in p]
+        for i, metric in enumerate(table.metrics):
+            units = collections.Counter(int(table.units[i, j]) for j in period_columns)
+            by_unit[UNIT_NAMES[units.most_common(1)[0][0]] if units else "number"].append(metric)
+        for unit in UNIT_NAMES:
+            if by_unit[unit]:
+                lines.append(f"  {unit}: {'; '.join(by_unit[unit])}")
+    return "\n".join(lines)
+
+
+def slide_schema_summary(slide_definitions):
+    """
+    Compact description of the slide definitions: per slide type its count and the union of
+    its fields, and the (table, metric) pairs the charts read. The script imports the full
+    definitions itself, so their text does not need to be in the prompt.
+    """
+    fields_by_type = {}
+    counts = collections.Counter()
+    chart_sources = {}
+    for slide_def in slide_definitions:
+        counts[slide_def["slide_type"]] += 1
+        fields_by_type.setdefault(slide_def["slide_type"], {}).update(field_schema(slide_def))
+        chart_def = slide_def.get("chart_definition")
+        if chart_def:
+            chart_sources.setdefault(chart_def.get("data_source_title"), []).append(chart_def.get("data_key"))
+    lines = [f"`slide_definitions`: {len(slide_definitions)} slide, mỗi slide là dict có `slide_type`."]
+    for slide_type, fields in fields_by_type.items():
+        lines.append(f"- {slide_type} (x{counts[slide_type]}): "
+                     + ", ".join(f"{key}: {fields[key]}" for key in sorted(fields)))
+    for title, keys in chart_sources.items():
+        lines.append(f"- Biểu đồ đọc bảng \"{title}\": {'; '.join(dict.fromkeys(keys))}")
+    return "\n".join(lines)
+
+
+def build_messages(system_prompt, stable_sections, delta_sections=(), model=None, label=None):
+    """
+    Chat messages with everything that is the same from run to run first (system prompt, fixed
+    instructions, schemas) and the per-run part last, so provider-side prefix caching can reuse
+    the prefix. With a `label`, prints the local token count of the prefix and of the delta.
+    """
+    stable = "\n\n".join(section for section in stable_sections if section)
+    delta = "\n\n".join(section for section in delta_sections if section)
+    if delta:
+        messages = [{"role": "system", "content": f"{system_prompt}\n\n{stable}" if stable else system_prompt},
+                    {"role": "user", "content": delta}]
+    else:
+        messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": stable}]
+    if label:
+        prefix_tokens = count_tokens(messages[0]["content"], model)
+        delta_tokens = count_tokens(messages[1]["content"], model)
+        print(f"Prompt {label}: {prefix_tokens + delta_tokens} input tokens "
+              f"({prefix_tokens} stable prefix + {delta_tokens} delta, {token_counter_name(model)})")
+    return messages
+
+
+def build_generator_messages(model=None, data_path=FINANCIAL_DATA_PATH, definitions_path=SLIDE_DEFINITIONS_PATH,
+                             extra=None):
+    """Messages of the whole-script generators: instructions and schema summaries, then the task."""
+    slide_definitions = runpy.run_path(definitions_path)["slide_definitions"]
+    return build_messages(SYSTEM_PROMPT, [GENERATOR_INSTRUCTIONS, data_schema_summary(data_path),
+                                          slide_schema_summary(slide_definitions)],
+                          [GENERATOR_TASK, extra], model=model, label="generate_script")
+
+
+def build_repair_messages(messages, previous_response, problems, model=None, task=REPAIR_TASK):
+    """
+    The original messages unchanged (still a cacheable prefix), then the rejected response and a
+    short turn listing only its problems, instead of re-sending the prompt with the whole traceback.
+    `task` is the repair request, with a `{problems}` field.
+    """
+    repair_turn = task.format(problems=problems)
+    print(f"Prompt repair_script: {count_tokens(repair_turn, model)} new input tokens "
+          f"after the {len(messages)}-message prefix and the previous response ({token_counter_name(model)})")
+    return list(messages) + [{"role": "assistant", "content": previous_response},
+                             {"role": "user", "content": repair_turn}]
+
+
+def log_token_usage(label, payload, result, from_cache=False, path=METRICS_LOG_PATH):
+    """
+    Appends the input and output token counts of one call to the metrics JSONL and prints them.
+    Provider-reported usage is logged when the response has it; local counts always are.
+    """
+    model = payload.get("model")
+    usage = (result or {}).get("usage") or {}
+    try:
+        output_text = result["choices"][0]["message"]["content"] or ""
+    except (KeyError, IndexError, TypeError):
+        output_text = ""
+    record = {
+        "event": "tokens",
+        "label": label,
+        "model": model,
+        "from_cache": from_cache,
+        "counter": token_counter_name(model),
+        "input_tokens_local": sum(count_tokens(message["content"], model) for message in payload["messages"]),
+        "output_tokens_local": count_tokens(output_text, model),
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "cached_prompt_tokens": (usage.get("prompt_tokens_details") or {}).get("cached_tokens"),
+        "timestamp": time.time(),
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    reported = "" if record["prompt_tokens"] is None else \
+        f" (provider: {record['prompt_tokens']} in / {record['completion_tokens']} out)"
+    print(f"Tokens {label}: {record['input_tokens_local']} in / {record['output_tokens_local']} out"
+          f"{reported}{' [response from cache]' if from_cache else ''}")
+    return record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the generator prompt and its token counts.")
+    parser.add_argument("--data", default=FINANCIAL_DATA_PATH)
+    parser.add_argument("--definitions", default=SLIDE_DEFINITIONS_PATH)
+    parser.add_argument("--model", default="gemini-2.5-flash")
+    parser.add_argument("--show", action="store_true", help="Print the assembled messages.")
+    args = parser.parse_args()
+
+    messages = build_generator_messages(args.model, args.data, args.definitions)
+    for label, path in (("financial data JSON", args.data), ("slide definitions", args.definitions)):
+        with open(path, "r", encoding="utf-8") as f:
+            print(f"Raw {label} ({path}): {count_tokens(f.read(), args.model)} tokens")
+    if args.show:
+        for message in messages:
+            print(f"\n--- {message['role']} ---\n{message['content']}")
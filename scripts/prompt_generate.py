@@ -1,80 +1,98 @@
+import argparse
 import requests
 import json
 import os
-from dotenv import load_dotenv
+from llm_client import DEFAULT_MODEL, ChatClient, chat_endpoint
+from code_gate import DEFAULT_REPAIR_ROUNDS, RepairLoop, save_script
+from prompt_builder import build_generator_messages, build_repair_messages
+from llm_stream import DEFAULT_STALL_TIMEOUT, StreamStalledError
+from slide_codegen import SPLIT_MODES, generate_slide_builder
+from slide_compiler import check_slide_definitions
+from tracing import TRACE_ENV, enable_tracing, shutdown_tracing, span, summary_table
 
-def generate_presentation_script():
+def generate_presentation_script(use_cache=True, stream=False, stall_timeout=DEFAULT_STALL_TIMEOUT,
+                                 max_repair_rounds=DEFAULT_REPAIR_ROUNDS):
     """
     Generates a Python script for creating a PowerPoint presentation by calling an AI API.
+    Responses are served from the local LLM response cache unless `use_cache` is False; a response
+    is only cached once its script passed the gate, and a cached one that fails it is deleted.
+    With `stream`, the completion is streamed over SSE and previewed in `<script>.part` as it
+    arrives; a stream silent for `stall_timeout` seconds is aborted, keeping what arrived in the .part file.
+    Every response goes through the code gate (syntax, imports, referenced files); a rejected
+    script is sent back with its problems for up to `max_repair_rounds` repairs. Only a script
+    that passed replaces the saved one.
+    Returns the path of the saved script, or None.
     """
-    # --- Prompt Definition ---
-    prompt = """Tôi muốn bạn tạo một mã Python hoàn chỉnh, chạy trên Jupyter Notebook, để tự động tạo một tệp `.pptx` (PowerPoint presentation) dựa trên các thông tin và dữ liệu từ các file local.
-
-**Yêu cầu:**
-1.  **Sử dụng thư viện:** `python-pptx`, `pandas`, `matplotlib.pyplot`.
-2.  **Đọc dữ liệu:**
-    *   Đọc cấu trúc slide và danh sách ảnh từ file `prompts/slide_definitions.py`. File này chứa 2 biến: `slide_definitions` (list) và `image_assets` (dict).
-    *   Đọc dữ liệu tài chính từ file `data/financial_highlights.json`.
-3.  **Cấu trúc code:** Code phải rõ ràng, có comment giải thích các bước chính.
-4.  **Tạo biểu đồ:** Từ dữ liệu JSON đã đọc, tạo các biểu đồ theo định nghĩa trong `slide_definitions`.
-5.  **Chèn ảnh:** Chèn các ảnh tĩnh có sẵn vào slide.
-6.  **Tên file PPTX đầu ra:** `Bao_Cao_Tai_Chinh_Doanh_Nghiep.pptx`
-
-Hãy tạo code Python hoàn chỉnh cho tôi dựa trên các yêu cầu trên. Code cần import `slide_definitions` và `image_assets` từ `prompts.slide_definitions`.
-"""
-
     # --- API Configuration ---
-    load_dotenv()
-    AI_API_BASE = os.getenv("AI_API_BASE", "https://api.thucchien.ai/v1")
-    AI_API_KEY = os.getenv("AI_API_KEY")
+    endpoint = chat_endpoint()
+    if endpoint is None:
+        return
 
-    if not AI_API_KEY:
-        print("Error: AI_API_KEY not found. Please set it in a .env file.")
+    # Slide definitions that reference missing data would produce a script that cannot render
+    if not check_slide_definitions():
         return
 
     # --- API Execution ---
-url = f"{AI_API_BASE}/chat/completions"
-headers = {
-  "Content-Type": "application/json",
-  "Authorization": f"Bearer {AI_API_KEY}"
-}
-data = {
-  "model": "gemini-2.5-flash",
-  "messages": [
-      {
-          "role": "system",
-                "content": "Bạn là một chuyên gia trong phân tích kinh doanh và lập trình Python. Nhiệm vụ của bạn là tạo ra mã Python sạch, hiệu quả và có thể chạy được để tự động hóa các báo cáo."
-      },
-      {
-          "role": "user",
-          "content": prompt
-            }
-  ]
-}
+    # Stable instructions and data/slide schema summaries first, the per-run task last
+    messages = build_generator_messages(DEFAULT_MODEL)
 
-    try:
-        response = requests.post(url, headers=headers, data=json.dumps(data), timeout=180)
-        response.raise_for_status()
+    output_path = "scripts/generated_report_script.py"
 
-  result = response.json()
-        generated_code = result['choices'][0]['message']['content']
+    # Cache cục bộ: prompt giống hệt lần trước thì không gọi API lại
+    client = ChatClient(*endpoint, model=DEFAULT_MODEL, use_cache=use_cache,
+                        stream_path=output_path if stream else None, stall_timeout=stall_timeout)
 
-        if generated_code.startswith("```python"):
-            generated_code = generated_code[9:]
-        if generated_code.endswith("```"):
-            generated_code = generated_code[:-3]
+    try:
+        repair_loop = RepairLoop(client.complete, messages, build_repair_messages, output_path, max_repair_rounds,
+                                 rejected=client.reject)
+        generated_code = repair_loop.generate()
+        if generated_code is None:
+            print(f"Error: the generated script did not pass the code gate; '{output_path}' was left unchanged.")
+            return None
+        client.accept()
+
+        with span("code_write", path=output_path):
+            save_script(output_path, generated_code)
 
-        output_path = "scripts/generated_report_script.py"
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(generated_code)
-        
         print(f"Successfully generated and saved the script to '{output_path}'")
+        return output_path
 
+    except StreamStalledError as e:
+        print(f"Aborted the streamed response: {e}")
+        print(f"The code received so far was kept in '{output_path}.part'.")
     except requests.exceptions.RequestException as e:
         print(f"An error occurred during the API request: {e}")
     except (KeyError, IndexError) as e:
         print(f"Error parsing the API response: {e}")
-        print("Full response:", response.text)
+        print("Full response:", json.dumps(client.last_result, ensure_ascii=False))
+    finally:
+        client.close()
 
 if __name__ == "__main__":
-    generate_presentation_script()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate the presentation script via the AI API.")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API, bypassing the local response cache.")
+    parser.add_argument("--stream", action="store_true", help="Stream the completion, previewing the script in <script>.part as it arrives.")
+    parser.add_argument("--stall-timeout", type=float, default=DEFAULT_STALL_TIMEOUT,
+                        help="Abort a streamed response after this many seconds without tokens.")
+    parser.add_argument("--repair-rounds", type=int, default=DEFAULT_REPAIR_ROUNDS,
+                        help="How many times a script rejected by the code gate is sent back to the model to fix.")
+    parser.add_argument("--split", choices=SPLIT_MODES, default=None,
+                        help="Generate one renderer per slide type or per slide concurrently, then assemble them.")
+    parser.add_argument("--trace", nargs="?", const="trace.jsonl", default=None,
+                        help="Write timed spans (JSONL) to this file, also from the generated script, and print a summary.")
+    args = parser.parse_args()
+
+    if args.trace:
+        enable_tracing(args.trace)
+        # The generated script (a child process or warm worker) appends its spans to the same file
+        os.environ[TRACE_ENV] = os.path.abspath(args.trace)
+
+    if args.split:
+        generate_slide_builder(args.split, use_cache=not args.no_cache, max_repair_rounds=args.repair_rounds)
+    else:
+        generate_presentation_script(use_cache=not args.no_cache, stream=args.stream,
+                                     stall_timeout=args.stall_timeout, max_repair_rounds=args.repair_rounds)
+
+    if args.trace:
+        print(summary_table())
+        shutdown_tracing()
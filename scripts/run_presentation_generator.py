@@ -1,96 +1,174 @@
+import argparse
 import requests
 import json
 import os
-from dotenv import load_dotenv
+from chart_prewarm import generate_while_prewarming
+from llm_client import DEFAULT_MODEL, ChatClient, chat_endpoint
+from code_gate import DEFAULT_REPAIR_ROUNDS, RepairLoop, runtime_problems, save_script
+from prompt_builder import build_generator_messages, build_repair_messages
+from llm_stream import DEFAULT_STALL_TIMEOUT, StreamStalledError
+from script_runner import DEFAULT_TIMEOUT, WarmScriptPool
+from slide_codegen import SPLIT_MODES, generate_slide_builder
+from slide_compiler import check_slide_definitions
+from tracing import TRACE_ENV, enable_tracing, shutdown_tracing, span, summary_table
 import subprocess
 import sys
 
-def generate_and_run_presentation_script():
+def run_generated_script(output_path, runner=None, script_timeout=DEFAULT_TIMEOUT):
+    """
+    Runs a generated script in a warm worker (`runner`) or a fresh interpreter and prints its output.
+    Returns the result (returncode, stdout, stderr), or None if the script timed out.
+    """
+    print("\nExecuting the generated script...")
+    if runner:
+        with span("subprocess_exec", script=output_path, warm=True):
+            result = runner.run(output_path, timeout=script_timeout)
+        print(f"Script finished in {result.duration_s:.2f}s (warm worker {result.worker_pid}).")
+    else:
+        try:
+            with span("subprocess_exec", script=output_path, warm=False):
+                result = subprocess.run([sys.executable, output_path], capture_output=True, text=True,
+                                        encoding='utf-8', timeout=script_timeout)
+        except subprocess.TimeoutExpired:
+            print(f"The generated script did not finish within {script_timeout}s.")
+            return None
+
+    if result.returncode == 0:
+        print("Generated script executed successfully.")
+        print("\n--- Output from generated script ---")
+        print(result.stdout)
+    else:
+        print("Error executing the generated script.")
+        print("\n--- Error Output ---")
+        print(result.stderr)
+    return result
+
+def generate_and_run_presentation_script(use_cache=True, stream=False, stall_timeout=DEFAULT_STALL_TIMEOUT,
+                                         runner=None, script_timeout=DEFAULT_TIMEOUT, split=None,
+                                         max_repair_rounds=DEFAULT_REPAIR_ROUNDS, prewarm=True):
     """
     Generates and then immediately runs a Python script for creating a PowerPoint presentation.
+    Responses are served from the local LLM response cache unless `use_cache` is False; a response
+    is only cached once its script passed the gate and ran, and a cached one that fails is deleted.
+    With `stream`, the completion is streamed over SSE and previewed in `<script>.part` as it
+    arrives; a stream silent for `stall_timeout` seconds is aborted, keeping what arrived in the .part file.
+    With a `runner` (WarmScriptPool), the script runs in a pre-imported worker instead of a new interpreter.
+    With `split` ("slide_type" or "slide"), renderers are generated per slide type or per slide
+    and assembled into one builder (see slide_codegen.py).
+    A script is only run after it passes the code gate (syntax, imports, referenced files). A
+    rejected script, or one that fails when run, is sent back to the model with a compact list of
+    its problems, for at most `max_repair_rounds` repairs in total. Each script runs from a
+    candidate file and replaces the saved script only once it ran successfully, so a run that
+    gives up leaves the previous script in place.
+    With `prewarm`, the data is loaded and every chart rendered into the chart cache while the
+    model writes the script (chart_prewarm.py), so the script only embeds ready images.
     """
-    # --- Prompt Definition ---
-    prompt = """Tôi muốn bạn tạo một mã Python hoàn chỉnh, chạy trên Jupyter Notebook, để tự động tạo một tệp `.pptx` (PowerPoint presentation) dựa trên các thông tin và dữ liệu từ các file local.
-
-**Yêu cầu:**
-1.  **Sử dụng thư viện:** `python-pptx`, `pandas`, `matplotlib.pyplot`.
-2.  **Đọc dữ liệu:**
-    *   Đọc cấu trúc slide và danh sách ảnh từ file `prompts/slide_definitions.py`. File này chứa 2 biến: `slide_definitions` (list) và `image_assets` (dict).
-    *   Đọc dữ liệu tài chính từ file `data/financial_highlights.json`.
-3.  **Cấu trúc code:** Code phải rõ ràng, có comment giải thích các bước chính.
-4.  **Tạo biểu đồ:** Từ dữ liệu JSON đã đọc, tạo các biểu đồ theo định nghĩa trong `slide_definitions`.
-5.  **Chèn ảnh:** Chèn các ảnh tĩnh có sẵn vào slide.
-6.  **Tên file PPTX đầu ra:** `Bao_Cao_Tai_Chinh_Doanh_Nghiep.pptx`
-
-Hãy tạo code Python hoàn chỉnh cho tôi dựa trên các yêu cầu trên. Code cần import `slide_definitions` và `image_assets` từ `prompts.slide_definitions`.
-"""
+    def generate(generator):
+        return generate_while_prewarming(generator) if prewarm else generator()
+
+    if split:
+        output_path = generate(lambda: generate_slide_builder(split, use_cache=use_cache,
+                                                                   max_repair_rounds=max_repair_rounds))
+        if output_path:
+            run_generated_script(output_path, runner, script_timeout)
+        return
 
     # --- API Configuration ---
-    load_dotenv()
-    AI_API_BASE = os.getenv("API_BASE_URL", "https://api.thucchien.ai/v1")
-    AI_API_KEY = os.getenv("API_KEY")
+    endpoint = chat_endpoint()
+    if endpoint is None:
+        return
 
-    if not AI_API_KEY:
-        print("Error: AI_API_KEY not found. Please set it in a .env file.")
+    # Slide definitions that reference missing data would produce a script that cannot render
+    if not check_slide_definitions():
         return
 
     # --- API Execution ---
-    url = f"{AI_API_BASE}/chat/completions"
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {AI_API_KEY}"
-    }
-    data = {
-        "model": "gemini-2.5-flash",
-        "messages": [
-            {
-                "role": "system",
-                "content": "Bạn là một chuyên gia trong phân tích kinh doanh và lập trình Python. Nhiệm vụ của bạn là tạo ra mã Python sạch, hiệu quả và có thể chạy được để tự động hóa các báo cáo."
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ]
-    }
+    # Stable instructions and data/slide schema summaries first, the per-run task last
+    messages = build_generator_messages(DEFAULT_MODEL)
+
+    output_path = "scripts/generated_report_script.py"
+    candidate_path = "scripts/generated_report_script.candidate.py"
+
+    # Cache cục bộ: prompt giống hệt lần trước thì không gọi API lại
+    client = ChatClient(*endpoint, model=DEFAULT_MODEL, use_cache=use_cache,
+                        stream_path=output_path if stream else None, stall_timeout=stall_timeout)
 
     try:
-        print("Generating presentation script via AI...")
-        response = requests.post(url, headers=headers, data=json.dumps(data), timeout=180)
-        response.raise_for_status()
-
-        result = response.json()
-        generated_code = result['choices'][0]['message']['content']
-
-        if generated_code.startswith("```python"):
-            generated_code = generated_code[9:]
-        if generated_code.endswith("```"):
-            generated_code = generated_code[:-3]
-
-        output_path = "scripts/generated_report_script.py"
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(generated_code)
-        
-        print(f"Successfully generated and saved the script to '{output_path}'")
-
-        # --- Execute the generated script ---
-        print("\nExecuting the generated script...")
-        result = subprocess.run([sys.executable, output_path], capture_output=True, text=True, encoding='utf-8')
-
-        if result.returncode == 0:
-            print("Generated script executed successfully.")
-            print("\n--- Output from generated script ---")
-            print(result.stdout)
-        else:
-            print("Error executing the generated script.")
-            print("\n--- Error Output ---")
-            print(result.stderr)
+        repair_loop = RepairLoop(client.complete, messages, build_repair_messages, output_path, max_repair_rounds,
+                                 rejected=client.reject)
+        generated_code = generate(repair_loop.generate)
+        while generated_code is not None:
+            with span("code_write", path=candidate_path):
+                save_script(candidate_path, generated_code)
+
+            # --- Execute the generated script ---
+            run_result = run_generated_script(candidate_path, runner, script_timeout)
+            if run_result is not None and run_result.returncode == 0:
+                # Only a script that passed the gate and ran is replayed from the response cache
+                client.accept()
+                os.replace(candidate_path, output_path)
+                print(f"Successfully generated and saved the script to '{output_path}'")
+                return
+            client.reject()
+            if run_result is None or getattr(run_result, "timed_out", False):
+                print(f"'{output_path}' was left unchanged.")
+                return
+            generated_code = repair_loop.repair(runtime_problems(run_result.stderr, candidate_path))
+        print(f"Error: no generated script passed the code gate and ran; giving up, '{output_path}' was left unchanged.")
 
+    except StreamStalledError as e:
+        print(f"Aborted the streamed response: {e}")
+        print(f"The code received so far was kept in '{output_path}.part'.")
     except requests.exceptions.RequestException as e:
         print(f"An error occurred during the API request: {e}")
     except (KeyError, IndexError) as e:
         print(f"Error parsing the API response: {e}")
-        print("Full response:", response.text)
+        print("Full response:", json.dumps(client.last_result, ensure_ascii=False))
+    finally:
+        client.close()
+        if os.path.exists(candidate_path):
+            os.remove(candidate_path)
 
 if __name__ == "__main__":
-    generate_and_run_presentation_script()
+    parser = argparse.ArgumentParser(description="Generate the presentation script via the AI API and run it.")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API, bypassing the local response cache.")
+    parser.add_argument("--stream", action="store_true", help="Stream the completion, previewing the script in <script>.part as it arrives.")
+    parser.add_argument("--stall-timeout", type=float, default=DEFAULT_STALL_TIMEOUT,
+                        help="Abort a streamed response after this many seconds without tokens.")
+    parser.add_argument("--loop", action="store_true",
+                        help="Keep a warm worker and regenerate/run again on Enter, for iterating on prompts.")
+    parser.add_argument("--script-timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="Seconds the generated script may run before it is killed.")
+    parser.add_argument("--script-memory-mb", type=int, default=None,
+                        help="Address-space limit for the generated script in --loop mode (POSIX only).")
+    parser.add_argument("--repair-rounds", type=int, default=DEFAULT_REPAIR_ROUNDS,
+                        help="How many times a script that fails the code gate or its run is sent back to the model to fix.")
+    parser.add_argument("--split", choices=SPLIT_MODES, default=None,
+                        help="Generate one renderer per slide type or per slide concurrently, then assemble them.")
+    parser.add_argument("--no-prewarm", action="store_true",
+                        help="Do not render the charts into the chart cache while waiting for the model.")
+    parser.add_argument("--trace", nargs="?", const="trace.jsonl", default=None,
+                        help="Write timed spans (JSONL) to this file, also from the generated script, and print a summary.")
+    args = parser.parse_args()
+
+    if args.trace:
+        enable_tracing(args.trace)
+        # The generated script (a child process or warm worker) appends its spans to the same file
+        os.environ[TRACE_ENV] = os.path.abspath(args.trace)
+
+    options = dict(use_cache=not args.no_cache, stream=args.stream, stall_timeout=args.stall_timeout,
+                   script_timeout=args.script_timeout, split=args.split, max_repair_rounds=args.repair_rounds,
+                   prewarm=not args.no_prewarm)
+    if args.loop:
+        # The worker starts importing pandas/matplotlib/pptx right away, overlapping the first API call
+        with WarmScriptPool(memory_limit_mb=args.script_memory_mb) as runner:
+            while True:
+                generate_and_run_presentation_script(runner=runner, **options)
+                if input("\nPress Enter to regenerate and run again, or q to quit: ").strip().lower() == "q":
+                    break
+    else:
+        generate_and_run_presentation_script(**options)
+
+    if args.trace:
+        print(summary_table())
+        shutdown_tracing()
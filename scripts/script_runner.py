@@ -0,0 +1,255 @@
+import collections
+import contextlib
+import importlib
+import multiprocessing
+import os
+import queue
+import runpy
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: no rlimits, memory limits are not enforced
+    resource = None
+
+# Heavy libraries the generated report scripts import; loaded once per worker
+DEFAULT_PRELOAD = ("pandas", "matplotlib.pyplot", "pptx", "pptx.chart.data", "numpy")
+DEFAULT_MAX_JOBS_PER_WORKER = 20
+DEFAULT_TIMEOUT = 600
+
+ScriptResult = collections.namedtuple(
+    "ScriptResult", ["returncode", "stdout", "stderr", "duration_s", "timed_out", "worker_pid"]
+)
+
+
+def _preload(modules):
+    import matplotlib
+    matplotlib.use("Agg")
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+@contextlib.contextmanager
+def _captured_output():
+    """
+    Redirects fds 1 and 2 to temp files, so output from C extensions and child processes
+    is captured as well. Yields a dict that receives "stdout"/"stderr" on exit.
+    """
+    captured = {}
+    saved = {}
+    files = {}
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for name, fd in (("stdout", 1), ("stderr", 2)):
+        files[name] = tempfile.TemporaryFile()
+        saved[name] = os.dup(fd)
+        os.dup2(files[name].fileno(), fd)
+    try:
+        yield captured
+    finally:
+        # The script may have replaced sys.stdout (e.g. with a log file)
+        for stream in (sys.stdout, sys.stderr):
+            with contextlib.suppress(Exception):
+                stream.flush()
+        sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for name, fd in (("stdout", 1), ("stderr", 2)):
+            os.dup2(saved[name], fd)
+            os.close(saved[name])
+            files[name].seek(0)
+            captured[name] = files[name].read().decode("utf-8", errors="replace")
+            files[name].close()
+
+
+@contextlib.contextmanager
+def _memory_limit(limit_bytes):
+    if resource is None or not limit_bytes:
+        yield
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    resource.setrlimit(resource.RLIMIT_AS, (limit_bytes, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _is_project_module(module, project_dirs):
+    location = getattr(module, "__file__", None) or next(iter(getattr(module, "__path__", None) or []), None)
+    if not location or "site-packages" in location:
+        return False
+    location = os.path.abspath(location)
+    return any(location.startswith(directory + os.sep) for directory in project_dirs)
+
+
+def _run_script(script_path, cwd, args, memory_limit):
+    """Runs one script like `python script_path *args` would, inside this worker. Returns the exit code."""
+    import traceback
+
+    saved_argv, saved_path, saved_cwd = sys.argv, list(sys.path), os.getcwd()
+    baseline_modules = set(sys.modules)
+    script_path = os.path.abspath(os.path.join(cwd or saved_cwd, script_path))
+    returncode = 0
+    try:
+        if cwd:
+            os.chdir(cwd)
+        sys.argv = [script_path, *args]
+        sys.path.insert(0, os.path.dirname(script_path))
+        with _memory_limit(memory_limit):
+            runpy.run_path(script_path, run_name="__main__")
+    except SystemExit as e:
+        if e.code is None:
+            returncode = 0
+        elif isinstance(e.code, int):
+            returncode = e.code
+        else:
+            print(e.code, file=sys.stderr)
+            returncode = 1
+    except BaseException:
+        traceback.print_exc()
+        returncode = 1
+    finally:
+        os.chdir(saved_cwd)
+        sys.argv, sys.path[:] = saved_argv, saved_path
+        # Project modules imported by the script (e.g. prompts.slide_definitions) must be re-read by the
+        # next job; library submodules loaded lazily stay cached
+        project_dirs = {os.path.dirname(script_path), os.path.abspath(cwd or saved_cwd)}
+        for name in set(sys.modules) - baseline_modules:
+            if _is_project_module(sys.modules[name], project_dirs):
+                del sys.modules[name]
+        if "matplotlib.pyplot" in sys.modules:
+            sys.modules["matplotlib.pyplot"].close("all")
+    return returncode
+
+
+def _worker_main(conn, preload):
+    _preload(preload)
+    conn.send("ready")
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        script_path, cwd, args, memory_limit = job
+        start = time.perf_counter()
+        with _captured_output() as output:
+            returncode = _run_script(script_path, cwd, args, memory_limit)
+        conn.send((returncode, output["stdout"], output["stderr"], time.perf_counter() - start))
+
+
+class _Worker:
+    def __init__(self, context, preload):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, preload))
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.ready = False
+
+    def wait_ready(self, timeout=None):
+        if not self.ready:
+            if not self.conn.poll(timeout):
+                raise TimeoutError("Worker did not finish pre-importing in time")
+            self.conn.recv()
+            self.ready = True
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            with contextlib.suppress(OSError, BrokenPipeError):
+                self.conn.send(None)
+        self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class WarmScriptPool:
+    """
+    Long-lived worker processes with pandas, matplotlib and python-pptx already imported,
+    used to run generated report scripts without paying interpreter and import start-up
+    on every run. Each job gets its own working directory, timeout and address-space
+    limit; a worker is replaced after `max_jobs_per_worker` jobs, after a failed job and
+    after a timeout (the worker is killed).
+    """
+
+    def __init__(self, workers=1, preload=DEFAULT_PRELOAD, max_jobs_per_worker=DEFAULT_MAX_JOBS_PER_WORKER,
+                 memory_limit_mb=None):
+        self.preload = tuple(preload)
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.memory_limit = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._all = set()
+        # Workers start importing right away, so warm-up overlaps whatever the caller does next
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _spawn(self):
+        worker = _Worker(self._context, self.preload)
+        with self._lock:
+            self._all.add(worker)
+        return worker
+
+    def _retire(self, worker, kill=False):
+        with self._lock:
+            self._all.discard(worker)
+        worker.stop(kill=kill)
+        if not self._closed:
+            self._idle.put(self._spawn())
+
+    def run(self, script_path, cwd=None, args=(), timeout=DEFAULT_TIMEOUT):
+        """Runs `script_path` in a warm worker and returns a ScriptResult (like subprocess.run with capture_output)."""
+        if self._closed:
+            raise RuntimeError("WarmScriptPool is closed")
+        worker = self._idle.get()
+        start = time.perf_counter()
+        pid = worker.process.pid
+        try:
+            worker.wait_ready()
+            worker.conn.send((script_path, cwd or os.getcwd(), list(args), self.memory_limit))
+            if not worker.conn.poll(timeout):
+                self._retire(worker, kill=True)
+                return ScriptResult(None, "", f"Script timed out after {timeout}s", time.perf_counter() - start, True, pid)
+            returncode, stdout, stderr, duration = worker.conn.recv()
+        except (EOFError, OSError, BrokenPipeError):
+            # The worker died mid-job (e.g. killed for exceeding memory)
+            worker.process.join(5)
+            exitcode = worker.process.exitcode
+            self._retire(worker, kill=True)
+            return ScriptResult(exitcode if exitcode else 1, "", f"Worker exited unexpectedly (exit code {exitcode})",
+                                time.perf_counter() - start, False, pid)
+
+        worker.jobs += 1
+        if returncode != 0 or worker.jobs >= self.max_jobs_per_worker:
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+        return ScriptResult(returncode, stdout, stderr, duration, False, pid)
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            workers = list(self._all)
+            self._all.clear()
+        for worker in workers:
+            worker.stop()
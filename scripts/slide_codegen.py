@@ -0,0 +1,344 @@
+import argparse
+import ast
+import asyncio
+import functools
+import hashlib
+import json
+import pprint
+import re
+import runpy
+import time
+
+from code_gate import DEFAULT_REPAIR_ROUNDS, RepairLoop, check_generated_code, format_problems
+from http_client import get_client
+from llm_cache import LLMResponseCache, request_cache_key
+from llm_client import DEFAULT_MODEL, ChatClient, chat_endpoint
+from prompt_builder import SYSTEM_PROMPT, build_messages, build_repair_messages, field_schema, log_token_usage
+from slide_compiler import SLIDE_DEFINITIONS_PATH, check_slide_definitions
+from tracing import span
+
+SPLIT_MODES = ("slide_type", "slide")
+DEFAULT_CONCURRENCY = 4
+OUTPUT_PATH = "scripts/generated_slide_builder.py"
+
+_CODE_BLOCK_RE = re.compile(r"```(?:python)?\s*\n(.*?)```", re.DOTALL)
+
+# Names the assembled builder provides to every renderer. The same for every renderer, so it
+# goes in the system message ahead of the per-renderer request (provider prefix caching).
+_RENDERER_CONTRACT = """Hàm sẽ được ghép vào một file đã có sẵn các import sau, hãy chỉ dùng chúng (import khác đặt trong thân hàm):
+    import os
+    from pptx.util import Inches, Pt
+    from pptx.enum.text import MSO_AUTO_SIZE
+    from chart_renderer import create_chart_image  # create_chart_image(financial_data, chart_definition, output_path) -> đường dẫn ảnh PNG hoặc None
+    from deck_builder import slide_layout_for  # slide_layout_for(prs, "title" | "title_and_content" | "title_only") -> bố cục slide
+
+Chữ ký bắt buộc: `def <tên hàm>(prs, slide_def, financial_data, chart_dir):`, tên hàm được cho ở cuối yêu cầu.
+*   `prs`: pptx.Presentation, có thể dựng trên template doanh nghiệp với bố cục xếp theo thứ tự khác: lấy bố cục bằng `slide_layout_for(prs, ...)` (tìm theo tên), không dùng chỉ số `prs.slide_layouts[...]`.
+*   `slide_def`: dict định nghĩa slide.
+*   `financial_data`: MetricStore; `financial_data.series(data_source_title, data_key, x_axis_keys)` trả về list giá trị (NaN nếu thiếu) hoặc None.
+*   `chart_dir`: thư mục tạm để lưu ảnh biểu đồ.
+Hàm thêm đúng một slide vào `prs` và in ra một dòng mô tả slide đã tạo.
+Chỉ trả về định nghĩa hàm trong một khối ```python, không kèm giải thích."""
+
+# Follow-up turn when the assembled builder fails the code gate in one renderer
+_RENDERER_REPAIR_TASK = ("Hàm vừa trả về không qua được kiểm tra khi ghép vào file. Các lỗi (kèm dòng code "
+                         "tương ứng trong hàm):\n{problems}\n"
+                         "Hãy sửa các lỗi này và trả về toàn bộ hàm đã sửa trong một khối ```python.")
+
+
+def load_slide_definitions(path=SLIDE_DEFINITIONS_PATH):
+    return runpy.run_path(path)["slide_definitions"]
+
+
+def _payload(prompt, model):
+    return {"model": model, "messages": build_messages(SYSTEM_PROMPT, [_RENDERER_CONTRACT], [prompt], model=model)}
+
+
+def definition_hash(slide_def):
+    encoded = json.dumps(slide_def, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def plan_renderers(slide_definitions, split):
+    """
+    Returns (renderer specs, renderer name per slide). A spec is (name, label, user prompt).
+    Per `slide_type`, the prompt only carries the union schema of that type, so editing a
+    slide's text reuses the cached renderer; per `slide`, it carries the full definition.
+    """
+    specs = {}
+    slide_renderers = []
+    if split == "slide_type":
+        fields_by_type = {}
+        for slide_def in slide_definitions:
+            fields_by_type.setdefault(slide_def["slide_type"], {}).update(field_schema(slide_def))
+        for slide_type, fields in fields_by_type.items():
+            name = f"render_{slide_type}"
+            schema = "\n".join(f"    {key}: {fields[key]}" for key in sorted(fields))
+            prompt = (f"Viết một hàm Python dùng `python-pptx` để tạo một slide loại `{slide_type}`.\n"
+                      f"Các trường có thể có trong `slide_def` (trường không bắt buộc có thể vắng mặt):\n{schema}\n"
+                      f"Tên hàm: `{name}`")
+            specs[slide_type] = (name, f"slide_type '{slide_type}'", prompt)
+        slide_renderers = [specs[slide_def["slide_type"]][0] for slide_def in slide_definitions]
+    else:
+        for index, slide_def in enumerate(slide_definitions, start=1):
+            digest = definition_hash(slide_def)
+            name = f"render_slide_{digest[:12]}"
+            if digest not in specs:
+                prompt = ("Viết một hàm Python dùng `python-pptx` để tạo đúng slide sau:\n"
+                          f"{json.dumps(slide_def, ensure_ascii=False, indent=2)}\n"
+                          f"Tên hàm: `{name}`")
+                specs[digest] = (name, f"slide {index} ('{slide_def.get('title', '')}')", prompt)
+            slide_renderers.append(name)
+    return list(specs.values()), slide_renderers
+
+
+def extract_function(text, name):
+    """Returns the fenced code of a completion if it parses and defines `name` at top level, else raises ValueError."""
+    match = _CODE_BLOCK_RE.search(text)
+    code = (match.group(1) if match else text).strip()
+    try:
+        tree = ast.parse(code)
+    except SyntaxError as e:
+        raise ValueError(f"syntax error on line {e.lineno}: {e.msg}") from e
+    if not any(isinstance(node, ast.FunctionDef) and node.name == name for node in tree.body):
+        raise ValueError(f"no top-level function named '{name}'")
+    return code
+
+
+async def _complete_all(url, headers, payloads, concurrency):
+    client = get_client()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def complete(payload):
+        async with semaphore:
+            response = await client.apost(url, headers=headers, json=payload)
+            response.raise_for_status()
+            return response.json()
+
+    return await asyncio.gather(*(complete(payload) for payload in payloads), return_exceptions=True)
+
+
+def assemble_builder(slide_definitions, renderer_codes, slide_renderers, split):
+    """Source of a standalone deck builder made of the renderer functions and a dispatch loop."""
+    renderers = "\n\n\n".join(renderer_codes)
+    return f'''# Generated by slide_codegen.py (one renderer per {split}); regenerate instead of editing by hand.
+import os
+import tempfile
+
+from pptx import Presentation
+from pptx.enum.text import MSO_AUTO_SIZE
+from pptx.util import Inches, Pt
+
+from chart_cache import ChartCache
+from chart_renderer import create_chart_image_cached
+from deck_builder import slide_layout_for
+from metric_store import load_metric_store
+
+OUTPUT_PPTX_FILENAME = "Bao_Cao_Tai_Chinh_Doanh_Nghiep.pptx"
+FINANCIAL_DATA_PATH = "data/financial_highlights.json"
+
+slide_definitions = {pprint.pformat(slide_definitions, width=110, sort_dicts=False)}
+
+# Renderer of each slide, in order
+SLIDE_RENDERERS = {pprint.pformat(slide_renderers, width=110)}
+
+# Charts come from the shared chart cache (prewarmed while the renderers were generated)
+_chart_cache = ChartCache()
+
+
+def create_chart_image(financial_data, chart_definition, output_path):
+    return create_chart_image_cached(financial_data, chart_definition, output_path, _chart_cache)
+
+
+{renderers}
+
+
+def build_presentation(output_filename=OUTPUT_PPTX_FILENAME):
+    financial_data = load_metric_store(FINANCIAL_DATA_PATH)
+    prs = Presentation()
+    with tempfile.TemporaryDirectory() as chart_dir:
+        for slide_def, renderer_name in zip(slide_definitions, SLIDE_RENDERERS):
+            globals()[renderer_name](prs, slide_def, financial_data, chart_dir)
+        prs.save(output_filename)
+    print(f"Presentation saved to '{{output_filename}}'")
+
+
+if __name__ == "__main__":
+    build_presentation()
+'''
+
+
+def _code_line_range(source, code):
+    """(first, last) line of `code` within the assembled `source`."""
+    first = source[:source.index(code)].count("\n") + 1
+    return first, first + code.count("\n")
+
+
+def _problems_by_renderer(source, codes, problems):
+    """
+    Splits the gate problems of an assembled builder into {renderer index: problems}, with line
+    numbers relative to the renderer's code, and the problems outside every renderer.
+    """
+    ranges = [_code_line_range(source, code) for code in codes]
+    by_renderer = {}
+    unowned = []
+    for lineno, message in problems:
+        owner = next((i for i, (first, last) in enumerate(ranges) if first <= lineno <= last), None)
+        if owner is None:
+            unowned.append((lineno, message))
+        else:
+            by_renderer.setdefault(owner, []).append((lineno - ranges[owner][0] + 1, message))
+    return by_renderer, unowned
+
+
+def _repair_renderer(i, specs, payloads, contents, codes, assemble, output_path, endpoint, model, use_cache,
+                     max_repair_rounds):
+    """
+    Sends a renderer rejected within the assembled builder back to the model through RepairLoop.
+    Each answer is gated by assembling it with the other renderers and keeping the problems that
+    fall inside it. Returns the repaired code, or None when the repair rounds run out.
+    """
+    name, label, _ = specs[i]
+    base_messages = payloads[i]["messages"]
+    client = ChatClient(*endpoint, model=model, use_cache=use_cache, label=f"renderer {label}")
+
+    def complete(messages):
+        # The first answer is the one already fetched; only repairs are requested
+        return contents[i] if messages is base_messages else client.complete(messages)
+
+    def check(response_code):
+        try:
+            code = extract_function(response_code, name)
+        except ValueError as e:
+            return [(0, str(e))]
+        trial = codes[:i] + [code] + codes[i + 1:]
+        source = assemble(trial)
+        by_renderer, _ = _problems_by_renderer(source, trial, check_generated_code(source, output_path))
+        return by_renderer.get(i, [])
+
+    print(f"Repairing {label}...")
+    loop = RepairLoop(complete, base_messages, functools.partial(build_repair_messages, task=_RENDERER_REPAIR_TASK),
+                      output_path, max_repair_rounds, check=check, rejected=client.reject)
+    try:
+        repaired = loop.generate()
+        if repaired is not None:
+            client.accept()
+    finally:
+        client.close()
+    return None if repaired is None else extract_function(repaired, name)
+
+
+def generate_slide_builder(split="slide_type", use_cache=True, output_path=OUTPUT_PATH,
+                           definitions_path=SLIDE_DEFINITIONS_PATH, model=DEFAULT_MODEL,
+                           concurrency=DEFAULT_CONCURRENCY, max_repair_rounds=DEFAULT_REPAIR_ROUNDS):
+    """
+    Generates one renderer function per slide type (or per slide) with concurrent API calls,
+    caching each by the hash of its own request, and assembles them into `output_path`.
+    When the assembled builder fails the code gate, each renderer the problems are in is sent
+    back to the model with its problems, for up to `max_repair_rounds` repairs per renderer.
+    Returns the output path, or None when the API key is missing, the definitions reference data that
+    does not exist, a renderer could not be generated or the assembled builder fails the code gate.
+    """
+    endpoint = chat_endpoint()
+    if endpoint is None:
+        return None
+    url, headers = endpoint
+
+    if not check_slide_definitions(definitions_path):
+        return None
+    slide_definitions = load_slide_definitions(definitions_path)
+    specs, slide_renderers = plan_renderers(slide_definitions, split)
+    payloads = [_payload(prompt, model) for _, _, prompt in specs]
+
+    cache = LLMResponseCache() if use_cache else None
+    try:
+        # SQLite connections stay on this thread: lookups before, stores after the concurrent calls
+        results = [cache.get(payload) if cache else None for payload in payloads]
+        missing = [i for i, result in enumerate(results) if result is None]
+        start = time.perf_counter()
+        if missing:
+            print(f"Generating {len(missing)} of {len(specs)} renderer(s) via AI ({min(concurrency, len(missing))} at a time)...")
+            with span("llm_request", model=model, renderers=len(missing), concurrency=concurrency):
+                fetched = asyncio.run(_complete_all(url, headers, [payloads[i] for i in missing], concurrency))
+            for i, result in zip(missing, fetched):
+                results[i] = result
+
+        codes = []
+        contents = []
+        errors = []
+        for i, ((name, label, _), result) in enumerate(zip(specs, results)):
+            if isinstance(result, Exception):
+                errors.append(f"{label}: request failed: {result}")
+                continue
+            log_token_usage(f"renderer {label}", payloads[i], result, from_cache=i not in missing)
+            try:
+                contents.append(result["choices"][0]["message"]["content"])
+                codes.append(extract_function(contents[-1], name))
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                errors.append(f"{label}: unusable response: {e}")
+
+        print(f"Renderers: {len(specs) - len(missing)} from cache, {len(missing)} requested "
+              f"in {time.perf_counter() - start:.2f}s")
+        if errors:
+            for error in errors:
+                print(f"Error: {error}")
+            return None
+
+        assemble = functools.partial(assemble_builder, slide_definitions, slide_renderers=slide_renderers, split=split)
+        source = assemble(codes)
+        by_renderer, unowned = _problems_by_renderer(source, codes, check_generated_code(source, output_path))
+        if unowned:
+            print(f"Error: the assembled builder failed the code gate:\n{format_problems(source, unowned)}")
+            return None
+        # Only renderers the gate accepted are cached; a rejected cached one is not replayed again
+        for i, payload in enumerate(payloads):
+            if cache and i in by_renderer and i not in missing:
+                cache.delete(payload)
+            elif cache and i not in by_renderer and i in missing:
+                cache.put(payload, results[i])
+    finally:
+        if cache:
+            cache.close()
+
+    if by_renderer:
+        for i in sorted(by_renderer):
+            repaired = _repair_renderer(i, specs, payloads, contents, codes, assemble, output_path, endpoint, model,
+                                        use_cache, max_repair_rounds)
+            if repaired is None:
+                print(f"Error: {specs[i][1]} still fails the code gate; the builder was not saved.")
+                return None
+            codes[i] = repaired
+        source = assemble(codes)
+        problems = check_generated_code(source, output_path)
+        if problems:
+            print(f"Error: the assembled builder failed the code gate:\n{format_problems(source, problems)}")
+            return None
+
+    with span("code_write", path=output_path), open(output_path, "w", encoding="utf-8") as f:
+        f.write(source)
+    print(f"Successfully assembled the deck builder to '{output_path}'")
+    return output_path
+
+
+def renderer_cache_keys(split="slide_type", definitions_path=SLIDE_DEFINITIONS_PATH, model=DEFAULT_MODEL):
+    """{renderer label: cache key} for the current definitions, to see which renderers an edit invalidates."""
+    specs, _ = plan_renderers(load_slide_definitions(definitions_path), split)
+    return {label: request_cache_key(_payload(prompt, model)) for _, label, prompt in specs}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate one renderer per slide type or slide and assemble a deck builder.")
+    parser.add_argument("--split", choices=SPLIT_MODES, default="slide_type")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API, bypassing the local response cache.")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--repair-rounds", type=int, default=DEFAULT_REPAIR_ROUNDS,
+                        help="How many times a renderer that fails the code gate is sent back to the model to fix.")
+    parser.add_argument("--keys", action="store_true", help="Only print the cache key of each renderer.")
+    args = parser.parse_args()
+
+    if args.keys:
+        for label, key in renderer_cache_keys(args.split).items():
+            print(f"{key[:16]}  {label}")
+    else:
+        generate_slide_builder(args.split, use_cache=not args.no_cache, concurrency=args.concurrency,
+                               max_repair_rounds=args.repair_rounds)
@@ -0,0 +1,198 @@
+import argparse
+import collections
+import difflib
+import math
+import os
+import runpy
+import time
+
+import numpy as np
+
+from chart_renderer import CHART_TYPES
+from derived_metrics import TRANSFORMS, chart_series
+from metric_store import load_metric_store
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FINANCIAL_DATA_PATH = os.path.join(PROJECT_ROOT, "data", "financial_highlights.json")
+SLIDE_DEFINITIONS_PATH = os.path.join(PROJECT_ROOT, "prompts", "slide_definitions.py")
+
+# Keys every slide of a type must have (the builder reads them unconditionally)
+REQUIRED_FIELDS = {
+    "title_slide": ("title", "subtitle", "notes"),
+    "section_header": ("title", "subtitle"),
+    "title_and_content": ("title",),
+    "title_and_chart": ("title", "chart_definition"),
+}
+REQUIRED_CHART_FIELDS = ("data_source_title", "data_key", "chart_type", "x_axis_keys", "chart_title")
+# Slide keys naming images; a missing file is skipped by the builder, so it is only a warning
+IMAGE_FIELDS = ("logo_path", "image_path")
+
+CompiledSlide = collections.namedtuple(
+    "CompiledSlide",
+    ["index", "slide_type", "definition", "series", "assets"],
+)
+RenderPlan = collections.namedtuple("RenderPlan", ["slides", "warnings"])
+
+
+class FrozenDict(dict):
+    """A dict that cannot be modified. Still a dict for json, isinstance checks and pickling."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Compiled slide definitions are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+def freeze(value):
+    """Deep read-only copy of a slide definition: dicts become FrozenDicts, lists tuples."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class SlideDefinitionError(ValueError):
+    """Raised by compile_slides with every problem found, not just the first."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__(f"{len(self.errors)} problem(s) in the slide definitions:\n"
+                         + "\n".join(f"  {error}" for error in self.errors))
+
+
+def _suggest(name, candidates):
+    matches = difflib.get_close_matches(str(name), list(candidates), n=1, cutoff=0.6)
+    return f" (did you mean '{matches[0]}'?)" if matches else ""
+
+
+def _check_chart(where, chart_def, financial_data, errors, warnings):
+    """Checks one chart definition against the data index. Returns its series, or None after an error."""
+    missing = [key for key in REQUIRED_CHART_FIELDS if key not in chart_def]
+    if missing:
+        errors.append(f"{where}: chart_definition is missing {', '.join(missing)}")
+        return None
+    if chart_def["chart_type"] not in CHART_TYPES:
+        errors.append(f"{where}: unsupported chart_type '{chart_def['chart_type']}' "
+                      f"(expected one of {', '.join(CHART_TYPES)})")
+    periods = chart_def["x_axis_keys"]
+    if not isinstance(periods, (list, tuple)) or not periods or not all(isinstance(p, str) for p in periods):
+        errors.append(f"{where}: x_axis_keys must be a non-empty list of period labels")
+        return None
+
+    title, metric = chart_def["data_source_title"], chart_def["data_key"]
+    table = financial_data.table(title)
+    if table is None:
+        errors.append(f"{where}: table '{title}' not found{_suggest(title, financial_data.tables)}")
+        return None
+    if table.metric_row(metric) is None:
+        errors.append(f"{where}: metric '{metric}' not found in '{title}'{_suggest(metric, table.metrics)}")
+        return None
+
+    transform = chart_def.get("transform")
+    if transform is None:
+        missing_periods = [period for period in periods if table.period_column(period) is None]
+        if missing_periods:
+            errors.append(f"{where}: period(s) {', '.join(missing_periods)} not in '{title}'")
+            return None
+    elif transform not in TRANSFORMS:
+        errors.append(f"{where}: unknown transform '{transform}' (expected one of {', '.join(TRANSFORMS)})")
+        return None
+    elif transform in ("change", "cagr"):
+        base_period = chart_def.get("base_period")
+        if not base_period:
+            errors.append(f"{where}: transform '{transform}' needs a base_period")
+            return None
+        if table.period_column(base_period) is None:
+            errors.append(f"{where}: base_period '{base_period}' not in '{title}'")
+            return None
+
+    series = chart_series(financial_data, chart_def)
+    empty = [period for period, value in zip(periods, series) if math.isnan(value)]
+    if len(empty) == len(periods):
+        errors.append(f"{where}: '{metric}' has no values for {', '.join(periods)}"
+                      + (f" with transform '{transform}'" if transform else ""))
+        return None
+    if empty:
+        warnings.append(f"{where}: '{metric}' has no value for {', '.join(empty)} (plotted as 0)")
+    series.setflags(write=False)
+    return series
+
+
+def compile_slides(slide_defs, financial_data):
+    """
+    Checks every slide definition against the loaded data in one pass, before anything is
+    rendered. Each chart's table, metric and periods (or derived series) must be present.
+    Raises SlideDefinitionError listing every problem. Otherwise returns a RenderPlan: a tuple
+    of CompiledSlide (read-only definition, chart series already looked up, image paths) plus
+    the non-fatal warnings.
+    """
+    errors = []
+    warnings = []
+    slides = []
+    for index, slide_def in enumerate(slide_defs):
+        if not isinstance(slide_def, dict):
+            errors.append(f"slide {index + 1}: expected a dict, got {type(slide_def).__name__}")
+            continue
+        where = f"slide {index + 1} ('{slide_def.get('title', '')}')"
+        slide_type = slide_def.get("slide_type")
+        if slide_type not in REQUIRED_FIELDS:
+            errors.append(f"{where}: unknown slide_type '{slide_type}'{_suggest(slide_type, REQUIRED_FIELDS)}")
+            continue
+        missing = [key for key in REQUIRED_FIELDS[slide_type] if key not in slide_def]
+        if missing:
+            errors.append(f"{where}: {slide_type} is missing {', '.join(missing)}")
+            continue
+
+        series = None
+        if slide_type == "title_and_chart":
+            chart_def = slide_def["chart_definition"]
+            if not isinstance(chart_def, dict):
+                errors.append(f"{where}: chart_definition must be a dict")
+                continue
+            series = _check_chart(where, chart_def, financial_data, errors, warnings)
+            if series is None:
+                continue
+
+        assets = tuple(slide_def[key] for key in IMAGE_FIELDS if slide_def.get(key))
+        for path in assets:
+            if not os.path.exists(path):
+                warnings.append(f"{where}: image '{path}' not found (skipped)")
+        slides.append(CompiledSlide(index, slide_type, freeze(slide_def), series, assets))
+
+    if errors:
+        raise SlideDefinitionError(errors)
+    return RenderPlan(tuple(slides), tuple(warnings))
+
+
+def check_slide_definitions(definitions_path=SLIDE_DEFINITIONS_PATH, data_path=FINANCIAL_DATA_PATH):
+    """
+    Compiles a slide definitions file against a data file and prints the result, so the
+    generators can stop before an LLM call whose output could not render. Returns True if
+    every reference resolves.
+    """
+    start = time.perf_counter()
+    try:
+        slide_defs = runpy.run_path(definitions_path)["slide_definitions"]
+        plan = compile_slides(slide_defs, load_metric_store(data_path))
+    except SlideDefinitionError as e:
+        print(f"Error: {definitions_path} does not match {data_path}. {e}")
+        return False
+    for warning in plan.warnings:
+        print(f"Warning: {warning}")
+    print(f"Checked {len(plan.slides)} slide(s) of {definitions_path} against {data_path} "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check slide definitions against the financial data.")
+    parser.add_argument("--definitions", default=SLIDE_DEFINITIONS_PATH)
+    parser.add_argument("--data", default=FINANCIAL_DATA_PATH)
+    args = parser.parse_args()
+
+    raise SystemExit(0 if check_slide_definitions(args.definitions, args.data) else 1)
@@ -0,0 +1,151 @@
+import atexit
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+# Setting this to a file path turns tracing on, also in child processes (e.g. the generated builder)
+TRACE_ENV = "REPORT_TRACE"
+DEFAULT_TRACE_PATH = "trace.jsonl"
+
+_LOGGER_NAME = "report.trace"
+_NOOP = contextlib.nullcontext()
+
+_enabled = False
+_listener = None
+_logger = logging.getLogger(_LOGGER_NAME)
+_logger.propagate = False
+_span_ids = itertools.count(1)
+_current_span = contextvars.ContextVar("current_span", default=None)
+_summary = {}
+_summary_lock = threading.Lock()
+
+
+class _JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.span, ensure_ascii=False, default=str)
+
+
+def tracing_enabled():
+    return _enabled
+
+
+def enable_tracing(path=None):
+    """
+    Starts writing spans as JSON lines to `path` (default: $REPORT_TRACE or trace.jsonl).
+    Records go through a QueueHandler; a QueueListener thread does the file I/O, so the
+    traced code never blocks on disk. Calling it again while enabled does nothing.
+    """
+    global _enabled, _listener
+    if _enabled:
+        return
+    path = path or os.environ.get(TRACE_ENV) or DEFAULT_TRACE_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    file_handler = logging.FileHandler(path, mode="a", encoding="utf-8")
+    file_handler.setFormatter(_JsonLinesFormatter())
+    span_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(span_queue, file_handler)
+    _listener.start()
+    _logger.handlers[:] = [logging.handlers.QueueHandler(span_queue)]
+    _logger.setLevel(logging.INFO)
+    _enabled = True
+    atexit.register(shutdown_tracing)
+
+
+def enable_tracing_from_env():
+    """Enables tracing when $REPORT_TRACE is set. Returns whether tracing is on."""
+    if os.environ.get(TRACE_ENV):
+        enable_tracing(os.environ[TRACE_ENV])
+    return _enabled
+
+
+def shutdown_tracing():
+    """Flushes pending spans, closes the trace file and turns tracing off."""
+    global _enabled, _listener
+    if not _enabled:
+        return
+    _enabled = False
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+    _logger.handlers[:] = []
+
+
+def _emit(name, span_id, parent_id, start_wall, duration_s, status, attrs):
+    with _summary_lock:
+        stats = _summary.setdefault(name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += duration_s
+        stats[2] = max(stats[2], duration_s)
+    span = {
+        "name": name,
+        "span_id": span_id,
+        "parent_id": parent_id,
+        "pid": os.getpid(),
+        "start": round(start_wall, 6),
+        "duration_ms": round(duration_s * 1000, 3),
+        "status": status,
+    }
+    if attrs:
+        span["attrs"] = attrs
+    record = logging.LogRecord(_LOGGER_NAME, logging.INFO, __file__, 0, name, None, None)
+    record.span = span
+    _logger.handle(record)
+
+
+@contextlib.contextmanager
+def _span(name, attrs):
+    span_id = next(_span_ids)
+    parent_id = _current_span.get()
+    token = _current_span.set(span_id)
+    start_wall = time.time()
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _current_span.reset(token)
+        _emit(name, span_id, parent_id, start_wall, time.perf_counter() - start, status, attrs)
+
+
+def span(name, **attrs):
+    """
+    Times the enclosed block as a span nested under the current one. When tracing is off
+    this returns a shared no-op context manager, so the cost is one function call.
+    """
+    if not _enabled:
+        return _NOOP
+    return _span(name, attrs)
+
+
+def record_span(name, duration_s, **attrs):
+    """Records a span timed elsewhere (e.g. in a worker process) under the current span."""
+    if not _enabled:
+        return
+    _emit(name, next(_span_ids), _current_span.get(), time.time() - duration_s, duration_s, "ok", attrs)
+
+
+def summary_table():
+    """Per span name: count, total, mean and max duration, slowest total first."""
+    with _summary_lock:
+        rows = sorted(_summary.items(), key=lambda item: item[1][1], reverse=True)
+    if not rows:
+        return "No spans recorded."
+    width = max(len("span"), *(len(name) for name, _ in rows))
+    lines = [f"{'span':<{width}} {'count':>6} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"]
+    for name, (count, total, longest) in rows:
+        lines.append(f"{name:<{width}} {count:>6} {total * 1000:>10.1f} {total / count * 1000:>9.1f} "
+                     f"{longest * 1000:>9.1f}")
+    return "\n".join(lines)
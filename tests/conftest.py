@@ -0,0 +1,7 @@
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(PROJECT_ROOT, "scripts")
+# The scripts are run directly and import their siblings by bare name
+sys.path.insert(0, SCRIPTS_DIR)
@@ -0,0 +1,105 @@
+import json
+import os
+
+import docx
+
+from batch_convert_docx import HISTORY_TITLE, ConversionCache, bank_of, convert_batch, file_digest, merge_history
+
+
+def _report(tmp_path, bank, name, title, rows):
+    document = docx.Document()
+    document.add_paragraph(title)
+    table = document.add_table(rows=len(rows), cols=len(rows[0]))
+    for i, values in enumerate(rows):
+        for j, value in enumerate(values):
+            table.cell(i, j).text = value
+    folder = tmp_path / "reports" / bank
+    folder.mkdir(parents=True, exist_ok=True)
+    document.save(folder / name)
+    return str(folder / name)
+
+
+def _highlights(total_assets):
+    return [{"VND bn": "Total assets", "2Q25": total_assets}]
+
+
+def test_same_metric_of_two_banks_is_not_a_conflict():
+    reports = {"tcb/2Q25.docx": {"1H25 Financial Highlights": _highlights("1,037,645")},
+               "vcb/2Q25.docx": {"1H25 Financial Highlights": _highlights("2,150,000")}}
+    banks = {"tcb/2Q25.docx": "Techcombank", "vcb/2Q25.docx": "Vietcombank"}
+
+    histories, period_index, conflicts = merge_history(reports, banks)
+
+    assert conflicts == []
+    assert period_index == ["2Q25"]
+    assert histories == {"Techcombank": [{"VND bn": "Total assets", "2Q25": "1,037,645"}],
+                         "Vietcombank": [{"VND bn": "Total assets", "2Q25": "2,150,000"}]}
+
+
+def test_restated_value_within_a_bank_is_a_conflict_won_by_the_later_report():
+    reports = {"tcb/1H25.docx": {"1H25 Financial Highlights": _highlights("1,037,645")},
+               "tcb/9M25.docx": {"9M25 Financial Highlights": _highlights("1,037,700")}}
+
+    histories, _, conflicts = merge_history(reports, dict.fromkeys(reports, "Techcombank"))
+
+    assert histories["Techcombank"] == [{"VND bn": "Total assets", "2Q25": "1,037,700"}]
+    assert [(c["bank"], c["kept"]["value"], c["replaced"]["value"]) for c in conflicts] == [
+        ("Techcombank", "1,037,700", "1,037,645")]
+
+
+def test_banks_come_from_folders_or_file_name_patterns(tmp_path):
+    rows = [["VND bn", "2Q25"], ["Total assets", "1,037,645"]]
+    _report(tmp_path, "techcombank", "2Q25.docx", "1H25 Financial Highlights", rows)
+    vcb = _report(tmp_path, "misc", "vcb_2Q25.docx", "1H25 Financial Highlights",
+                  [["VND bn", "2Q25"], ["Total assets", "2,150,000"]])
+    assert bank_of(vcb) == "misc"
+    json_path, index_path = tmp_path / "history.json", tmp_path / "index.json"
+
+    convert_batch(str(tmp_path / "reports" / "**" / "*.docx"), str(json_path), str(index_path),
+                  str(tmp_path / "cache"), workers=1, banks={"vcb_*.docx": "Vietcombank"})
+
+    history = json.loads(json_path.read_text(encoding="utf-8"))
+    assert history == {f"techcombank {HISTORY_TITLE}": [{"VND bn": "Total assets", "2Q25": "1,037,645"}],
+                       f"Vietcombank {HISTORY_TITLE}": [{"VND bn": "Total assets", "2Q25": "2,150,000"}]}
+    assert json.loads(index_path.read_text(encoding="utf-8"))["conflicts"] == []
+
+
+def test_conversion_cache_reuses_the_hash_while_size_and_mtime_are_unchanged(tmp_path):
+    path = tmp_path / "report.docx"
+    path.write_bytes(b"first")
+    cache = ConversionCache(str(tmp_path / "cache"))
+    digest = cache.digest(str(path))
+    cache.store(str(path), digest, {"1H25 Financial Highlights": _highlights("1")})
+    cache.save()
+
+    reloaded = ConversionCache(str(tmp_path / "cache"))
+    assert reloaded.load_tables(digest) == {"1H25 Financial Highlights": _highlights("1")}
+    # Same size and mtime: the recorded hash is trusted without reading the file
+    stat = os.stat(path)
+    path.write_bytes(b"other")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert reloaded.digest(str(path)) == digest
+    # A new mtime re-hashes the content
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert reloaded.digest(str(path)) == file_digest(str(path)) != digest
+    assert reloaded.load_tables(file_digest(str(path))) is None
+
+
+def test_unchanged_reports_are_not_converted_again(tmp_path, capsys):
+    rows = [["VND bn", "2Q25"], ["Total assets", "1,037,645"]]
+    _report(tmp_path, "techcombank", "2Q25.docx", "1H25 Financial Highlights", rows)
+    _report(tmp_path, "vietcombank", "2Q25.docx", "1H25 Financial Highlights", rows)
+    pattern = str(tmp_path / "reports" / "**" / "*.docx")
+    outputs = (str(tmp_path / "history.json"), str(tmp_path / "index.json"), str(tmp_path / "cache"))
+
+    convert_batch(pattern, *outputs, workers=1)
+    first = (tmp_path / "history.json").read_text(encoding="utf-8")
+    convert_batch(pattern, *outputs, workers=1)
+    _report(tmp_path, "vietcombank", "2Q25.docx", "1H25 Financial Highlights",
+            [["VND bn", "2Q25"], ["Total assets", "2,150,000"]])
+    convert_batch(pattern, *outputs, workers=1)
+
+    printed = [line for line in capsys.readouterr().out.splitlines() if line.startswith("Converted")]
+    assert [line.split(" file(s)")[0] for line in printed] == ["Converted 2 of 2", "Converted 0 of 2",
+                                                             "Converted 1 of 2"]
+    assert (tmp_path / "history.json").read_text(encoding="utf-8") != first
@@ -0,0 +1,40 @@
+import os
+import time
+
+from chart_cache import ChartCache
+
+
+def _put(cache, key, tmp_path, size=1000):
+    image = tmp_path / f"{key}.png"
+    image.write_bytes(b"x" * size)
+    return cache.put(key, str(image))
+
+
+def _age(path, seconds):
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_evicts_least_recently_used_beyond_grace(tmp_path):
+    cache = ChartCache(str(tmp_path / "cache"), max_bytes=2500, grace_s=60)
+    paths = [_put(cache, key, tmp_path) for key in ("aa01", "bb02")]
+    for i, path in enumerate(paths):
+        _age(path, 3600 - i)
+
+    # A second process sharing the directory, with no pins of its own
+    other = ChartCache(str(tmp_path / "cache"), max_bytes=2500, grace_s=60)
+    _put(other, "cc03", tmp_path)
+    assert not os.path.exists(paths[0])
+    assert os.path.exists(paths[1])
+    assert other.evictions == 1
+
+
+def test_keeps_entries_used_within_grace_by_another_process(tmp_path):
+    cache = ChartCache(str(tmp_path / "cache"), max_bytes=2500, grace_s=60)
+    prewarmed = [_put(cache, key, tmp_path) for key in ("aa01", "bb02")]
+
+    other = ChartCache(str(tmp_path / "cache"), max_bytes=2500, grace_s=60)
+    _put(other, "cc03", tmp_path)
+    assert all(os.path.exists(path) for path in prewarmed)
+    assert other.evictions == 0
+    assert other.get("aa01", "aa01.png") == prewarmed[0]
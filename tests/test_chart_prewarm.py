@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import PROJECT_ROOT
+
+# Reads prompts/slide_definitions.py, as the generator instructions ask, so its charts are the prewarmed ones
+BUILDER_SCRIPT = """import runpy
+
+from deck_builder import SLIDE_DEFINITIONS_PATH, main
+
+if __name__ == "__main__":
+    main(runpy.run_path(SLIDE_DEFINITIONS_PATH)["slide_definitions"])
+"""
+
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    """A blocking /chat/completions endpoint answering with a script that builds the definitions the prompt names."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({"choices": [{"message": {"content": self.server.answer}}],
+                           "usage": {"prompt_tokens": 10, "completion_tokens": 20}}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def completion_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CompletionHandler)
+    server.answer = f"```python\n{BUILDER_SCRIPT}```"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_generated_script_uses_prewarmed_charts(tmp_path, completion_server):
+    project = tmp_path / "project"
+    for name in ("data", "prompts", "scripts"):
+        shutil.copytree(os.path.join(PROJECT_ROOT, name), project / name, ignore=shutil.ignore_patterns("__pycache__"))
+    env = dict(os.environ, API_BASE_URL=completion_server, API_KEY="test-key")
+
+    completed = subprocess.run([sys.executable, "scripts/run_presentation_generator.py"], cwd=project, env=env,
+                               capture_output=True, text=True, encoding="utf-8", timeout=600)
+
+    assert "Prewarmed 3 of 3 chart(s)" in completed.stdout, completed.stdout + completed.stderr
+    assert "Generated script executed successfully." in completed.stdout, completed.stdout + completed.stderr
+    log = (project / "generation.log").read_text(encoding="utf-8")
+    # Every chart of the deck came from the prewarmed cache: the builder rendered none itself
+    assert "Chart cache: 3 hit(s), 0 miss(es)" in log
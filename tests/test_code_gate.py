@@ -0,0 +1,118 @@
+import os
+
+from conftest import PROJECT_ROOT, SCRIPTS_DIR
+from code_gate import RepairLoop, check_generated_code, runtime_problems, strip_code_fence
+
+SCRIPT_PATH = os.path.join(SCRIPTS_DIR, "generated_report_script.py")
+
+VALID_SCRIPT = """import json
+import runpy
+from deck_builder import OUTPUT_PPTX_FILENAME, main
+
+definitions = runpy.run_path("prompts/slide_definitions.py")["slide_definitions"]
+with open("data/financial_highlights.json", encoding="utf-8") as f:
+    data = json.load(f)
+with open("out/summary.json", "w", encoding="utf-8") as f:
+    json.dump({"slides": len(definitions), "output": OUTPUT_PPTX_FILENAME}, f)
+main(definitions)
+"""
+
+
+def _check(source):
+    return check_generated_code(source, SCRIPT_PATH, PROJECT_ROOT)
+
+
+def test_strip_code_fence_keeps_only_the_code():
+    assert strip_code_fence("Here it is:\n```python\nprint(1)\n```\nDone.") == "print(1)\n"
+    assert strip_code_fence("\nprint(1)\n") == "print(1)"
+
+
+def test_valid_script_passes():
+    # The file it writes does not need to exist, the ones it reads do
+    assert _check(VALID_SCRIPT) == []
+
+
+def test_each_problem_is_reported_with_its_line():
+    source = "\n".join([
+        "import subprocess",
+        "from deck_builder import build_everything",
+        "from .helpers import tidy",
+        "data = open('data/missing.json').read()",
+        "print(undefined_name)",
+    ])
+    problems = _check(source)
+    assert [lineno for lineno, _ in problems] == [1, 2, 3, 4, 5]
+    assert "import of 'subprocess' is not allowed" in problems[0][1]
+    assert problems[1][1] == "'build_everything' is not defined in deck_builder"
+    assert problems[2][1] == "relative imports do not work in a script run directly"
+    assert problems[3][1] == "file 'data/missing.json' does not exist"
+    assert problems[4][1] == "name 'undefined_name' is not defined (missing import?)"
+
+
+def test_syntax_errors_and_empty_responses_are_rejected():
+    assert _check("def broken(:\n    pass\n") == [(1, "SyntaxError: invalid syntax")]
+    assert _check("\n") == [(0, "the response contains no code")]
+
+
+def test_runtime_problems_point_at_the_deepest_script_frame():
+    stderr = (
+        "Traceback (most recent call last):\n"
+        f'  File "{SCRIPT_PATH}", line 12, in <module>\n'
+        "    main(definitions)\n"
+        f'  File "{SCRIPT_PATH}", line 7, in main\n'
+        "    total = data['missing']\n"
+        '  File "/usr/lib/python3/site-packages/pandas/core/frame.py", line 3761, in __getitem__\n'
+        "KeyError: 'missing'\n"
+    )
+    assert runtime_problems(stderr, SCRIPT_PATH) == [(7, "runtime error: KeyError: 'missing'")]
+    assert runtime_problems("", SCRIPT_PATH) == [(0, "the script exited with an error and no output")]
+
+
+class _Model:
+    """Answers with the given responses in turn and records the repair turns it was sent."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.repairs = []
+        self.rejections = 0
+
+    def complete(self, messages):
+        return self.responses.pop(0)
+
+    def build_repair_messages(self, messages, previous_response, problems):
+        self.repairs.append(problems)
+        return list(messages) + [{"role": "assistant", "content": previous_response},
+                                 {"role": "user", "content": problems}]
+
+    def rejected(self):
+        self.rejections += 1
+
+
+def _loop(model, max_repair_rounds=2):
+    return RepairLoop(model.complete, [{"role": "user", "content": "Write it."}], model.build_repair_messages,
+                      SCRIPT_PATH, max_repair_rounds, project_dir=PROJECT_ROOT, rejected=model.rejected)
+
+
+def test_repair_loop_sends_back_only_the_problems():
+    model = _Model("```python\nprint(missing)\n```", f"```python\n{VALID_SCRIPT}```")
+    assert _loop(model).generate() == VALID_SCRIPT
+    assert model.repairs == ["- line 1 `print(missing)`: name 'missing' is not defined (missing import?)"]
+    assert model.rejections == 1
+
+
+def test_repair_loop_gives_up_when_the_rounds_run_out():
+    model = _Model("import subprocess", "import subprocess", "import subprocess")
+    assert _loop(model, max_repair_rounds=1).generate() is None
+    assert (len(model.repairs), model.rejections) == (1, 2)
+    # The unused third answer was never requested
+    assert model.responses == ["import subprocess"]
+
+
+def test_runtime_repairs_share_the_round_budget():
+    repaired = VALID_SCRIPT.replace("main(definitions)", "main(definitions, [])")
+    model = _Model(f"```python\n{VALID_SCRIPT}```", f"```python\n{repaired}```")
+    loop = _loop(model, max_repair_rounds=1)
+    assert loop.generate() == VALID_SCRIPT
+    assert loop.repair([(10, "runtime error: TypeError")]) == repaired
+    assert model.repairs == ["- line 10 `main(definitions)`: runtime error: TypeError"]
+    assert loop.repair([(10, "runtime error: TypeError")]) is None
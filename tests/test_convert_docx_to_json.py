@@ -0,0 +1,60 @@
+import glob
+import json
+import os
+
+import docx
+import pytest
+
+from conftest import PROJECT_ROOT
+from convert_docx_to_json import docx_to_json, iter_docx_tables
+
+SAMPLE_DOCX = sorted(glob.glob(os.path.join(PROJECT_ROOT, "data", "*.docx")))
+
+
+def _convert_both_ways(docx_path, tmp_path):
+    outputs = []
+    for streaming in (False, True):
+        json_path = tmp_path / f"out_{streaming}.json"
+        docx_to_json(docx_path, str(json_path), streaming=streaming)
+        with open(json_path, "r", encoding="utf-8") as f:
+            outputs.append(json.load(f))
+    return outputs
+
+
+@pytest.mark.parametrize("docx_path", SAMPLE_DOCX, ids=os.path.basename)
+def test_streaming_matches_python_docx_on_sample(docx_path, tmp_path):
+    python_docx, streaming = _convert_both_ways(docx_path, tmp_path)
+    assert python_docx
+    assert streaming == python_docx
+
+
+def test_streaming_matches_python_docx_on_merged_cells_and_empty_rows(tmp_path):
+    document = docx.Document()
+    document.add_paragraph("Intro text that is not a title")
+    document.add_paragraph("2Q25 Financial Highlights")
+    table = document.add_table(rows=5, cols=4)
+    for i, values in enumerate([["VND bn", "2Q24", "2Q25", "YoY"],
+                                ["Income", "1,000", "1,200", "20%"],
+                                ["", "", "", ""],
+                                ["NPL", "1.1%", "1.3%", "+20 bps"],
+                                ["Note", "", "", ""]]):
+        for j, value in enumerate(values):
+            table.cell(i, j).text = value
+    # Horizontal merge across the header, vertical merge down the label column, and a
+    # merged note row: python-docx repeats merged cells in row.cells, the streaming parser must too
+    table.cell(0, 2).merge(table.cell(0, 3))
+    table.cell(3, 0).merge(table.cell(4, 0))
+    table.cell(4, 1).merge(table.cell(4, 3))
+    document.add_paragraph("3Q25 Financial Highlights")
+    document.add_table(rows=0, cols=2)  # empty table: skipped, the title carries over
+    empty_rows = document.add_table(rows=3, cols=2)
+    empty_rows.cell(0, 0).text = "Metric"
+    empty_rows.cell(0, 1).text = "3Q25"
+    docx_path = tmp_path / "synthetic.docx"
+    document.save(docx_path)
+
+    python_docx, streaming = _convert_both_ways(str(docx_path), tmp_path)
+    assert streaming == python_docx
+    assert list(streaming) == ["2Q25 Financial Highlights", "3Q25 Financial Highlights"]
+    assert streaming["3Q25 Financial Highlights"] == [{"Metric": "", "3Q25": ""}] * 2
+    assert list(iter_docx_tables(str(docx_path))) == list(iter_docx_tables(str(docx_path), streaming=False))
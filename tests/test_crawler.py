@@ -0,0 +1,121 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawler import PageCache, crawl, extract_tables, fetch_pages
+
+ETAG = '"highlights-v1"'
+HIGHLIGHTS_PAGE = """<html><body>
+<h1>Investor relations</h1>
+<h2 class="table-title">2Q25 Financial Highlights</h2>
+<p>Unaudited.</p>
+<table>
+  <tr><th>VND bn</th><th>2Q24</th><th>2Q25</th></tr>
+  <tr><td>Total operating income</td><td>10,208</td><td>11,538</td></tr>
+  <tr><td>Profit before tax</td><td>6,849</td><td>7,781</td></tr>
+</table>
+<h2 class="table-title">Balance Sheet</h2>
+<div><table>
+  <tr><th>VND bn</th><th colspan="2">Period end</th></tr>
+  <tr><td>Total assets</td><td>929,511</td><td>1,037,645</td></tr>
+</table></div>
+</body></html>"""
+
+
+class _IRHandler(BaseHTTPRequestHandler):
+    """Serves the highlights page with an ETag; other paths are slow pages that record how many run at once."""
+
+    def do_GET(self):
+        server = self.server
+        if self.path == "/highlights":
+            server.statuses.append(304 if self.headers.get("If-None-Match") == ETAG else 200)
+            if server.statuses[-1] == 304:
+                self.send_response(304)
+                self.send_header("ETag", ETAG)
+                self.end_headers()
+                return
+            body = HIGHLIGHTS_PAGE.encode("utf-8")
+        else:
+            with server.lock:
+                server.in_flight += 1
+                server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            time.sleep(0.2)
+            with server.lock:
+                server.in_flight -= 1
+            body = b"<html><body><p>slow</p></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ir_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _IRHandler)
+    server.lock = threading.Lock()
+    server.in_flight = server.max_in_flight = 0
+    server.statuses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("host_concurrency", [1, 3])
+def test_per_host_limit(ir_server, host_concurrency):
+    server, base_url = ir_server
+    urls = [f"{base_url}/slow/{i}" for i in range(6)]
+
+    results = asyncio.run(fetch_pages(urls, concurrency=8, host_concurrency=host_concurrency))
+
+    assert all(status == 200 for _, status, _ in results.values())
+    assert server.max_in_flight == host_concurrency
+
+
+def test_unchanged_page_is_read_from_cache(ir_server, tmp_path):
+    server, base_url = ir_server
+    cache = PageCache(str(tmp_path / "pages"))
+    url = f"{base_url}/highlights"
+
+    first = asyncio.run(fetch_pages([url], cache))[url]
+    second = asyncio.run(fetch_pages([url], cache))[url]
+
+    assert server.statuses == [200, 304]
+    assert first[1] == 200 and second[1] == 304
+    assert second[0] == first[0] == HIGHLIGHTS_PAGE
+
+
+def test_tables_are_titled_and_converted_to_records(ir_server, tmp_path):
+    _, base_url = ir_server
+    output_path = tmp_path / "crawled.json"
+
+    crawl([{"url": f"{base_url}/highlights", "title_selector": "h2.table-title"}], str(output_path),
+          cache_dir=str(tmp_path / "pages"))
+
+    with open(output_path, "r", encoding="utf-8") as f:
+        crawled = json.load(f)
+    assert crawled == {
+        "2Q25 Financial Highlights": [
+            {"VND bn": "Total operating income", "2Q24": "10,208", "2Q25": "11,538"},
+            {"VND bn": "Profit before tax", "2Q24": "6,849", "2Q25": "7,781"},
+        ],
+        # A colspan header is repeated per column, so the last column wins the key
+        "Balance Sheet": [{"VND bn": "Total assets", "Period end": "1,037,645"}],
+    }
+
+
+def test_title_selector_match_after_the_table_is_not_used():
+    html = ("<table><tr><th>Metric</th><th>2Q25</th></tr><tr><td>NPL</td><td>1.2%</td></tr></table>"
+            "<h2 class='table-title'>Later section</h2>")
+    [(title, _)] = extract_tables(html, title_selector="h2.table-title")
+    assert title == "Table 1"
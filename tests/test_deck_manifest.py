@@ -0,0 +1,36 @@
+import io
+import re
+import zipfile
+
+from pptx import Presentation
+
+from deck_manifest import splice_slides
+
+
+def _saved_deck(titles):
+    prs = Presentation()
+    for title in titles:
+        prs.slides.add_slide(prs.slide_layouts[5]).shapes.title.text = title
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    return buffer.getvalue()
+
+
+def _slide_targets(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as package:
+        rels = package.read("ppt/_rels/presentation.xml.rels").decode("utf-8")
+    return re.findall(r'Target="(slides/[^"]+)"', rels)
+
+
+def test_splice_reorders_and_drops_slides_of_a_reopened_deck():
+    prs = Presentation(io.BytesIO(_saved_deck(["A", "B", "C", "D"])))
+    sld_ids = list(prs.slides._sldIdLst.sldId_lst)
+
+    splice_slides(prs, [sld_ids[3], sld_ids[0], sld_ids[2]])
+    buffer = io.BytesIO()
+    prs.save(buffer)
+
+    targets = _slide_targets(buffer.getvalue())
+    assert sorted(targets) == ["slides/slide1.xml", "slides/slide2.xml", "slides/slide3.xml"]
+    reloaded = Presentation(io.BytesIO(buffer.getvalue()))
+    assert [slide.shapes.title.text for slide in reloaded.slides] == ["D", "A", "C"]
@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+from conftest import PROJECT_ROOT
+from derived_metrics import DerivedMetrics
+from metric_store import MetricStore, load_metric_store
+
+TITLE = "1H25 Financial Highlights"
+QUARTERS = ("3Q24", "4Q24", "1Q25", "2Q25")
+
+
+def _row(metric, quarters, cumulative, comparison=None):
+    row = {"VND bn": metric, **dict(zip(QUARTERS, quarters)), "6M25": cumulative}
+    if comparison is not None:
+        row["6M25 vs 2Q25"] = comparison
+    return row
+
+
+def _derived():
+    rows = [
+        # A stock: the cumulative column repeats the period end, shown with fewer decimals
+        _row("NPL", ("1.35%", "1.17%", "1.23%", "1.28%"), "1.3%", "+0 bps"),
+        _row("Total assets", ("927,053", "978,799", "989,216", "1,037,645"), "1,037,645"),
+        # A flow: the cumulative column sums the half year's quarters
+        _row("Net interest income", ("8,929", "8,602", "8,305", "9,137"), "17,442"),
+        # A ratio over the period is neither
+        _row("CIR", ("29.2%", "49.6%", "28.3%", "30.1%"), "29.2%"),
+    ]
+    return DerivedMetrics(MetricStore.from_data({TITLE: rows}))
+
+
+def test_rows_are_classified_from_their_cumulative_columns():
+    derived = _derived()
+    rows = [derived.row(TITLE, metric) for metric in ("NPL", "Total assets", "Net interest income", "CIR")]
+    assert derived.stocks[rows].tolist() == [True, True, False, False]
+    assert derived.flows[rows].tolist() == [False, False, True, False]
+
+
+def test_ltm_sums_flows_only():
+    derived = _derived()
+    assert derived.series(TITLE, "Net interest income", ["2Q25"], "ltm").tolist() == [34973.0]
+    # The LTM of a stock is its period-end value, not a sum of four balances
+    assert derived.series(TITLE, "Total assets", ["2Q25"], "ltm").tolist() == [1037645.0]
+    assert np.isnan(derived.series(TITLE, "CIR", ["2Q25"], "ltm")).all()
+
+
+def test_cross_check_allows_for_the_precision_of_the_inputs():
+    derived = _derived()
+    # The stock's 6M25 cell takes the period-end 1.28%, so 6M25 vs 2Q25 is +0 bps, good to +-1 bps
+    assert derived.cross_check() == (1, [])
+
+    checked, mismatches = DerivedMetrics(MetricStore.from_data({TITLE: [
+        _row("NPL", ("1.35%", "1.17%", "1.23%", "1.28%"), "1.3%", "+3 bps")]})).cross_check()
+    assert checked == 1
+    assert [(m["shipped"], m["derived"]) for m in mismatches] == [(3.0, 0.0)]
+
+    # Ratios shown to 0.1% only give deltas to +-10 bps: +9 bps is consistent, +12 bps is not
+    rows = [_row("CIR", ("29.2%", "49.6%", "28.3%", "30.1%"), "30.1%", "+9 bps"),
+            _row("CASA", ("38.9%", "40.8%", "39.4%", "41.1%"), "41.1%", "+12 bps")]
+    _, mismatches = DerivedMetrics(MetricStore.from_data({TITLE: rows})).cross_check()
+    assert [m["metric"] for m in mismatches] == ["CASA"]
+
+
+def test_shipped_comparisons_match_the_shipped_data():
+    for name in ("financial_highlights.json", "financial_highlights_ver2.json"):
+        store = load_metric_store(os.path.join(PROJECT_ROOT, "data", name))
+        checked, mismatches = DerivedMetrics(store).cross_check()
+        assert checked == 138
+        assert mismatches == []
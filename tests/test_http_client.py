@@ -0,0 +1,117 @@
+import asyncio
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from http_client import MAX_RETRY_AFTER, HttpClient
+
+
+class _ScriptedHandler(BaseHTTPRequestHandler):
+    """Answers each request with the next (status, headers) of `server.script`, then 200."""
+
+    def do_GET(self):
+        self.server.calls += 1
+        status, headers = self.server.script.pop(0) if self.server.script else (200, {})
+        body = str(status).encode("utf-8")
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_POST = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ScriptedHandler)
+    server.calls = 0
+    server.script = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(max_retries=3):
+    return HttpClient(max_retries=max_retries, backoff_base=0.01, backoff_max=0.05)
+
+
+def test_429_and_5xx_are_retried(server):
+    server.script = [(503, {}), (429, {}), (500, {})]
+    with _client() as client:
+        response = client.get(server.url)
+    assert response.status_code == 200
+    assert (response.timing.attempts, server.calls) == (4, 4)
+
+
+def test_last_error_response_is_returned_once_retries_are_exhausted(server):
+    server.script = [(502, {})] * 5
+    with _client(max_retries=2) as client:
+        response = client.post(server.url, json={})
+    assert response.status_code == 502
+    assert (response.timing.attempts, server.calls) == (3, 3)
+
+
+def test_client_errors_are_not_retried(server):
+    server.script = [(404, {})]
+    with _client() as client:
+        assert client.get(server.url).status_code == 404
+    assert server.calls == 1
+
+
+def test_retry_after_is_waited_out(server):
+    server.script = [(429, {"Retry-After": "1"})]
+    with _client() as client:
+        response = client.get(server.url)
+    assert response.status_code == 200
+    assert response.timing.wait_s == 1.0
+    assert response.timing.elapsed_s >= 1.0
+
+
+def test_retry_after_above_the_cap_is_returned_without_waiting(server):
+    server.script = [(503, {"Retry-After": str(MAX_RETRY_AFTER + 1)})]
+    with _client() as client:
+        response = client.get(server.url)
+    assert response.status_code == 503
+    assert (response.timing.attempts, response.timing.wait_s, server.calls) == (1, 0.0, 1)
+
+
+def test_connection_errors_are_retried_then_raised(monkeypatch):
+    # A port nobody listens on: every attempt is refused
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        url = f"http://127.0.0.1:{sock.getsockname()[1]}/"
+    with _client(max_retries=2) as client:
+        attempts = []
+        send = client.session.request
+
+        def counted_send(*args, **kwargs):
+            attempts.append(1)
+            return send(*args, **kwargs)
+
+        monkeypatch.setattr(client.session, "request", counted_send)
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.get(url)
+    assert len(attempts) == 3
+
+
+def test_async_requests_share_the_retry_logic(server):
+    server.script = [(503, {}), (503, {})]
+
+    async def fetch_all(client):
+        return await asyncio.gather(client.aget(server.url), client.apost(server.url, json={}))
+
+    with _client() as client:
+        responses = asyncio.run(fetch_all(client))
+    assert [response.status_code for response in responses] == [200, 200]
+    assert sum(response.timing.attempts for response in responses) == server.calls == 4
@@ -0,0 +1,89 @@
+import glob
+import os
+
+import numpy as np
+from PIL import Image
+
+from image_assets import ImageAssetStage
+
+DPI = 100
+
+
+def _noise(path, size, mode="RGB", image_format=None):
+    # Random pixels do not compress, so downsampling always saves space
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (size[1], size[0], len(mode)), dtype=np.uint8)
+    Image.fromarray(pixels, mode).save(path, image_format)
+    return str(path)
+
+
+def _stage(tmp_path):
+    return ImageAssetStage(str(tmp_path / "cache"), dpi=DPI)
+
+
+def test_images_are_downsampled_to_their_display_size_in_their_own_format(tmp_path):
+    logo = _noise(tmp_path / "logo.png", (800, 400), "RGBA")
+    photo = _noise(tmp_path / "photo.jpg", (900, 600), image_format="JPEG")
+
+    prepared = _stage(tmp_path).prepare({logo: [1.0], photo: [2.0]})
+
+    with Image.open(prepared[logo]) as image:
+        assert (image.format, image.mode, image.size) == ("PNG", "RGBA", (200, 100))
+    with Image.open(prepared[photo]) as image:
+        assert (image.format, image.size) == ("JPEG", (300, 200))
+    assert all(os.path.getsize(prepared[path]) < os.path.getsize(path) for path in (logo, photo))
+
+
+def test_images_are_never_upscaled(tmp_path):
+    icon = _noise(tmp_path / "icon.png", (60, 40))
+    prepared = _stage(tmp_path).prepare({icon: [3.5]})
+    with Image.open(prepared[icon]) as image:
+        assert image.size == (60, 40)
+
+
+def test_copies_share_one_image_sized_for_their_largest_use(tmp_path):
+    logo = _noise(tmp_path / "logo.png", (800, 400))
+    copy = tmp_path / "assets" / "logo_copy.png"
+    copy.parent.mkdir()
+    copy.write_bytes((tmp_path / "logo.png").read_bytes())
+    stage = _stage(tmp_path)
+
+    prepared = stage.prepare({logo: [1.0], str(copy): [1.0, 2.0], str(tmp_path / "missing.png"): [1.0]})
+
+    assert prepared[logo] == prepared[str(copy)] == stage.path_for(str(copy))
+    assert str(tmp_path / "missing.png") not in prepared
+    with Image.open(prepared[logo]) as image:
+        assert image.size == (400, 200)
+    assert (stage.prepared, stage.cache_hits) == (1, 0)
+
+
+def test_prepared_images_come_from_the_cache_on_the_next_build(tmp_path):
+    logo = _noise(tmp_path / "logo.png", (800, 400))
+    first = _stage(tmp_path).prepare({logo: [1.0]})
+
+    stage = _stage(tmp_path)
+    assert stage.prepare({logo: [1.0]}) == first
+    assert (stage.prepared, stage.cache_hits) == (0, 1)
+    # Another display size is another cache entry
+    assert _stage(tmp_path).prepare({logo: [2.0]})[logo] != first[logo]
+
+
+def test_source_is_kept_when_recompressing_does_not_shrink_it(tmp_path):
+    flat = tmp_path / "flat.png"
+    Image.new("RGB", (50, 50), "white").save(flat, optimize=True)
+    stage = _stage(tmp_path)
+
+    assert stage.prepare({str(flat): [1.0]}) == {str(flat): str(flat)}
+    markers = glob.glob(str(tmp_path / "cache" / "*" / "*.source"))
+    assert len(markers) == 1 and not os.path.exists(markers[0][:-len(".source")])
+
+    # The marker is a cache hit: the image is not prepared again
+    again = _stage(tmp_path)
+    assert again.prepare({str(flat): [1.0]}) == {str(flat): str(flat)}
+    assert (again.prepared, again.cache_hits) == (0, 1)
+
+
+def test_files_that_are_not_images_are_embedded_as_they_are(tmp_path):
+    not_an_image = tmp_path / "logo.png"
+    not_an_image.write_bytes(b"not an image")
+    assert _stage(tmp_path).prepare({str(not_an_image): [1.0]}) == {str(not_an_image): str(not_an_image)}
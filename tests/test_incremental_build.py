@@ -0,0 +1,95 @@
+import re
+import runpy
+import shutil
+import subprocess
+import sys
+import zipfile
+
+import pytest
+from pptx import Presentation
+
+from conftest import PROJECT_ROOT
+from metric_store import load_metric_store
+
+BUILDER = "scripts/deck_builder.py"
+GENERATED_SCRIPT = "scripts/generated_report_script.py"
+DECK = "Bao_Cao_Tai_Chinh_Doanh_Nghiep.pptx"
+EDITED_SLIDE_TITLE = "Tóm Tắt Điều Hành (Executive Summary)"
+
+
+def _project_copy(tmp_path):
+    project = tmp_path / "project"
+    for name in ("data", "prompts", "scripts"):
+        shutil.copytree(f"{PROJECT_ROOT}/{name}", project / name, ignore=shutil.ignore_patterns("__pycache__"))
+    return project
+
+
+def _build(project, *args, builder=BUILDER):
+    subprocess.run([sys.executable, builder, *args], cwd=project, check=True, capture_output=True, timeout=300)
+    return (project / "generation.log").read_text(encoding="utf-8")
+
+
+def _assert_deck_matches_definitions(project, definitions_path="prompts/slide_definitions.py"):
+    """The saved deck reopens with one slide per definition, in order, each behind its own part."""
+    definitions = runpy.run_path(str(project / definitions_path))["slide_definitions"]
+    deck = project / DECK
+    with zipfile.ZipFile(deck) as package:
+        rels = package.read("ppt/_rels/presentation.xml.rels").decode("utf-8")
+    targets = re.findall(r'Target="([^"]+)"', rels)
+    assert len(targets) == len(set(targets))
+
+    prs = Presentation(str(deck))
+    assert len(prs.slides) == len(definitions)
+    assert [slide.shapes.title.text for slide in prs.slides] == [slide_def["title"] for slide_def in definitions]
+
+
+def _edit_bullet(project):
+    definitions = project / "prompts" / "slide_definitions.py"
+    source = definitions.read_text(encoding="utf-8")
+    edited = source.replace("Điểm sáng 2025:", "Điểm nổi bật 2025:")
+    assert edited != source
+    definitions.write_text(edited, encoding="utf-8")
+
+
+def test_editing_one_bullet_rebuilds_one_slide(tmp_path):
+    project = _project_copy(tmp_path)
+    first = _build(project, "--incremental", "--no-skeleton-cache")
+    assert "Rebuilt 10 of 10 slide(s)" in first
+    _assert_deck_matches_definitions(project)
+
+    _edit_bullet(project)
+    second = _build(project, "--incremental", "--no-skeleton-cache")
+    assert "Rebuilt 1 of 10 slide(s)" in second
+    assert f"slide 2: '{EDITED_SLIDE_TITLE}'" in second
+    _assert_deck_matches_definitions(project)
+
+
+def test_editing_one_bullet_keeps_other_skeletons(tmp_path):
+    project = _project_copy(tmp_path)
+    _build(project)
+    _assert_deck_matches_definitions(project)
+    _edit_bullet(project)
+    # Changing a static slide misses its skeleton but must not change the rendering fingerprint:
+    # restoring the bullet finds the first skeleton again
+    _build(project)
+    definitions = project / "prompts" / "slide_definitions.py"
+    definitions.write_text(definitions.read_text(encoding="utf-8").replace("Điểm nổi bật 2025:", "Điểm sáng 2025:"),
+                           encoding="utf-8")
+    assert "Deck skeleton cache: 1 hit(s), 0 miss(es)" in _build(project)
+    _assert_deck_matches_definitions(project)
+
+
+
+def test_generated_script_charts_a_derived_series(tmp_path):
+    project = _project_copy(tmp_path)
+    _build(project, "--chart-backend", "native", builder=GENERATED_SCRIPT)
+    _assert_deck_matches_definitions(project, GENERATED_SCRIPT)
+
+    # The last slide plots quarter-on-quarter growth of the operating income, not its reported values
+    chart_def = runpy.run_path(str(project / GENERATED_SCRIPT))["slide_definitions"][-1]["chart_definition"]
+    assert chart_def["transform"] == "qoq"
+    store = load_metric_store(str(project / "data" / "financial_highlights.json"))
+    income = store.series(chart_def["data_source_title"], chart_def["data_key"], ["2Q24", *chart_def["x_axis_keys"]])
+    chart = next(shape.chart for shape in Presentation(str(project / DECK)).slides[-1].shapes if shape.has_chart)
+    assert list(chart.plots[0].categories) == chart_def["x_axis_keys"]
+    assert list(chart.plots[0].series[0].values) == pytest.approx((income[1:] / income[:-1] - 1) * 100)
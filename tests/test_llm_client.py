@@ -0,0 +1,72 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_client import ChatClient
+
+MESSAGES = [{"role": "user", "content": "Write the report script."}]
+
+
+class _CompletionHandler(BaseHTTPRequestHandler):
+    """A blocking /chat/completions endpoint answering with a numbered script per request."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.calls += 1
+        body = json.dumps({"choices": [{"message": {"content": f"print({self.server.calls})"}}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def completion_server(tmp_path, monkeypatch):
+    # The response cache and token log live under the working directory
+    monkeypatch.chdir(tmp_path)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CompletionHandler)
+    server.calls = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _complete(server):
+    client = ChatClient(f"http://127.0.0.1:{server.server_address[1]}/chat/completions", {})
+    return client, client.complete(MESSAGES)
+
+
+def test_response_is_cached_only_once_accepted(completion_server):
+    client, first = _complete(completion_server)
+    client.close()
+    # Not accepted: the next run asks the model again
+    client, second = _complete(completion_server)
+    client.accept()
+    client.close()
+    client, third = _complete(completion_server)
+    client.close()
+
+    assert (first, second, third) == ("print(1)", "print(2)", "print(2)")
+    assert completion_server.calls == 2
+
+
+def test_rejected_cached_response_is_deleted(completion_server):
+    client, _ = _complete(completion_server)
+    client.accept()
+    client.close()
+
+    client, cached = _complete(completion_server)
+    client.reject()
+    client.close()
+    client, fresh = _complete(completion_server)
+    client.close()
+
+    assert (cached, fresh) == ("print(1)", "print(2)")
@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_client import ChatClient
+from llm_stream import StreamIncompleteError, StreamStalledError, stream_chat_completion
+
+CODE = "import os\n\nprint(os.getcwd())\n"
+FIRST_TOKEN_DELAY_S = 0.2
+
+
+class _SSEHandler(BaseHTTPRequestHandler):
+    """
+    A /chat/completions endpoint that streams `server.answer` as chunked SSE, a few characters per
+    event. With `server.stall_s`, it goes silent for that long halfway through the answer.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def _chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _event(self, payload):
+        self._chunk(f"data: {json.dumps(payload)}\n\n")
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        time.sleep(FIRST_TOKEN_DELAY_S)
+        answer = self.server.answer
+        for i in range(0, len(answer), 5):
+            if self.server.stall_s and i >= len(answer) // 2:
+                time.sleep(self.server.stall_s)
+                return
+            self._event({"choices": [{"delta": {"content": answer[i:i + 5]}}]})
+            self._chunk(": keep-alive\n\n")
+            time.sleep(0.005)
+        self._event({"choices": [], "usage": {"prompt_tokens": 12, "completion_tokens": 7}})
+        self._chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def sse_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SSEHandler)
+    server.requests = []
+    server.answer = ""
+    server.stall_s = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+
+
+def _stream(server, output_path, stall_timeout=5):
+    return stream_chat_completion(_url(server), {"Content-Type": "application/json"},
+                                  {"model": "test-model", "messages": []}, str(output_path),
+                                  stall_timeout=stall_timeout)
+
+
+def test_streams_code_into_part_file(sse_server, tmp_path):
+    sse_server.answer = f"```python\n{CODE}```\n"
+    output_path = tmp_path / "generated.py"
+
+    text, metrics = _stream(sse_server, output_path)
+
+    assert text == sse_server.answer
+    assert sse_server.requests[0]["stream"] is True
+    # The script itself is only written by the caller, once the code gate passed
+    assert not output_path.exists()
+    assert (tmp_path / "generated.py.part").read_text(encoding="utf-8") == "\n" + CODE
+
+    assert metrics["model"] == "test-model"
+    assert metrics["time_to_first_token_s"] >= FIRST_TOKEN_DELAY_S
+    assert metrics["total_latency_s"] >= metrics["time_to_first_token_s"]
+    assert metrics["completion_tokens"] == 7
+    assert metrics["prompt_tokens"] == 12
+    assert metrics["tokens_estimated"] is False
+    assert metrics["tokens_per_second"] > 0
+
+
+def test_unclosed_fence_keeps_part_file(sse_server, tmp_path):
+    sse_server.answer = f"```python\n{CODE}"
+    output_path = tmp_path / "generated.py"
+
+    with pytest.raises(StreamIncompleteError):
+        _stream(sse_server, output_path)
+
+    # What arrived is left for debugging; the script itself is untouched
+    assert (tmp_path / "generated.py.part").read_text(encoding="utf-8") == "\n" + CODE
+    assert not output_path.exists()
+
+
+def test_stalled_stream_keeps_what_arrived(sse_server, tmp_path):
+    sse_server.answer = f"```python\n{CODE}```\n"
+    sse_server.stall_s = 1.5
+    output_path = tmp_path / "generated.py"
+
+    with pytest.raises(StreamStalledError):
+        _stream(sse_server, output_path, stall_timeout=0.5)
+
+    partial = (tmp_path / "generated.py.part").read_text(encoding="utf-8")
+    # The first half of the code, including the characters held back for a closing fence
+    assert len(partial) >= len(CODE) // 2 and ("\n" + CODE).startswith(partial)
+    assert not output_path.exists()
+
+
+def test_chat_client_removes_the_preview_only_after_a_complete_stream(sse_server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    sse_server.answer = f"```python\n{CODE}```\n"
+    part_path = tmp_path / "generated.py.part"
+
+    client = ChatClient(_url(sse_server), {}, use_cache=False, stream_path="generated.py", stall_timeout=0.5)
+    client.complete([])
+    client.close()
+    assert not part_path.exists()
+
+    sse_server.stall_s = 1.5
+    client = ChatClient(_url(sse_server), {}, use_cache=False, stream_path="generated.py", stall_timeout=0.5)
+    with pytest.raises(StreamStalledError):
+        client.complete([])
+    client.close()
+    assert part_path.exists()
@@ -0,0 +1,85 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from conftest import PROJECT_ROOT
+from metric_binary import is_metric_binary, open_metric_binary, write_metric_binary
+from metric_store import MetricStore, MetricTable, load_metric_store
+
+TITLE = "1H25 Financial Highlights"
+
+
+def _store():
+    rows = [
+        {"VND bn": "Total assets", "2Q24": "927,053", "2Q25": "1,037,645", "2Q25 vs 2Q24": "11.9%"},
+        # Blank cells are NaN, in memory and on disk
+        {"VND bn": "NPL", "2Q24": "1.12%", "2Q25": "", "2Q25 vs 2Q24": "+16 bps"},
+        {"VND bn": "Net income", "2Q24": "(3,949)", "2Q25": "4,210", "2Q25 vs 2Q24": ""},
+    ]
+    return MetricStore.from_data({TITLE: rows, "Empty table": []}, source="report.json")
+
+
+def _assert_same_tables(actual, expected):
+    assert list(actual.tables) == list(expected.tables)
+    for title, table in expected.tables.items():
+        other = actual.tables[title]
+        assert (other.label_header, other.metrics, other.periods) == (table.label_header, table.metrics, table.periods)
+        np.testing.assert_array_equal(other.values, table.values)
+        np.testing.assert_array_equal(other.units, table.units)
+
+
+def test_round_trip_keeps_values_units_and_blanks(tmp_path):
+    store = _store()
+    path = str(tmp_path / "highlights.fhb")
+    write_metric_binary(store, path)
+
+    assert is_metric_binary(path)
+    loaded = load_metric_store(path)
+    _assert_same_tables(loaded, store)
+    assert loaded.sources == {TITLE: "report.json", "Empty table": "report.json"}
+    assert np.isnan(loaded.get(TITLE, "NPL", "2Q25"))
+    assert loaded.unit(TITLE, "NPL", "2Q25 vs 2Q24") == "bps"
+    assert loaded.get(TITLE, "Net income", "2Q24") == -3949.0
+    # Values are read-only views of the mapped file, not copies
+    values = loaded.tables[TITLE].values
+    assert not values.flags.owndata and not values.flags.writeable
+
+
+def test_shipped_data_round_trips(tmp_path):
+    for name in ("financial_highlights.json", "financial_highlights_ver2.json"):
+        store = load_metric_store(os.path.join(PROJECT_ROOT, "data", name))
+        path = str(tmp_path / f"{name}.fhb")
+        write_metric_binary(store, path)
+        _assert_same_tables(open_metric_binary(path), store)
+
+
+def test_pickling_maps_the_file_again_and_keeps_in_memory_changes(tmp_path):
+    big = MetricTable("Big table", "VND bn", [f"Metric {i}" for i in range(2000)], ["2Q24", "2Q25"],
+                      np.arange(4000, dtype=np.float64).reshape(2000, 2), np.zeros((2000, 2), dtype=np.int8))
+    store = _store()
+    store.add_table(big)
+    path = str(tmp_path / "highlights.fhb")
+    write_metric_binary(store, path)
+
+    loaded = open_metric_binary(path)
+    added = MetricTable.from_rows("Added table", [{"VND bn": "CASA", "2Q25": "41.1%"}])
+    loaded.tables["Added table"] = added
+    del loaded.tables["Empty table"]
+    payload = pickle.dumps(loaded)
+
+    # The mapped arrays are not in the pickle, only the path and the changes
+    assert len(payload) < big.values.nbytes
+    unpickled = pickle.loads(payload)
+    assert list(unpickled.tables) == [TITLE, "Big table", "Added table"]
+    np.testing.assert_array_equal(unpickled.tables["Big table"].values, big.values)
+    assert unpickled.get("Added table", "CASA", "2Q25") == 41.1
+
+
+def test_rejects_files_in_another_format(tmp_path):
+    path = tmp_path / "highlights.json"
+    path.write_text("{}", encoding="utf-8")
+    assert not is_metric_binary(str(path))
+    with pytest.raises(ValueError, match="Not a financial highlights binary file"):
+        open_metric_binary(str(path))
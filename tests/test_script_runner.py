@@ -0,0 +1,94 @@
+import pytest
+
+import script_runner
+from script_runner import WarmScriptPool, _memory_limit
+
+
+def _script(tmp_path, name, source):
+    (tmp_path / name).write_text(source, encoding="utf-8")
+    return name
+
+
+@pytest.fixture
+def pool():
+    # No preloads: the tests are about job handling, not import savings
+    with WarmScriptPool(preload=(), max_jobs_per_worker=3) as pool:
+        yield pool
+
+
+def test_runs_scripts_in_their_directory_and_reuses_the_worker(pool, tmp_path):
+    (tmp_path / "input.txt").write_text("data", encoding="utf-8")
+    script = _script(tmp_path, "ok.py", "import sys\nprint(open('input.txt').read(), sys.argv[1:])\n"
+                                        "print('warning', file=sys.stderr)\n")
+
+    first = pool.run(script, cwd=str(tmp_path), args=["--fast"])
+    second = pool.run(script, cwd=str(tmp_path))
+
+    assert (first.returncode, first.stdout, first.stderr) == (0, "data ['--fast']\n", "warning\n")
+    assert second.stdout == "data []\n"
+    assert first.worker_pid == second.worker_pid
+
+
+def test_worker_is_replaced_after_max_jobs(pool, tmp_path):
+    script = _script(tmp_path, "ok.py", "print('ok')\n")
+    pids = [pool.run(script, cwd=str(tmp_path)).worker_pid for _ in range(4)]
+    assert pids[0] == pids[1] == pids[2] != pids[3]
+
+
+def test_failed_job_respawns_the_worker(pool, tmp_path):
+    failing = _script(tmp_path, "fail.py", "import sys\nsys.exit(3)\n")
+    raising = _script(tmp_path, "raise.py", "raise ValueError('bad data')\n")
+    ok = _script(tmp_path, "ok.py", "print('ok')\n")
+
+    failed = pool.run(failing, cwd=str(tmp_path))
+    raised = pool.run(raising, cwd=str(tmp_path))
+    after = pool.run(ok, cwd=str(tmp_path))
+
+    assert failed.returncode == 3
+    assert raised.returncode == 1 and "ValueError: bad data" in raised.stderr
+    assert len({failed.worker_pid, raised.worker_pid, after.worker_pid}) == 3
+    assert after.returncode == 0
+
+
+def test_timed_out_job_kills_the_worker(pool, tmp_path):
+    slow = _script(tmp_path, "slow.py", "import time\ntime.sleep(30)\n")
+    ok = _script(tmp_path, "ok.py", "print('ok')\n")
+
+    timed_out = pool.run(slow, cwd=str(tmp_path), timeout=1)
+    after = pool.run(ok, cwd=str(tmp_path))
+
+    assert timed_out.timed_out and timed_out.returncode is None
+    assert "timed out after 1s" in timed_out.stderr
+    assert after.returncode == 0 and after.worker_pid != timed_out.worker_pid
+
+
+@pytest.mark.skipif(script_runner.resource is None, reason="no rlimits on this platform")
+def test_memory_limit_applies_to_the_job_only(tmp_path):
+    resource = script_runner.resource
+    limit = 2048 * 1024 * 1024
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY and hard < limit:
+        pytest.skip("hard address-space limit below the test limit")
+
+    with _memory_limit(limit):
+        assert resource.getrlimit(resource.RLIMIT_AS) == (limit, hard)
+    assert resource.getrlimit(resource.RLIMIT_AS) == (soft, hard)
+
+    show = _script(tmp_path, "show.py", "import resource\nprint(resource.getrlimit(resource.RLIMIT_AS)[0])\n")
+    greedy = _script(tmp_path, "greedy.py", "data = bytearray(4 * 1024 ** 3)\n")
+    with WarmScriptPool(preload=(), memory_limit_mb=2048) as limited:
+        shown = limited.run(show, cwd=str(tmp_path))
+        refused = limited.run(greedy, cwd=str(tmp_path))
+    assert shown.stdout == f"{limit}\n"
+    assert refused.returncode == 1 and "MemoryError" in refused.stderr
+
+
+def test_worker_dying_mid_job_is_reported_and_replaced(pool, tmp_path):
+    crash = _script(tmp_path, "crash.py", "import os\nos._exit(5)\n")
+    ok = _script(tmp_path, "ok.py", "print('ok')\n")
+
+    crashed = pool.run(crash, cwd=str(tmp_path))
+    after = pool.run(ok, cwd=str(tmp_path))
+
+    assert crashed.returncode == 5 and "Worker exited unexpectedly" in crashed.stderr
+    assert after.returncode == 0 and after.worker_pid != crashed.worker_pid